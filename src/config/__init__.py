@@ -1,7 +1,12 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
-from .tools import SELECTED_SEARCH_ENGINE, SearchEngine
+from .tools import (
+    SELECTED_CRAWLER_ENGINE,
+    SELECTED_SEARCH_ENGINE,
+    CrawlerEngine,
+    SearchEngine,
+)
 from .loader import load_yaml_config
 from .questions import BUILT_IN_QUESTIONS, BUILT_IN_QUESTIONS_ZH_CN
 
@@ -44,6 +49,8 @@ __all__ = [
     "TEAM_MEMBER_CONFIGRATIONS",
     "SELECTED_SEARCH_ENGINE",
     "SearchEngine",
+    "SELECTED_CRAWLER_ENGINE",
+    "CrawlerEngine",
     "BUILT_IN_QUESTIONS",
     "BUILT_IN_QUESTIONS_ZH_CN",
 ]
@@ -15,5 +15,11 @@ class SearchEngine(enum.Enum):
     ARXIV = "arxiv"
 
 
+class CrawlerEngine(enum.Enum):
+    JINA = "jina"
+    DIRECT = "direct"
+
+
 # Tool configuration
 SELECTED_SEARCH_ENGINE = os.getenv("SEARCH_API", SearchEngine.TAVILY.value)
+SELECTED_CRAWLER_ENGINE = os.getenv("CRAWLER_API", CrawlerEngine.DIRECT.value)
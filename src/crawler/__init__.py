@@ -2,9 +2,20 @@
 # SPDX-License-Identifier: MIT
 
 from .article import Article
+from .cache import CrawlCache, canonicalize_url, get_crawl_cache
 from .crawler import Crawler
+from .extraction import ExtractionPool, get_extraction_pool
+from .scheduler import CrawlDisallowedError, CrawlScheduler, get_crawl_scheduler
 
 __all__ = [
     "Article",
     "Crawler",
+    "CrawlCache",
+    "canonicalize_url",
+    "get_crawl_cache",
+    "ExtractionPool",
+    "get_extraction_pool",
+    "CrawlScheduler",
+    "CrawlDisallowedError",
+    "get_crawl_scheduler",
 ]
@@ -10,15 +10,22 @@ from markdownify import markdownify as md
 class Article:
     url: str
 
-    def __init__(self, title: str, html_content: str):
+    def __init__(
+        self, title: str, html_content: str, markdown_content: str | None = None
+    ):
         self.title = title
         self.html_content = html_content
+        # The markdown conversion of html_content is expensive, so it is computed
+        # at most once and can be seeded from a cache.
+        self.markdown_content = markdown_content
 
     def to_markdown(self, including_title: bool = True) -> str:
+        if self.markdown_content is None:
+            self.markdown_content = md(self.html_content)
         markdown = ""
         if including_title:
             markdown += f"# {self.title}\n\n"
-        markdown += md(self.html_content)
+        markdown += self.markdown_content
         return markdown
 
     def to_message(self) -> list[dict]:
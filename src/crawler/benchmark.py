@@ -0,0 +1,153 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Benchmark of the article extraction pipeline over a corpus of saved HTML pages.
+
+Usage:
+    python -m src.crawler.benchmark [--corpus DIR] [--modes inline-python,pool-python]
+
+Without ``--corpus``, a corpus is built from the markdown reports in ``examples/``
+by rendering them into HTML pages with typical navigation and script boilerplate.
+"""
+
+import argparse
+import html
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from .extraction import ExtractionPool, extract_article_parts
+
+EXAMPLES_DIR = Path(__file__).parent.parent.parent / "examples"
+
+_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<script>window.dataLayer = window.dataLayer || [];</script>
+<style>body {{ font-family: sans-serif; }}</style></head>
+<body><header><nav><a href="/">Home</a> | <a href="/news">News</a> |
+<a href="/about">About</a></nav></header>
+<main><article>{body}</article></main>
+<aside><h3>Related</h3><ul><li><a href="/a">Another story</a></li></ul></aside>
+<footer>Copyright 2025. All rights reserved.</footer>
+<script src="/static/bundle.js"></script></body></html>
+"""
+
+
+def _markdown_to_html(markdown: str) -> str:
+    # Good enough for benchmarking: headings, list items and paragraphs.
+    blocks = []
+    for block in re.split(r"\n\s*\n", markdown):
+        block = block.strip()
+        if not block:
+            continue
+        heading = re.match(r"^(#{1,6})\s+(.*)", block)
+        if heading:
+            level = len(heading.group(1))
+            blocks.append(f"<h{level}>{html.escape(heading.group(2))}</h{level}>")
+        elif block.startswith(("- ", "* ")):
+            items = "".join(
+                f"<li>{html.escape(line[2:].strip())}</li>"
+                for line in block.splitlines()
+                if line.startswith(("- ", "* "))
+            )
+            blocks.append(f"<ul>{items}</ul>")
+        else:
+            blocks.append(f"<p>{html.escape(block)}</p>")
+    return "\n".join(blocks)
+
+
+def build_corpus_from_examples(examples_dir: Path = EXAMPLES_DIR) -> Dict[str, str]:
+    """Render the markdown reports in ``examples/`` into HTML pages."""
+    corpus = {}
+    for path in sorted(examples_dir.glob("*.md")):
+        title = path.stem.replace("_", " ")
+        body = _markdown_to_html(path.read_text(encoding="utf-8"))
+        corpus[path.name] = _PAGE_TEMPLATE.format(title=html.escape(title), body=body)
+    return corpus
+
+
+def load_corpus(corpus_dir: Path) -> Dict[str, str]:
+    """Load every ``*.html`` file in a directory."""
+    return {
+        path.name: path.read_text(encoding="utf-8", errors="replace")
+        for path in sorted(corpus_dir.glob("*.html"))
+    }
+
+
+def _run_inline(pages: List[str], use_readability: bool) -> None:
+    for page in pages:
+        extract_article_parts(page, use_readability)
+
+
+def _run_pool(pages: List[str], use_readability: bool, workers: int) -> float:
+    pool = ExtractionPool(
+        max_workers=workers, time_budget=60, use_readability=use_readability
+    )
+    try:
+        # Warm the workers up so that process start-up is not measured.
+        pool.extract(pages[0], "warmup")
+        start = time.perf_counter()
+        for future in [
+            pool._get_executor().submit(extract_article_parts, page, use_readability)
+            for page in pages
+        ]:
+            future.result()
+        return time.perf_counter() - start
+    finally:
+        pool.shutdown()
+
+
+def run_benchmark(
+    corpus: Dict[str, str], modes: List[str], workers: int, repeat: int
+) -> None:
+    pages = list(corpus.values()) * repeat
+    total_bytes = sum(len(page.encode("utf-8")) for page in pages)
+    print(
+        f"Corpus: {len(corpus)} pages x {repeat} repeats, "
+        f"{total_bytes / 1024:.0f} KiB in total"
+    )
+    runners: Dict[str, Callable[[], float]] = {
+        "inline-python": lambda: _timed(_run_inline, pages, False),
+        "inline-readability": lambda: _timed(_run_inline, pages, True),
+        "pool-python": lambda: _run_pool(pages, False, workers),
+        "pool-readability": lambda: _run_pool(pages, True, workers),
+    }
+    for mode in modes:
+        if mode not in runners:
+            raise ValueError(f"Unknown benchmark mode: {mode}")
+        elapsed = runners[mode]()
+        print(
+            f"{mode:>20}: {elapsed:7.2f}s, {len(pages) / elapsed:7.1f} pages/s, "
+            f"{elapsed / len(pages) * 1000:7.1f} ms/page"
+        )
+
+
+def _timed(func: Callable, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark article extraction")
+    parser.add_argument(
+        "--corpus",
+        type=Path,
+        help="Directory of saved *.html pages (default: built from examples/)",
+    )
+    parser.add_argument(
+        "--modes",
+        default="inline-python,pool-python",
+        help="Comma separated modes: inline-python, inline-readability, "
+        "pool-python, pool-readability",
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else build_corpus_from_examples()
+    if not corpus:
+        raise SystemExit("The corpus is empty")
+    run_benchmark(corpus, args.modes.split(","), args.workers, args.repeat)
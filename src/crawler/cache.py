@@ -0,0 +1,361 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Persistent crawl cache keyed by canonicalized URL.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from email.utils import formatdate
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src.utils.metrics import register_metrics_provider
+
+from .article import Article
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only carry tracking information and never change the
+# returned page, so they are dropped from the cache key.
+_TRACKING_PARAM_PREFIXES = ("utm_",)
+_TRACKING_PARAMS = {"gclid", "fbclid", "mc_cid", "mc_eid", "spm"}
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def content_hash(html: str) -> str:
+    """The hash a cached page's HTML is compared by when it is fetched again."""
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL so that equivalent spellings share one cache entry.
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    tracking parameters, and sorts the remaining query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "http").lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        netloc += f":{parts.port}"
+    if parts.username:
+        userinfo = parts.username
+        if parts.password:
+            userinfo += f":{parts.password}"
+        netloc = f"{userinfo}@{netloc}"
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key not in _TRACKING_PARAMS
+            and not key.startswith(_TRACKING_PARAM_PREFIXES)
+        )
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+@dataclass
+class CacheEntry:
+    """A cached crawl result together with its HTTP validators."""
+
+    url: str
+    title: str
+    html: str
+    article_html: str
+    markdown: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    content_hash: Optional[str] = None
+
+    def to_article(self) -> Article:
+        article = Article(
+            title=self.title,
+            html_content=self.article_html,
+            markdown_content=self.markdown,
+        )
+        article.url = self.url
+        return article
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Build the headers for a conditional request revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        # Without a Last-Modified validator, the time we fetched the page is the
+        # best lower bound we have for the server to compare against.
+        headers["If-Modified-Since"] = self.last_modified or formatdate(
+            self.fetched_at, usegmt=True
+        )
+        return headers
+
+
+class CrawlCache:
+    """
+    A compressed, size-bounded crawl cache stored in SQLite.
+
+    Entries are evicted in least-recently-used order once the total size of the
+    compressed payloads exceeds ``max_bytes``. Entries older than ``ttl`` seconds
+    are still returned, but should be revalidated with a conditional request
+    before being reused.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl: float = 3600,
+    ):
+        """
+        Initialize the crawl cache.
+
+        Args:
+            cache_dir: Directory holding the cache database
+            max_bytes: Maximum total size of the compressed entries
+            ttl: Seconds an entry is served without revalidation
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(cache_dir, "crawl_cache.db"), check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL,
+                payload BLOB NOT NULL
+            )
+            """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+        )
+        self._conn.commit()
+        self._hits = 0
+        self._revalidated = 0
+        self._unchanged = 0
+        self._misses = 0
+        self._bytes_saved = 0
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(canonicalize_url(url).encode("utf-8")).hexdigest()
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """Return the cached entry for a URL, or None if it is not cached."""
+        key = self._key(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, fetched_at, content_hash, payload"
+                " FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        etag, last_modified, fetched_at, html_hash, payload = row
+        try:
+            data = json.loads(zlib.decompress(payload))
+        except (zlib.error, ValueError) as e:
+            logger.warning(f"Dropping corrupt crawl cache entry for {url}: {e}")
+            self.delete(url)
+            return None
+        return CacheEntry(
+            url=url,
+            title=data["title"],
+            html=data["html"],
+            article_html=data["article_html"],
+            markdown=data["markdown"],
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=fetched_at,
+            content_hash=html_hash,
+        )
+
+    def put(
+        self,
+        url: str,
+        html: str,
+        article: Article,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """Store a crawl result, evicting least recently used entries if needed."""
+        payload = zlib.compress(
+            json.dumps(
+                {
+                    "title": article.title,
+                    "html": html,
+                    "article_html": article.html_content,
+                    "markdown": article.to_markdown(including_title=False),
+                },
+                ensure_ascii=False,
+            ).encode("utf-8")
+        )
+        if len(payload) > self.max_bytes:
+            logger.debug(f"Crawl result for {url} is larger than the cache, skipping")
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, url, content_hash, etag,"
+                " last_modified, fetched_at, last_access, size, payload)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self._key(url),
+                    canonicalize_url(url),
+                    content_hash(html),
+                    etag,
+                    last_modified,
+                    now,
+                    now,
+                    len(payload),
+                    payload,
+                ),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def mark_revalidated(
+        self,
+        entry: CacheEntry,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        downloaded: bool = False,
+    ) -> None:
+        """
+        Mark an entry as fresh again after the server answered 304.
+
+        With ``downloaded``, the server sent the page again instead, with a body
+        identical to the cached one, so only its extraction was saved.
+        """
+        entry.fetched_at = time.time()
+        entry.etag = etag or entry.etag
+        entry.last_modified = last_modified or entry.last_modified
+        with self._lock:
+            self._conn.execute(
+                "UPDATE entries SET fetched_at = ?, etag = ?, last_modified = ?"
+                " WHERE key = ?",
+                (
+                    entry.fetched_at,
+                    entry.etag,
+                    entry.last_modified,
+                    self._key(entry.url),
+                ),
+            )
+            self._conn.commit()
+            self._revalidated += 1
+            if downloaded:
+                self._unchanged += 1
+            else:
+                self._bytes_saved += len(entry.html.encode("utf-8"))
+
+    def delete(self, url: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (self._key(url),))
+            self._conn.commit()
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.fetched_at < self.ttl
+
+    def record_hit(self, entry: CacheEntry) -> None:
+        with self._lock:
+            self._hits += 1
+            self._bytes_saved += len(entry.html.encode("utf-8"))
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self._misses += 1
+
+    def _evict(self) -> None:
+        # Caller must hold self._lock.
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access ASC"
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        logger.debug(f"Evicted {len(evicted)} entries from the crawl cache")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit ratio, bytes saved and occupancy of the cache."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            lookups = self._hits + self._revalidated + self._misses
+            return {
+                "hits": self._hits,
+                "revalidated": self._revalidated,
+                "unchanged": self._unchanged,
+                "misses": self._misses,
+                "hit_ratio": (
+                    (self._hits + self._revalidated) / lookups if lookups else 0.0
+                ),
+                "bytes_saved": self._bytes_saved,
+                "entries": entries,
+                "size_bytes": size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_crawl_cache: Optional[CrawlCache] = None
+_crawl_cache_lock = threading.Lock()
+
+
+def get_crawl_cache() -> Optional[CrawlCache]:
+    """
+    Return the process-wide crawl cache configured from the environment.
+
+    Returns None when the cache is disabled with ``CRAWL_CACHE_ENABLED=false``.
+    """
+    global _crawl_cache
+    if os.getenv("CRAWL_CACHE_ENABLED", "true").lower() in ("false", "0", "no"):
+        return None
+    with _crawl_cache_lock:
+        if _crawl_cache is None:
+            _crawl_cache = CrawlCache(
+                cache_dir=os.path.expanduser(
+                    os.getenv("CRAWL_CACHE_DIR", "~/.cache/deer-flow/crawl")
+                ),
+                max_bytes=int(os.getenv("CRAWL_CACHE_MAX_BYTES", 256 * 1024 * 1024)),
+                ttl=float(os.getenv("CRAWL_CACHE_TTL", 3600)),
+            )
+            register_metrics_provider("crawl_cache", _crawl_cache.stats)
+        return _crawl_cache
@@ -1,14 +1,40 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import logging
 import sys
+from typing import Optional
+
+from src.config import SELECTED_CRAWLER_ENGINE, CrawlerEngine
 
 from .article import Article
+from .cache import CacheEntry, CrawlCache, content_hash, get_crawl_cache
+from .direct_client import DirectClient, FetchError, FetchResult, looks_js_rendered
+from .extraction import ExtractionPool, get_extraction_pool
 from .jina_client import JinaClient
-from .readability_extractor import ReadabilityExtractor
+
+logger = logging.getLogger(__name__)
 
 
 class Crawler:
+    def __init__(
+        self,
+        cache: Optional[CrawlCache] = None,
+        extraction_pool: Optional[ExtractionPool] = None,
+    ):
+        self.cache = cache if cache is not None else get_crawl_cache()
+        self.extraction_pool = extraction_pool or get_extraction_pool()
+
+    def cached(self, url: str) -> Optional[Article]:
+        """Return the cached article for a URL if it is fresh, without any I/O."""
+        if self.cache is None:
+            return None
+        entry = self.cache.get(url)
+        if entry is None or not self.cache.is_fresh(entry):
+            return None
+        self.cache.record_hit(entry)
+        return entry.to_article()
+
     def crawl(self, url: str) -> Article:
         # To help LLMs better understand content, we extract clean
         # articles from HTML, convert them to markdown, and split
@@ -20,11 +46,71 @@ class Crawler:
         #
         # Instead of using Jina's own markdown converter, we'll use
         # our own solution to get better readability results.
+        #
+        # With the direct backend we fetch the page from its origin and only
+        # fall back to Jina when that fails or the page is rendered by
+        # JavaScript, which saves a network hop and Jina's rate limit.
+        if self.cache is not None:
+            entry = self.cache.get(url)
+            if entry is not None:
+                if self.cache.is_fresh(entry):
+                    self.cache.record_hit(entry)
+                    return entry.to_article()
+                article = self._revalidate(entry)
+                if article is not None:
+                    return article
+            self.cache.record_miss()
+
+        page = self._fetch(url)
+        article = self._extract(url, page.html)
+        if self.cache is not None:
+            self.cache.put(url, page.html, article, page.etag, page.last_modified)
+        return article
+
+    def _fetch(self, url: str) -> FetchResult:
+        if SELECTED_CRAWLER_ENGINE == CrawlerEngine.DIRECT.value:
+            try:
+                page = DirectClient().fetch(url)
+                if not looks_js_rendered(page.html):
+                    return page
+                logger.info(f"{url} looks rendered by JavaScript, using Jina")
+            except FetchError as e:
+                logger.info(f"Direct fetch failed, using Jina: {e}")
+        elif SELECTED_CRAWLER_ENGINE != CrawlerEngine.JINA.value:
+            raise ValueError(f"Unsupported crawler engine: {SELECTED_CRAWLER_ENGINE}")
         jina_client = JinaClient()
         html = jina_client.crawl(url, return_format="html")
-        extractor = ReadabilityExtractor()
-        article = extractor.extract_article(html)
-        article.url = url
+        return FetchResult(url=url, status_code=200, html=html)
+
+    def _extract(self, url: str, html: str) -> Article:
+        # Extraction and markdown conversion are CPU-heavy, so they run in a
+        # bounded process pool instead of the caller's thread.
+        return self.extraction_pool.extract(html, url)
+
+    def _revalidate(self, entry: CacheEntry) -> Optional[Article]:
+        # Ask the origin whether the page changed since we cached it. A 304
+        # lets us reuse the cached article without downloading or extracting
+        # anything; a 200 already carries the new page, so Jina is skipped.
+        try:
+            page = DirectClient().fetch(entry.url, headers=entry.conditional_headers())
+        except FetchError as e:
+            logger.debug(f"Revalidation of {entry.url} failed: {e}")
+            return None
+        if page.not_modified:
+            self.cache.mark_revalidated(entry, page.etag, page.last_modified)
+            return entry.to_article()
+        # Servers that ignore the validators send the same page again, which
+        # needs no extraction nor rewrite of the cached entry.
+        if entry.content_hash == content_hash(page.html):
+            self.cache.mark_revalidated(
+                entry, page.etag, page.last_modified, downloaded=True
+            )
+            return entry.to_article()
+        if looks_js_rendered(page.html):
+            return None
+        self.cache.record_miss()
+        article = self._extract(entry.url, page.html)
+        self.cache.put(entry.url, page.html, article, page.etag, page.last_modified)
         return article
 
 
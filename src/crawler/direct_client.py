@@ -0,0 +1,108 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import httpx
+
+from .streaming import FetchError, default_max_bytes, get_http_client, read_text_body
+
+# Markers of single-page apps whose content only appears after JavaScript runs.
+_JS_APP_SHELL_PATTERN = re.compile(
+    r"<div[^>]+id=[\"'](?:root|app|__next|__nuxt)[\"'][^>]*>\s*</div>", re.IGNORECASE
+)
+_NOSCRIPT_JS_PATTERN = re.compile(
+    r"<noscript[^>]*>[^<]*(?:enable|requires?)\s+javascript", re.IGNORECASE
+)
+_SCRIPT_OR_STYLE_PATTERN = re.compile(
+    r"<(script|style)[^>]*>.*?</\1>", re.IGNORECASE | re.DOTALL
+)
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+
+
+@dataclass
+class FetchResult:
+    """A page fetched from its origin together with its HTTP validators."""
+
+    url: str
+    status_code: int
+    html: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    truncated: bool = False
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status_code == 304
+
+
+def looks_js_rendered(html: str, min_text_length: int = 200) -> bool:
+    """
+    Guess whether a page needs a JavaScript-capable renderer to show its content.
+
+    Args:
+        html: The raw HTML of the page
+        min_text_length: Visible text shorter than this is considered empty
+
+    Returns:
+        True if the page is an app shell or has almost no text without scripts
+    """
+    if _JS_APP_SHELL_PATTERN.search(html) or _NOSCRIPT_JS_PATTERN.search(html):
+        return True
+    text = _TAG_PATTERN.sub(" ", _SCRIPT_OR_STYLE_PATTERN.sub(" ", html))
+    return len(" ".join(text.split())) < min_text_length
+
+
+class DirectClient:
+    """Fetches HTML straight from the origin server with a pooled HTTP client."""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        """
+        Initialize the direct client.
+
+        Args:
+            max_bytes: Maximum number of body bytes read per page
+        """
+        self.max_bytes = max_bytes or default_max_bytes()
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """
+        Fetch a page, reading at most ``max_bytes`` of its body.
+
+        Args:
+            url: The URL to fetch
+            headers: Extra request headers, e.g. conditional request validators
+
+        Returns:
+            The fetched page. A 304 response yields an empty ``html``.
+
+        Raises:
+            FetchError: If the request fails or the response is not an HTML page
+        """
+        try:
+            with get_http_client().stream("GET", url, headers=headers) as response:
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                if response.status_code == 304:
+                    return FetchResult(
+                        url=url,
+                        status_code=304,
+                        html="",
+                        etag=etag,
+                        last_modified=last_modified,
+                    )
+                if response.status_code != 200:
+                    raise FetchError(f"{url} returned HTTP {response.status_code}")
+                html, truncated = read_text_body(response, url, self.max_bytes)
+                return FetchResult(
+                    url=url,
+                    status_code=200,
+                    html=html,
+                    etag=etag,
+                    last_modified=last_modified,
+                    truncated=truncated,
+                )
+        except httpx.HTTPError as e:
+            raise FetchError(f"Failed to fetch {url}: {e!r}") from e
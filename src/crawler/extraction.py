@@ -0,0 +1,203 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Bounded process pool for HTML extraction and markdown conversion.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+
+from src.utils.metrics import register_metrics_provider
+
+from .article import Article
+from .readability_extractor import ReadabilityExtractor
+
+logger = logging.getLogger(__name__)
+
+
+def extract_article_parts(html: str, use_readability: bool) -> Tuple[str, str, str]:
+    """
+    Extract the article from a page and convert it to markdown.
+
+    This runs inside the pool workers, so it only takes and returns picklable
+    values.
+
+    Returns:
+        A tuple of the title, the extracted article HTML and its markdown
+    """
+    article = ReadabilityExtractor(use_readability=use_readability).extract_article(
+        html
+    )
+    return (
+        article.title,
+        article.html_content,
+        article.to_markdown(including_title=False),
+    )
+
+
+def _init_worker() -> None:
+    # A process group of its own lets a stuck worker be killed together with
+    # the Node.js process Readability.js runs in.
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+
+
+def _kill_worker(process: multiprocessing.Process) -> None:
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class ExtractionPool:
+    """
+    Runs article extraction in worker processes with a per-page time budget.
+
+    Pages whose Readability.js extraction exceeds the budget are extracted again
+    with the pure-Python path. Pages that exceed the budget on the pure-Python
+    path raise ``TimeoutError``.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        time_budget: float = 20.0,
+        use_readability: bool = True,
+    ):
+        """
+        Initialize the extraction pool.
+
+        Args:
+            max_workers: Number of worker processes, 0 extracts in the caller's thread
+            time_budget: Seconds a single page may spend in extraction
+            use_readability: Whether to try Readability.js before the pure-Python path
+        """
+        self.max_workers = max_workers
+        self.time_budget = time_budget
+        self.use_readability = use_readability
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._extracted = 0
+        self._timeouts = 0
+        self._fallbacks = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Spawned workers do not inherit the server's threads and locks.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def _recycle_executor(self, executor: ProcessPoolExecutor) -> None:
+        # A worker stuck on a pathological page would keep its slot, and the
+        # Node.js process under it, until it finishes, so the pool's workers
+        # are killed and the next page gets a fresh pool.
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        processes = list((executor._processes or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            _kill_worker(process)
+
+    def _run(self, html: str, use_readability: bool) -> Tuple[str, str, str]:
+        if self.max_workers <= 0:
+            return extract_article_parts(html, use_readability)
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                future = executor.submit(extract_article_parts, html, use_readability)
+                return future.result(timeout=self.time_budget)
+            except FutureTimeoutError:
+                with self._lock:
+                    self._timeouts += 1
+                self._recycle_executor(executor)
+                raise TimeoutError(
+                    f"Extraction exceeded the time budget of {self.time_budget}s"
+                )
+            except BrokenProcessPool:
+                # The pool was recycled under this page because another page
+                # timed out, so it is tried once more on the new pool.
+                if attempt:
+                    raise
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = None
+
+    def extract(self, html: str, url: str) -> Article:
+        """Extract an article from a page within the time budget."""
+        try:
+            title, content, markdown = self._run(html, self.use_readability)
+        except TimeoutError:
+            if not self.use_readability:
+                raise
+            logger.warning(
+                f"Readability extraction of {url} timed out, using the pure-Python path"
+            )
+            with self._lock:
+                self._fallbacks += 1
+            title, content, markdown = self._run(html, False)
+        with self._lock:
+            self._extracted += 1
+        article = Article(title=title, html_content=content, markdown_content=markdown)
+        article.url = url
+        return article
+
+    async def aextract(self, html: str, url: str) -> Article:
+        """Extract an article without blocking the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.extract, html, url
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "time_budget": self.time_budget,
+                "extracted": self._extracted,
+                "timeouts": self._timeouts,
+                "fallbacks": self._fallbacks,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_extraction_pool: Optional[ExtractionPool] = None
+_extraction_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> ExtractionPool:
+    """Return the process-wide extraction pool configured from the environment."""
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            _extraction_pool = ExtractionPool(
+                max_workers=int(
+                    os.getenv("CRAWLER_EXTRACTION_WORKERS", min(4, os.cpu_count() or 1))
+                ),
+                time_budget=float(os.getenv("CRAWLER_EXTRACTION_TIMEOUT", 20)),
+                use_readability=os.getenv("CRAWLER_USE_READABILITY", "true").lower()
+                not in ("false", "0", "no"),
+            )
+            register_metrics_provider("crawl_extraction", _extraction_pool.stats)
+        return _extraction_pool
@@ -3,13 +3,31 @@
 
 import logging
 import os
+from typing import Optional
 
-import requests
+import httpx
+
+from .streaming import FetchError, default_max_bytes, get_http_client, read_text_body
 
 logger = logging.getLogger(__name__)
 
+# Jina Reader labels rendered pages as plain text whatever the return format.
+_READER_CONTENT_TYPES = ("text/",)
+
 
 class JinaClient:
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        endpoint: str = "https://r.jina.ai/",
+        timeout: Optional[float] = None,
+    ):
+        self.max_bytes = max_bytes or default_max_bytes()
+        self.endpoint = endpoint
+        # Jina renders the page before answering, which often takes longer
+        # than the direct fetches the shared client's timeout is sized for.
+        self.timeout = timeout or float(os.getenv("JINA_TIMEOUT", 60))
+
     def crawl(self, url: str, return_format: str = "html") -> str:
         headers = {
             "Content-Type": "application/json",
@@ -22,5 +40,21 @@ class JinaClient:
                 "Jina API key is not set. Provide your own key to access a higher rate limit. See https://jina.ai/reader for more information."
             )
         data = {"url": url}
-        response = requests.post("https://r.jina.ai/", headers=headers, json=data)
-        return response.text
+        try:
+            with get_http_client().stream(
+                "POST",
+                self.endpoint,
+                headers=headers,
+                json=data,
+                timeout=httpx.Timeout(self.timeout, connect=5.0),
+            ) as response:
+                if response.status_code != 200:
+                    raise FetchError(
+                        f"Jina Reader returned HTTP {response.status_code} for {url}"
+                    )
+                html, _ = read_text_body(
+                    response, url, self.max_bytes, _READER_CONTENT_TYPES
+                )
+                return html
+        except httpx.HTTPError as e:
+            raise FetchError(f"Failed to crawl {url} with Jina Reader: {e!r}") from e
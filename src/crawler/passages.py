@@ -0,0 +1,144 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Relevance-ranked passage selection for crawled pages.
+"""
+
+import re
+from typing import List
+
+import numpy as np
+
+_CJK_RANGES = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff"
+_TOKEN_PATTERN = re.compile(f"[a-z0-9]+|[{_CJK_RANGES}]")
+_CJK_PATTERN = re.compile(f"[{_CJK_RANGES}]")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in",
+    "is", "it", "of", "on", "or", "that", "the", "this", "to", "was", "what",
+    "when", "where", "which", "who", "why", "with",
+}  # fmt: skip
+
+_OMISSION = "\n\n[...]\n\n"
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms for scoring.
+
+    Latin text is split into words without stopwords. CJK text has no spaces, so
+    it is represented by its characters and character bigrams.
+    """
+    raw = _TOKEN_PATTERN.findall(text.lower())
+    tokens = [token for token in raw if token not in _STOPWORDS]
+    tokens += [
+        first + second
+        for first, second in zip(raw, raw[1:])
+        if _CJK_PATTERN.fullmatch(first) and _CJK_PATTERN.fullmatch(second)
+    ]
+    return tokens
+
+
+def split_passages(markdown: str, chunk_chars: int = 400) -> List[str]:
+    """
+    Split markdown into passages of roughly ``chunk_chars`` characters.
+
+    Paragraphs are never split, a new passage starts at every heading, and
+    headings stay attached to the paragraphs that follow them.
+    """
+    passages: List[str] = []
+    current = ""
+    for block in re.split(r"\n\s*\n", markdown):
+        block = block.strip()
+        if not block:
+            continue
+        lone_heading = current.startswith("#") and "\n\n" not in current
+        if (
+            current
+            and not lone_heading
+            and (block.startswith("#") or len(current) + len(block) > chunk_chars)
+        ):
+            passages.append(current)
+            current = ""
+        current = f"{current}\n\n{block}" if current else block
+    if current:
+        passages.append(current)
+    return passages
+
+
+def bm25_scores(
+    passages: List[str], query: str, k1: float = 1.5, b: float = 0.75
+) -> np.ndarray:
+    """Score every passage against the query with Okapi BM25."""
+    query_terms = sorted(set(tokenize(query)))
+    if not passages or not query_terms:
+        return np.zeros(len(passages))
+    term_index = {term: i for i, term in enumerate(query_terms)}
+    rows, columns = [], []
+    doc_len = np.zeros(len(passages))
+    for row, passage in enumerate(passages):
+        tokens = tokenize(passage)
+        doc_len[row] = len(tokens)
+        for token in tokens:
+            column = term_index.get(token)
+            if column is not None:
+                rows.append(row)
+                columns.append(column)
+    tf = np.zeros((len(passages), len(query_terms)))
+    np.add.at(tf, (rows, columns), 1)
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((len(passages) - df + 0.5) / (df + 0.5))
+    avgdl = max(doc_len.mean(), 1.0)
+    norm = k1 * (1 - b + b * doc_len / avgdl)
+    return (tf * (k1 + 1) / (tf + norm[:, None]) * idf).sum(axis=1)
+
+
+def select_passages(
+    markdown: str,
+    query: str,
+    max_chars: int = 1000,
+    top_k: int = 5,
+    chunk_chars: int = 400,
+) -> str:
+    """
+    Select the passages of a page most relevant to a query.
+
+    Args:
+        markdown: The page content in markdown
+        query: The text to rank passages against, e.g. a research step
+        max_chars: Character budget for the returned text
+        top_k: Maximum number of passages returned
+        chunk_chars: Target passage size
+
+    Returns:
+        The best passages in document order, separated by omission markers.
+        Without a query or any matching passage, the start of the page.
+    """
+    if len(markdown) <= max_chars:
+        return markdown
+    passages = split_passages(markdown, chunk_chars)
+    scores = bm25_scores(passages, query)
+    if not scores.any():
+        return markdown[:max_chars]
+
+    selected: List[int] = []
+    used = 0
+    for index in np.argsort(-scores, kind="stable"):
+        if scores[index] <= 0 or len(selected) >= top_k:
+            break
+        cost = len(passages[index]) + (len(_OMISSION) if selected else 0)
+        if used + cost > max_chars:
+            continue
+        selected.append(int(index))
+        used += cost
+    if not selected:
+        # Even the best passage is over budget, so return its beginning.
+        return passages[int(np.argmax(scores))][:max_chars]
+
+    selected.sort()
+    text = ""
+    for position, index in enumerate(selected):
+        if position > 0:
+            text += "\n\n" if index == selected[position - 1] + 1 else _OMISSION
+        text += passages[index]
+    return text
@@ -7,8 +7,15 @@ from .article import Article
 
 
 class ReadabilityExtractor:
+    def __init__(self, use_readability: bool = True):
+        # Readability.js gives the cleanest articles but runs a Node.js process
+        # per page; the pure-Python mode of readabilipy is much cheaper.
+        self.use_readability = use_readability
+
     def extract_article(self, html: str) -> Article:
-        article = simple_json_from_html_string(html, use_readability=True)
+        article = simple_json_from_html_string(
+            html, use_readability=self.use_readability
+        )
         return Article(
             title=article.get("title"),
             html_content=article.get("content"),
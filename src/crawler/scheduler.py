@@ -0,0 +1,417 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Polite crawl scheduling: per-domain rate limits, robots.txt and fair queueing.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+from src.utils.metrics import register_metrics_provider
+
+from .article import Article
+from .crawler import Crawler
+from .streaming import FetchError, get_http_client, read_text_body
+
+logger = logging.getLogger(__name__)
+
+ROBOTS_USER_AGENT = "DeerFlow"
+_ROBOTS_MAX_BYTES = 512 * 1024
+
+
+class CrawlDisallowedError(Exception):
+    """Raised when robots.txt does not allow crawling a URL."""
+
+
+class TokenBucket:
+    """A token bucket refilled at ``rate`` tokens per second up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        self.tokens -= 1
+
+
+class RobotsCache:
+    """Fetches and caches robots.txt rules per origin."""
+
+    def __init__(self, ttl: float = 86400, error_ttl: float = 300, timeout: float = 5):
+        """
+        Initialize the robots.txt cache.
+
+        Args:
+            ttl: Seconds a fetched robots.txt is trusted
+            error_ttl: Seconds an unreachable robots.txt is treated as allow-all
+            timeout: Seconds before a robots.txt request times out
+        """
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.timeout = timeout
+        self._entries: Dict[str, Tuple[RobotFileParser, float]] = {}
+        self._lock = threading.Lock()
+        self._fetches = 0
+        self._hits = 0
+
+    def _fetch(self, origin: str) -> Tuple[RobotFileParser, float]:
+        parser = RobotFileParser(f"{origin}/robots.txt")
+        ttl = self.ttl
+        try:
+            with get_http_client().stream(
+                "GET", f"{origin}/robots.txt", timeout=self.timeout
+            ) as response:
+                if response.status_code in (401, 403):
+                    parser.disallow_all = True
+                elif 400 <= response.status_code < 500:
+                    parser.allow_all = True
+                elif response.status_code != 200:
+                    parser.allow_all = True
+                    ttl = self.error_ttl
+                else:
+                    text, _ = read_text_body(
+                        response, f"{origin}/robots.txt", _ROBOTS_MAX_BYTES, ("text/",)
+                    )
+                    parser.parse(text.splitlines())
+        except (httpx.HTTPError, FetchError) as e:
+            logger.debug(f"Failed to fetch robots.txt of {origin}: {e!r}")
+            parser.allow_all = True
+            ttl = self.error_ttl
+        # can_fetch() refuses everything until the parser has a fetch time.
+        parser.modified()
+        return parser, time.monotonic() + ttl
+
+    def get(self, url: str) -> RobotFileParser:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            cached = self._entries.get(origin)
+            if cached is not None and cached[1] > time.monotonic():
+                self._hits += 1
+                return cached[0]
+        parser, expires = self._fetch(origin)
+        with self._lock:
+            self._fetches += 1
+            self._entries[origin] = (parser, expires)
+        return parser
+
+    def allowed(self, url: str) -> bool:
+        return self.get(url).can_fetch(ROBOTS_USER_AGENT, url)
+
+    def crawl_delay(self, url: str) -> Optional[float]:
+        """The minimum delay between requests asked for by robots.txt, if any."""
+        parser = self.get(url)
+        delay = parser.crawl_delay(ROBOTS_USER_AGENT)
+        if delay is not None:
+            return float(delay)
+        rate = parser.request_rate(ROBOTS_USER_AGENT)
+        if rate is not None and rate.requests:
+            return rate.seconds / rate.requests
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "origins": len(self._entries),
+                "fetches": self._fetches,
+                "hits": self._hits,
+            }
+
+
+@dataclass
+class _CrawlJob:
+    url: str
+    domain: str
+    future: Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _DomainState:
+    bucket: TokenBucket
+    pending: Deque[_CrawlJob] = field(default_factory=deque)
+    in_flight: int = 0
+    completed: int = 0
+    failed: int = 0
+    disallowed: int = 0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=200))
+
+    @property
+    def idle(self) -> bool:
+        return not self.pending and self.in_flight == 0
+
+
+class CrawlScheduler:
+    """
+    Runs crawls politely across domains.
+
+    Every domain has a token bucket limiting its request rate and a cap on
+    concurrent requests. Queued URLs are dispatched round-robin over the
+    domains that have a token available, so a batch of URLs from one site
+    cannot starve crawls of other sites. Fresh cache hits skip the queue.
+    """
+
+    def __init__(
+        self,
+        crawler: Optional[Crawler] = None,
+        max_concurrency: int = 8,
+        domain_rate: float = 1.0,
+        domain_burst: float = 3,
+        domain_concurrency: int = 2,
+        robots: Optional[RobotsCache] = None,
+        max_domains: int = 1024,
+        max_crawl_delay: float = 30.0,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            crawler: The crawler running the requests
+            max_concurrency: Maximum number of crawls running at once
+            domain_rate: Requests per second allowed per domain
+            domain_burst: Requests a domain may receive in a burst
+            domain_concurrency: Maximum number of concurrent crawls per domain
+            robots: robots.txt cache, or None to ignore robots.txt
+            max_domains: Number of idle domains whose state and metrics are kept
+            max_crawl_delay: Longest robots.txt Crawl-delay honoured, in seconds
+        """
+        self.crawler = crawler or Crawler()
+        self.max_concurrency = max_concurrency
+        self.domain_rate = domain_rate
+        self.domain_burst = domain_burst
+        self.domain_concurrency = domain_concurrency
+        self.robots = robots
+        self.max_domains = max_domains
+        self.max_crawl_delay = max_crawl_delay
+        self._domains: Dict[str, _DomainState] = {}
+        # Domains with queued jobs, in round-robin order.
+        self._ready: Deque[str] = deque()
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="crawl"
+        )
+        self._dispatcher: Optional[threading.Thread] = None
+        self._shutdown = False
+
+    def _domain(self, domain: str) -> _DomainState:
+        state = self._domains.get(domain)
+        if state is None:
+            state = _DomainState(TokenBucket(self.domain_rate, self.domain_burst))
+            self._domains[domain] = state
+        return state
+
+    def submit(self, url: str) -> "Future[Article]":
+        """Queue a URL for crawling and return a future of its article."""
+        future: Future = Future()
+        article = self.crawler.cached(url)
+        if article is not None:
+            future.set_result(article)
+            return future
+        domain = (urlsplit(url).hostname or "").lower()
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("The crawl scheduler has been shut down")
+            state = self._domain(domain)
+            if not state.pending:
+                self._ready.append(domain)
+            state.pending.append(_CrawlJob(url, domain, future))
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch_loop, name="crawl-dispatcher", daemon=True
+                )
+                self._dispatcher.start()
+            self._condition.notify_all()
+        return future
+
+    def submit_many(self, urls: List[str]) -> "List[Future[Article]]":
+        """Queue a batch of URLs; they are interleaved fairly with other domains."""
+        return [self.submit(url) for url in urls]
+
+    def crawl(self, url: str, timeout: Optional[float] = None) -> Article:
+        """
+        Crawl a URL through the scheduler and wait for its article.
+
+        Raises:
+            TimeoutError: If the article is not ready within ``timeout`` seconds,
+                in which case the crawl is cancelled if it is still queued
+        """
+        future = self.submit(url)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            if future.cancel():
+                # Let the dispatcher drop the job from its domain's queue.
+                with self._condition:
+                    self._condition.notify_all()
+            raise
+
+    def _next_job(self) -> Tuple[Optional[_CrawlJob], Optional[float]]:
+        # Returns the next job to run, or how long to wait for a token.
+        if self._in_flight >= self.max_concurrency:
+            return None, None
+        now = time.monotonic()
+        wait: Optional[float] = None
+        for _ in range(len(self._ready)):
+            domain = self._ready.popleft()
+            state = self._domains[domain]
+            job = None
+            # Jobs the caller gave up on don't use up the domain's tokens.
+            while state.pending and state.pending[0].future.cancelled():
+                state.pending.popleft()
+            if state.pending and state.in_flight < self.domain_concurrency:
+                delay = state.bucket.delay(now)
+                if delay == 0:
+                    state.bucket.consume()
+                    job = state.pending.popleft()
+                else:
+                    wait = delay if wait is None else min(wait, delay)
+            if state.pending:
+                self._ready.append(domain)
+            if job is not None:
+                if job.future.set_running_or_notify_cancel():
+                    state.in_flight += 1
+                    state.latencies.append(now - job.enqueued_at)
+                    self._in_flight += 1
+                    return job, None
+                # The caller cancelled the job while it was queued.
+                return self._next_job()
+        return None, wait
+
+    def _dispatch_loop(self) -> None:
+        with self._condition:
+            while not self._shutdown:
+                job, wait = self._next_job()
+                if job is None:
+                    self._condition.wait(wait)
+                    continue
+                self._executor.submit(self._run, job)
+
+    def _run(self, job: _CrawlJob) -> None:
+        outcome = "completed"
+        try:
+            if self.robots is not None:
+                if not self.robots.allowed(job.url):
+                    outcome = "disallowed"
+                    raise CrawlDisallowedError(f"robots.txt disallows {job.url}")
+                delay = self.robots.crawl_delay(job.url)
+                if delay:
+                    self._apply_crawl_delay(job.domain, delay)
+            job.future.set_result(self.crawler.crawl(job.url))
+        except BaseException as e:
+            if outcome == "completed":
+                outcome = "failed"
+            job.future.set_exception(e)
+        finally:
+            with self._condition:
+                state = self._domains[job.domain]
+                state.in_flight -= 1
+                setattr(state, outcome, getattr(state, outcome) + 1)
+                self._in_flight -= 1
+                self._prune()
+                self._condition.notify_all()
+
+    def _apply_crawl_delay(self, domain: str, delay: float) -> None:
+        # A huge Crawl-delay would hold up every crawl of the domain for hours.
+        delay = min(delay, self.max_crawl_delay)
+        with self._condition:
+            bucket = self._domains[domain].bucket
+            if bucket.rate > 1 / delay:
+                bucket.rate = 1 / delay
+                bucket.capacity = 1
+                bucket.tokens = min(bucket.tokens, 1)
+
+    def _prune(self) -> None:
+        # Forget the oldest idle domains once too many are tracked.
+        excess = len(self._domains) - self.max_domains
+        if excess <= 0:
+            return
+        for domain in [d for d, s in self._domains.items() if s.idle][:excess]:
+            del self._domains[domain]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            domains = {}
+            for domain, state in self._domains.items():
+                latencies = sorted(state.latencies)
+                p95 = latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+                domains[domain] = {
+                    "queued": len(state.pending),
+                    "in_flight": state.in_flight,
+                    "completed": state.completed,
+                    "failed": state.failed,
+                    "disallowed": state.disallowed,
+                    "rate": state.bucket.rate,
+                    "queue_latency_avg": (
+                        sum(latencies) / len(latencies) if latencies else 0.0
+                    ),
+                    "queue_latency_p95": p95,
+                    "queue_latency_max": latencies[-1] if latencies else 0.0,
+                }
+            return {
+                "in_flight": self._in_flight,
+                "queued": sum(len(s.pending) for s in self._domains.values()),
+                "max_concurrency": self.max_concurrency,
+                "robots": self.robots.stats() if self.robots is not None else None,
+                "domains": domains,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._condition:
+            self._shutdown = True
+            for state in self._domains.values():
+                for job in state.pending:
+                    job.future.cancel()
+                state.pending.clear()
+            self._ready.clear()
+            self._condition.notify_all()
+        self._executor.shutdown(wait=wait)
+
+
+_crawl_scheduler: Optional[CrawlScheduler] = None
+_crawl_scheduler_lock = threading.Lock()
+
+
+def get_crawl_scheduler() -> CrawlScheduler:
+    """Return the process-wide crawl scheduler configured from the environment."""
+    global _crawl_scheduler
+    with _crawl_scheduler_lock:
+        if _crawl_scheduler is None:
+            respect_robots = os.getenv("CRAWLER_RESPECT_ROBOTS", "true").lower()
+            respect_robots = respect_robots not in ("false", "0", "no")
+            _crawl_scheduler = CrawlScheduler(
+                max_concurrency=int(os.getenv("CRAWLER_CONCURRENCY", 8)),
+                domain_rate=float(os.getenv("CRAWLER_DOMAIN_RATE", 1.0)),
+                domain_burst=float(os.getenv("CRAWLER_DOMAIN_BURST", 3)),
+                domain_concurrency=int(os.getenv("CRAWLER_DOMAIN_CONCURRENCY", 2)),
+                max_crawl_delay=float(os.getenv("CRAWLER_MAX_CRAWL_DELAY", 30)),
+                robots=(
+                    RobotsCache(ttl=float(os.getenv("CRAWLER_ROBOTS_TTL", 86400)))
+                    if respect_robots
+                    else None
+                ),
+            )
+            register_metrics_provider("crawl_scheduler", _crawl_scheduler.stats)
+        return _crawl_scheduler
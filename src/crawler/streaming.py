@@ -0,0 +1,187 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Streamed page downloads with a byte cap and per-crawl memory accounting.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import httpx
+
+from src.utils.metrics import register_metrics_provider
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = (
+    "Mozilla/5.0 (compatible; DeerFlow/0.1; +https://github.com/bytedance/deer-flow)"
+)
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+
+class FetchError(Exception):
+    """Raised when a page cannot be downloaded or is not worth downloading."""
+
+
+def default_max_bytes() -> int:
+    return int(os.getenv("CRAWLER_MAX_BYTES", 5 * 1024 * 1024))
+
+
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """Return the pooled HTTP client shared by all crawl backends."""
+    # A single pooled client keeps TLS connections to popular hosts alive
+    # across crawls instead of handshaking for every page.
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                follow_redirects=True,
+                timeout=httpx.Timeout(
+                    float(os.getenv("CRAWLER_TIMEOUT", 15)), connect=5.0
+                ),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                headers={
+                    "User-Agent": USER_AGENT,
+                    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.1",
+                },
+            )
+        return _client
+
+
+@dataclass
+class DownloadRecord:
+    """Memory and transfer figures of a single crawl download."""
+
+    url: str
+    status: str
+    bytes_read: int
+    buffer_bytes: int
+    content_length: Optional[int]
+    truncated: bool
+    elapsed: float
+
+
+class DownloadStats:
+    """Aggregated download metrics plus a window of the most recent crawls."""
+
+    def __init__(self, window: int = 100):
+        self._lock = threading.Lock()
+        self._recent: Deque[DownloadRecord] = deque(maxlen=window)
+        self._downloads = 0
+        self._truncated = 0
+        self._aborted = 0
+        self._bytes_read = 0
+        self._bytes_skipped = 0
+        self._peak_buffer_bytes = 0
+
+    def record(self, record: DownloadRecord) -> None:
+        with self._lock:
+            self._recent.append(record)
+            self._downloads += 1
+            self._truncated += record.truncated
+            self._aborted += record.status == "aborted"
+            self._bytes_read += record.bytes_read
+            if record.content_length and record.content_length > record.bytes_read:
+                self._bytes_skipped += record.content_length - record.bytes_read
+            self._peak_buffer_bytes = max(self._peak_buffer_bytes, record.buffer_bytes)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "downloads": self._downloads,
+                "truncated": self._truncated,
+                "aborted": self._aborted,
+                "bytes_read": self._bytes_read,
+                "bytes_skipped": self._bytes_skipped,
+                "peak_buffer_bytes": self._peak_buffer_bytes,
+                "recent": [asdict(record) for record in self._recent],
+            }
+
+
+download_stats = DownloadStats()
+register_metrics_provider("crawl_downloads", download_stats.stats)
+
+
+def read_text_body(
+    response: httpx.Response,
+    url: str,
+    max_bytes: int,
+    content_types: Tuple[str, ...] = HTML_CONTENT_TYPES,
+) -> Tuple[str, bool]:
+    """
+    Read a streamed response body, stopping once ``max_bytes`` have arrived.
+
+    The content type is checked before any of the body is read, so binary
+    responses are aborted without downloading them.
+
+    Args:
+        response: A response opened with ``client.stream(...)``
+        url: The crawled URL, for logging and metrics
+        max_bytes: Maximum number of body bytes kept
+        content_types: Accepted content type prefixes
+
+    Returns:
+        The decoded body and whether it was truncated
+
+    Raises:
+        FetchError: If the response has an unaccepted content type
+    """
+    start = time.perf_counter()
+    length_header = response.headers.get("Content-Length", "")
+    content_length = int(length_header) if length_header.isdigit() else None
+    content_type = response.headers.get("Content-Type", "")
+    if content_type and not content_type.lower().startswith(content_types):
+        download_stats.record(
+            DownloadRecord(
+                url=url,
+                status="aborted",
+                bytes_read=0,
+                buffer_bytes=0,
+                content_length=content_length,
+                truncated=False,
+                elapsed=time.perf_counter() - start,
+            )
+        )
+        raise FetchError(f"{url} has unsupported content type: {content_type}")
+
+    body = bytearray()
+    bytes_read = 0
+    truncated = False
+    for chunk in response.iter_bytes():
+        bytes_read += len(chunk)
+        body += chunk
+        if len(body) > max_bytes:
+            # Stop here and drop the connection rather than draining the rest.
+            truncated = True
+            del body[max_bytes:]
+            break
+    if truncated:
+        logger.warning(f"{url} is larger than {max_bytes} bytes, truncating")
+    download_stats.record(
+        DownloadRecord(
+            url=url,
+            status="truncated" if truncated else "complete",
+            bytes_read=bytes_read,
+            buffer_bytes=len(body),
+            content_length=content_length,
+            truncated=truncated,
+            elapsed=time.perf_counter() - start,
+        )
+    )
+    try:
+        return body.decode(response.charset_encoding or "utf-8", errors="replace"), (
+            truncated
+        )
+    except LookupError:
+        return body.decode("utf-8", errors="replace"), truncated
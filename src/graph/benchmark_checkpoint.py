@@ -0,0 +1,119 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Throughput benchmark of the graph checkpointers.
+
+Usage:
+    python -m src.graph.benchmark_checkpoint [--threads 50] [--steps 10]
+        [--message-bytes 2000] [--backends memory,bounded,sqlite]
+
+Every thread runs a graph of ``--steps`` nodes that each append a message of
+``--message-bytes`` characters, like the research team appending observations,
+so every step writes a checkpoint, its channel blobs and the task's writes. All
+threads run concurrently on one event loop, as they do in the server.
+"""
+
+import argparse
+import asyncio
+import operator
+import os
+import tempfile
+import time
+from typing import Annotated, Dict, List, TypedDict
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from .checkpoint import BoundedMemorySaver, SQLiteSaver
+
+
+class _State(TypedDict):
+    messages: Annotated[list, operator.add]
+    step: int
+
+
+def _build(checkpointer, steps: int, message_bytes: int):
+    builder = StateGraph(_State)
+    previous = START
+    for i in range(steps):
+        name = f"step_{i}"
+
+        def node(state, i=i):
+            return {"messages": [f"{i}:" + "x" * message_bytes], "step": i}
+
+        builder.add_node(name, node)
+        builder.add_edge(previous, name)
+        previous = name
+    builder.add_edge(previous, END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+async def _run(
+    checkpointer, threads: int, steps: int, message_bytes: int
+) -> Dict[str, float]:
+    graph = _build(checkpointer, steps, message_bytes)
+
+    async def run_thread(i: int):
+        config = {"configurable": {"thread_id": f"bench-{i}"}}
+        await graph.ainvoke({"messages": [], "step": 0}, config)
+        # Reading the state back, as /api/graph_state and job reports do.
+        await graph.aget_state(config)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_thread(i) for i in range(threads)))
+    elapsed = time.perf_counter() - start
+    # One checkpoint for the input and one per step.
+    checkpoints = threads * (steps + 1)
+    return {"elapsed": elapsed, "checkpoints": checkpoints}
+
+
+def run_benchmark(
+    backends: List[str], threads: int, steps: int, message_bytes: int
+) -> None:
+    print(
+        f"{threads} concurrent threads x {steps} steps, "
+        f"{message_bytes} byte messages"
+    )
+    for backend in backends:
+        with tempfile.TemporaryDirectory() as directory:
+            if backend == "memory":
+                checkpointer = MemorySaver()
+            elif backend == "bounded":
+                checkpointer = BoundedMemorySaver()
+            elif backend == "sqlite":
+                checkpointer = SQLiteSaver(os.path.join(directory, "bench.sqlite3"))
+            else:
+                raise ValueError(f"Unknown backend: {backend}")
+            result = asyncio.run(_run(checkpointer, threads, steps, message_bytes))
+            line = (
+                f"{backend:>8}: {result['elapsed']:6.2f}s, "
+                f"{threads / result['elapsed']:7.1f} runs/s, "
+                f"{result['checkpoints'] / result['elapsed']:8.1f} checkpoints/s"
+            )
+            if isinstance(checkpointer, SQLiteSaver):
+                stats = checkpointer.stats()
+                size = sum(
+                    os.path.getsize(checkpointer.path + suffix)
+                    for suffix in ("", "-wal")
+                    if os.path.exists(checkpointer.path + suffix)
+                )
+                line += (
+                    f", {stats['write_calls']} writes in {stats['transactions']} "
+                    f"transactions (avg batch {stats['avg_batch']}), "
+                    f"{size / 2**20:.1f} MiB on disk"
+                )
+                checkpointer.close()
+            print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark graph checkpointers")
+    parser.add_argument("--threads", type=int, default=50)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--message-bytes", type=int, default=2000)
+    parser.add_argument("--backends", default="memory,bounded,sqlite")
+    args = parser.parse_args()
+    run_benchmark(
+        args.backends.split(","), args.threads, args.steps, args.message_bytes
+    )
@@ -0,0 +1,99 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Benchmark of the first-request latency of each workflow, cold and after warmup.
+
+Usage:
+    python -m src.graph.benchmark_warmup [--graphs research,podcast,ppt,prose]
+        [--requests 20]
+
+Every measurement runs in a fresh Python process, as a newly started server
+would. "cold" times what the first request does before its first node can run:
+compiling the graph and loading the prompts and LLM clients of its nodes. "warm"
+times the same after ``GraphRegistry.warmup`` ran at startup. "rebuild" is the
+average of ``--requests`` requests that compile the graph every time, as the
+endpoints used to, against fetching it from the registry.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+
+def _first_request(registry, name: str) -> None:
+    from src.config.agents import AGENT_LLM_MAP
+    from src.llms.llm import get_llm_by_type
+    from src.prompts.template import get_prompt_template
+
+    spec = registry.specs[name]
+    registry.get(name)
+    for prompt in spec.prompts:
+        get_prompt_template(prompt)
+    for agent in spec.agents:
+        get_llm_by_type(AGENT_LLM_MAP[agent])
+
+
+def _measure(name: str, requests: int) -> Dict[str, float]:
+    # Runs in the child process, so that the imports count for "cold".
+    started = time.perf_counter()
+    from .registry import GraphRegistry
+
+    registry = GraphRegistry()
+    _first_request(registry, name)
+    cold = time.perf_counter() - started
+
+    registry = GraphRegistry()
+    registry.warmup([name])
+    started = time.perf_counter()
+    _first_request(registry, name)
+    warm = time.perf_counter() - started
+
+    spec = registry.specs[name]
+    started = time.perf_counter()
+    for _ in range(requests):
+        spec.build()
+    rebuild = (time.perf_counter() - started) / requests
+    started = time.perf_counter()
+    for _ in range(requests):
+        registry.get(name)
+    cached = (time.perf_counter() - started) / requests
+    return {"cold": cold, "warm": warm, "rebuild": rebuild, "cached": cached}
+
+
+def run_benchmark(graphs: List[str], requests: int) -> None:
+    print(f"First request per graph in a fresh process, {requests} requests")
+    # Creating the LLM clients needs no network, but an API key to configure.
+    env = {"OPENAI_API_KEY": "benchmark", **os.environ}
+    for name in graphs:
+        output = subprocess.run(
+            [sys.executable, "-m", __spec__.name, "--child", name]
+            + ["--requests", str(requests)],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=env,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{name:>10}: cold {result['cold'] * 1000:8.1f}ms, "
+            f"warm {result['warm'] * 1000:7.2f}ms, "
+            f"rebuild per request {result['rebuild'] * 1000:6.2f}ms, "
+            f"registry {result['cached'] * 1e6:5.2f}us"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark graph warmup")
+    parser.add_argument("--graphs", default="research,podcast,ppt,prose")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(_measure(args.child, args.requests)))
+    else:
+        run_benchmark(args.graphs.split(","), args.requests)
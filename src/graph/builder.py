@@ -1,8 +1,13 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+from typing import Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
+
+from .checkpoint import create_checkpointer
+from .registry import lazy_graph_attribute
 
 from .types import State
 from .nodes import (
@@ -33,11 +38,11 @@ def _build_base_graph():
     return builder
 
 
-def build_graph_with_memory():
+def build_graph_with_memory(checkpointer: Optional[BaseCheckpointSaver] = None):
     """Build and return the agent workflow graph with memory."""
-    # use persistent memory to save conversation history
-    # TODO: be compatible with SQLite / PostgreSQL
-    memory = MemorySaver()
+    # use persistent memory to save conversation history, in memory or in a
+    # SQLite database shared by server processes as selected by CHECKPOINTER
+    memory = checkpointer or create_checkpointer()
 
     # build state graph
     builder = _build_base_graph()
@@ -51,4 +56,5 @@ def build_graph():
     return builder.compile()
 
 
-graph = build_graph()
+# Compiled on first use by the graph registry rather than on import.
+__getattr__ = lazy_graph_attribute(__name__, {"graph": "research_without_memory"})
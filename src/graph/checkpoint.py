@@ -0,0 +1,836 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Checkpointers of the research graph.
+
+``BoundedMemorySaver`` is the default: a ``MemorySaver`` that deletes unused
+threads and compacts the checkpoint history of finished ones.
+
+``SQLiteSaver`` keeps checkpoints in a SQLite database file in WAL mode, so that
+several server processes on one host share threads, interrupts and plan
+reviews, and threads survive restarts. It stores data the way ``MemorySaver``
+does: a checkpoint without its channel values, one blob per channel version,
+and the pending writes of every task, so a step only writes the channels it
+changed.
+
+Reads use a small pool of connections. Writes are handed to a single writer
+thread that commits everything submitted while the previous transaction was
+running in one transaction (group commit); every call still returns only once
+its data is committed.
+"""
+
+import asyncio
+import heapq
+import logging
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.types import TASKS, ChannelProtocol
+
+from src.utils.metrics import register_metrics_provider
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS checkpoints (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL,
+        checkpoint_id TEXT NOT NULL,
+        parent_checkpoint_id TEXT,
+        type TEXT,
+        checkpoint BLOB,
+        metadata_type TEXT,
+        metadata BLOB,
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS blobs (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL,
+        channel TEXT NOT NULL,
+        version TEXT NOT NULL,
+        type TEXT NOT NULL,
+        blob BLOB,
+        PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+    )""",
+    """CREATE TABLE IF NOT EXISTS writes (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL,
+        checkpoint_id TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        channel TEXT NOT NULL,
+        type TEXT,
+        blob BLOB,
+        task_path TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+    )""",
+]
+
+Statement = Tuple[str, Sequence[Any]]
+
+
+class _PendingWrite:
+    __slots__ = ("statements", "done", "error")
+
+    def __init__(self, statements: List[Statement]):
+        self.statements = statements
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class SQLiteSaver(BaseCheckpointSaver[str]):
+    """A checkpointer backed by a SQLite database shared by every process on the host."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        pool_size: int = 4,
+        max_batch: int = 256,
+        serde=None,
+    ):
+        """
+        Initialize the checkpointer.
+
+        Args:
+            path: The database file, created with its directory if missing
+            pool_size: Connections used for reads
+            max_batch: Write calls committed in one transaction at most
+            serde: The serializer, JsonPlusSerializer by default
+        """
+        super().__init__(serde=serde)
+        self.path = path
+        self.max_batch = max_batch
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        writer = self._connect()
+        writer.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            writer.execute(statement)
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(pool_size):
+            self._readers.put(self._connect())
+
+        self._pending: List[_PendingWrite] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "transactions": 0,
+            "write_calls": 0,
+            "statements": 0,
+            "write_seconds": 0.0,
+            "reads": 0,
+            "read_seconds": 0.0,
+        }
+        self._writer = threading.Thread(
+            target=self._write_loop,
+            args=(writer,),
+            name="checkpoint-writer",
+            daemon=True,
+        )
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        db.execute("PRAGMA busy_timeout=30000")
+        # Durable at every checkpoint of the WAL instead of every commit, which
+        # is safe against process crashes, though not power loss.
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        db = self._readers.get()
+        start = time.perf_counter()
+        try:
+            yield db
+        finally:
+            with self._stats_lock:
+                self._stats["reads"] += 1
+                self._stats["read_seconds"] += time.perf_counter() - start
+            self._readers.put(db)
+
+    def _write(self, statements: List[Statement]) -> None:
+        """Commit statements in the writer's next transaction and wait for it."""
+        pending = _PendingWrite(statements)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("The checkpointer is closed")
+            self._pending.append(pending)
+            self._cond.notify()
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+
+    def _write_loop(self, db: sqlite3.Connection) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    db.close()
+                    return
+                batch = self._pending[: self.max_batch]
+                del self._pending[: self.max_batch]
+            start = time.perf_counter()
+            try:
+                self._commit(db, batch)
+            except Exception:
+                # Retry one by one, so that a failing call does not fail the
+                # calls it happened to be batched with.
+                for pending in batch:
+                    try:
+                        self._commit(db, [pending])
+                    except Exception as e:
+                        pending.error = e
+            with self._stats_lock:
+                self._stats["transactions"] += 1
+                self._stats["write_calls"] += len(batch)
+                self._stats["statements"] += sum(len(p.statements) for p in batch)
+                self._stats["write_seconds"] += time.perf_counter() - start
+            for pending in batch:
+                pending.done.set()
+
+    @staticmethod
+    def _commit(db: sqlite3.Connection, batch: List[_PendingWrite]) -> None:
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            for pending in batch:
+                for sql, params in pending.statements:
+                    db.execute(sql, params)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._writer.join()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+
+    def _load_tuple(
+        self,
+        db: sqlite3.Connection,
+        thread_id: str,
+        checkpoint_ns: str,
+        row: Tuple[Any, ...],
+    ) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint_b = row[:4]
+        metadata_type, metadata_b = row[4:]
+        checkpoint: Checkpoint = self.serde.loads_typed((type_, checkpoint_b))
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob = db.execute(
+                "SELECT type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if blob is not None and blob[0] != "empty":
+                channel_values[channel] = self.serde.loads_typed(blob)
+        sends = []
+        if parent_checkpoint_id:
+            sends = [
+                self.serde.loads_typed((type_s, blob_s))
+                for type_s, blob_s in db.execute(
+                    "SELECT type, blob FROM writes WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "AND checkpoint_id = ? AND channel = ? ORDER BY task_path, task_id, idx",
+                    (thread_id, checkpoint_ns, parent_checkpoint_id, TASKS),
+                )
+            ]
+        pending_writes = [
+            (task_id, channel, self.serde.loads_typed((type_w, blob_w)))
+            for task_id, channel, type_w, blob_w in db.execute(
+                "SELECT task_id, channel, type, blob FROM writes WHERE thread_id = ? "
+                "AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            )
+        ]
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint,
+                "channel_values": channel_values,
+                "pending_sends": sends,
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata_b)),
+            pending_writes=pending_writes,
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+        )
+
+    _COLUMNS = (
+        "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+    )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id: str = config["configurable"]["thread_id"]
+        checkpoint_ns: str = config["configurable"].get("checkpoint_ns", "")
+        with self._reader() as db:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = db.execute(
+                    f"SELECT {self._COLUMNS} FROM checkpoints WHERE thread_id = ? "
+                    "AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = db.execute(
+                    f"SELECT {self._COLUMNS} FROM checkpoints WHERE thread_id = ? "
+                    "AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+            return self._load_tuple(db, thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        conditions, params = [], []
+        if config is not None:
+            conditions.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                conditions.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                conditions.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            conditions.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        # Loaded eagerly, so that no pooled connection is held by a paused iterator.
+        results = []
+        with self._reader() as db:
+            rows = db.execute(
+                f"SELECT thread_id, checkpoint_ns, {self._COLUMNS} FROM checkpoints "
+                f"{where} ORDER BY checkpoint_id DESC",
+                params,
+            ).fetchall()
+            for thread_id, checkpoint_ns, *row in rows:
+                if filter:
+                    metadata = self.serde.loads_typed((row[4], row[5]))
+                    if not all(metadata.get(k) == v for k, v in filter.items()):
+                        continue
+                if limit is not None and len(results) >= limit:
+                    break
+                results.append(self._load_tuple(db, thread_id, checkpoint_ns, row))
+        yield from results
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        c = checkpoint.copy()
+        c.pop("pending_sends", None)
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        values: Dict[str, Any] = c.pop("channel_values")
+        statements: List[Statement] = []
+        for channel, version in new_versions.items():
+            type_, blob = (
+                self.serde.dumps_typed(values[channel])
+                if channel in values
+                else ("empty", b"")
+            )
+            statements.append(
+                (
+                    "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, channel, str(version), type_, blob),
+                )
+            )
+        type_, checkpoint_b = self.serde.dumps_typed(c)
+        metadata_type, metadata_b = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+        statements.append(
+            (
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    type_,
+                    checkpoint_b,
+                    metadata_type,
+                    metadata_b,
+                ),
+            )
+        )
+        self._write(statements)
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        statements: List[Statement] = []
+        for idx, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            type_, blob = self.serde.dumps_typed(value)
+            # Like MemorySaver, regular writes are kept from the first attempt
+            # of a task, while special writes (errors, interrupts) replace them.
+            verb = "INSERT OR REPLACE" if idx < 0 else "INSERT OR IGNORE"
+            statements.append(
+                (
+                    f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        checkpoint_id,
+                        task_id,
+                        idx,
+                        channel,
+                        type_,
+                        blob,
+                        task_path,
+                    ),
+                )
+            )
+        if statements:
+            self._write(statements)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._write(
+            [
+                (f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+                for table in ("checkpoints", "blobs", "writes")
+            ]
+        )
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        results = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in results:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: ChannelProtocol) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        transactions = stats["transactions"] or 1
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "transactions": stats["transactions"],
+            "write_calls": stats["write_calls"],
+            "avg_batch": round(stats["write_calls"] / transactions, 2),
+            "avg_commit_ms": round(stats["write_seconds"] / transactions * 1000, 3),
+            "reads": stats["reads"],
+            "avg_read_ms": round(
+                stats["read_seconds"] / (stats["reads"] or 1) * 1000, 3
+            ),
+            "queued_writes": len(self._pending),
+        }
+
+
+@dataclass
+class _ThreadIndex:
+    """The storage keys of a thread and the bytes its serialized data takes."""
+
+    checkpoints: int = 0
+    bytes: int = 0
+    blob_keys: set = field(default_factory=set)
+    write_keys: set = field(default_factory=set)
+
+
+class BoundedMemorySaver(MemorySaver):
+    """
+    A MemorySaver that bounds the memory a long-running server spends on threads.
+
+    Threads unused for ``ttl`` seconds are deleted, and beyond ``max_threads``
+    the least recently used thread is. A thread that has not been written to
+    for ``compact_after`` seconds has finished its run or is waiting at an
+    interrupt; either way it only resumes from its latest checkpoint, so all but
+    its latest ``keep_checkpoints`` checkpoints are dropped, along with the
+    writes and channel blobs only they referenced. The state history of a
+    compacted thread is limited to the checkpoints kept.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl: float = 86400,
+        max_threads: int = 1000,
+        keep_checkpoints: int = 20,
+        compact_after: float = 300,
+        sweep_interval: float = 30,
+        serde=None,
+    ):
+        """
+        Initialize the checkpointer.
+
+        Args:
+            ttl: Seconds an unused thread is kept, 0 keeps threads forever
+            max_threads: Threads kept at most, 0 for no limit
+            keep_checkpoints: Checkpoints kept per compacted thread, at least 2
+                so that the latest checkpoint keeps its pending sends
+            compact_after: Seconds without writes after which a thread is compacted
+            sweep_interval: Seconds between checks for expired and idle threads
+        """
+        super().__init__(serde=serde)
+        self.ttl = ttl
+        self.max_threads = max_threads
+        self.keep_checkpoints = max(2, keep_checkpoints)
+        self.compact_after = compact_after
+        self.sweep_interval = sweep_interval
+        # Thread id -> (last used, last written), least recently used first.
+        self._threads: "OrderedDict[str, List[float]]" = OrderedDict()
+        # Kept up to date on every write, so that usage and deletes of a thread
+        # don't scan the blobs and writes of every other thread.
+        self._indexes: Dict[str, _ThreadIndex] = {}
+        self._compacted: set = set()
+        self._last_sweep = time.monotonic()
+        self._lock = threading.RLock()
+        self._counters = {
+            "evicted_ttl": 0,
+            "evicted_lru": 0,
+            "compactions": 0,
+            "checkpoints_dropped": 0,
+        }
+
+    def _touch(self, thread_id: str, written: bool = False) -> None:
+        now = time.monotonic()
+        entry = self._threads.pop(thread_id, None) or [now, now]
+        entry[0] = now
+        if written:
+            entry[1] = now
+            self._compacted.discard(thread_id)
+        self._threads[thread_id] = entry
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            # Reads sweep too, so that threads expire without further writes.
+            self._maybe_sweep()
+            result = super().get_tuple(config)
+            if result is not None:
+                self._touch(thread_id)
+            elif not any(self.storage.get(thread_id, {}).values()):
+                # MemorySaver's defaultdicts add an entry for unknown threads.
+                self.storage.pop(thread_id, None)
+            return result
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        # Collected under the lock, since a sweep may change the storage.
+        with self._lock:
+            self._maybe_sweep()
+            results = list(
+                super().list(config, filter=filter, before=before, limit=limit)
+            )
+            if config is not None and results:
+                self._touch(config["configurable"]["thread_id"])
+        yield from results
+
+    def _checkpoint_size(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_id
+    ) -> int:
+        # get() rather than indexing, which would add entries to the defaultdicts.
+        entry = (
+            self.storage.get(thread_id, {}).get(checkpoint_ns, {}).get(checkpoint_id)
+        )
+        return len(entry[0][1]) + len(entry[1][1]) if entry else 0
+
+    def _blobs_size(self, keys) -> int:
+        return sum(len(self.blobs[key][1]) for key in keys if key in self.blobs)
+
+    def _writes_size(self, key) -> int:
+        return sum(len(write[2][1]) for write in self.writes.get(key, {}).values())
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        blob_keys = [(thread_id, checkpoint_ns, k, v) for k, v in new_versions.items()]
+        with self._lock:
+            index = self._indexes.setdefault(thread_id, _ThreadIndex())
+            existing = self._checkpoint_size(thread_id, checkpoint_ns, checkpoint["id"])
+            replaced = existing + self._blobs_size(blob_keys)
+            result = super().put(config, checkpoint, metadata, new_versions)
+            if not existing:
+                index.checkpoints += 1
+            index.blob_keys.update(blob_keys)
+            index.bytes += (
+                self._checkpoint_size(thread_id, checkpoint_ns, checkpoint["id"])
+                + self._blobs_size(blob_keys)
+                - replaced
+            )
+            self._touch(thread_id, written=True)
+            self._evict_lru()
+            self._maybe_sweep()
+            return result
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        key = (
+            thread_id,
+            config["configurable"].get("checkpoint_ns", ""),
+            config["configurable"]["checkpoint_id"],
+        )
+        with self._lock:
+            index = self._indexes.setdefault(thread_id, _ThreadIndex())
+            before = self._writes_size(key)
+            super().put_writes(config, writes, task_id, task_path)
+            index.write_keys.add(key)
+            index.bytes += self._writes_size(key) - before
+            self._touch(thread_id, written=True)
+
+    def delete_thread(self, thread_id: str) -> None:
+        # MemorySaver.delete_thread scans the writes and blobs of all threads.
+        with self._lock:
+            self.storage.pop(thread_id, None)
+            index = self._indexes.pop(thread_id, None)
+            if index is not None:
+                for key in index.blob_keys:
+                    self.blobs.pop(key, None)
+                for key in index.write_keys:
+                    self.writes.pop(key, None)
+            self._threads.pop(thread_id, None)
+            self._compacted.discard(thread_id)
+
+    def _evict_lru(self) -> None:
+        while self.max_threads and len(self._threads) > self.max_threads:
+            thread_id = next(iter(self._threads))
+            self.delete_thread(thread_id)
+            self._counters["evicted_lru"] += 1
+
+    def _maybe_sweep(self) -> None:
+        if time.monotonic() - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+
+    def sweep(self) -> None:
+        """Delete expired threads and compact idle ones."""
+        with self._lock:
+            now = time.monotonic()
+            self._last_sweep = now
+            for thread_id, (last_used, last_written) in list(self._threads.items()):
+                if self.ttl and now - last_used > self.ttl:
+                    self.delete_thread(thread_id)
+                    self._counters["evicted_ttl"] += 1
+                elif (
+                    now - last_written > self.compact_after
+                    and thread_id not in self._compacted
+                ):
+                    self.compact(thread_id)
+
+    def compact(self, thread_id: str) -> int:
+        """Drop all but the latest checkpoints of a thread, returning how many went."""
+        with self._lock:
+            dropped = 0
+            namespaces = self.storage.get(thread_id, {})
+            index = self._indexes.setdefault(thread_id, _ThreadIndex())
+            referenced = set()
+            for checkpoint_ns, checkpoints in namespaces.items():
+                checkpoint_ids = sorted(checkpoints)
+                for checkpoint_id in checkpoint_ids[: -self.keep_checkpoints]:
+                    key = (thread_id, checkpoint_ns, checkpoint_id)
+                    index.bytes -= self._checkpoint_size(*key) + self._writes_size(key)
+                    del checkpoints[checkpoint_id]
+                    self.writes.pop(key, None)
+                    index.write_keys.discard(key)
+                    dropped += 1
+                for checkpoint, _, _ in checkpoints.values():
+                    versions = self.serde.loads_typed(checkpoint)["channel_versions"]
+                    referenced.update(
+                        (checkpoint_ns, channel, version)
+                        for channel, version in versions.items()
+                    )
+            index.checkpoints -= dropped
+            if dropped:
+                for key in list(index.blob_keys):
+                    if key[1:] not in referenced:
+                        index.bytes -= self._blobs_size([key])
+                        self.blobs.pop(key, None)
+                        index.blob_keys.discard(key)
+            self._compacted.add(thread_id)
+            self._counters["compactions"] += 1
+            self._counters["checkpoints_dropped"] += dropped
+            return dropped
+
+    def thread_usage(self, thread_id: str) -> Dict[str, Any]:
+        """The checkpoints of a thread and the bytes their serialized data takes."""
+        with self._lock:
+            index = self._indexes.get(thread_id) or _ThreadIndex()
+            entry = self._threads.get(thread_id)
+            idle = round(time.monotonic() - entry[0], 1) if entry else None
+            return {
+                "checkpoints": index.checkpoints,
+                "bytes": index.bytes,
+                "idle_seconds": idle,
+                "compacted": thread_id in self._compacted,
+            }
+
+    def stats(self, top: int = 20) -> Dict[str, Any]:
+        """Memory usage in total and of the ``top`` largest threads."""
+        with self._lock:
+            indexes = list(self._indexes.items())
+            largest = heapq.nlargest(top, indexes, key=lambda item: item[1].bytes)
+            largest = {
+                thread_id: self.thread_usage(thread_id) for thread_id, _ in largest
+            }
+            counters = dict(self._counters)
+        return {
+            "backend": "memory",
+            "threads": len(indexes),
+            "checkpoints": sum(index.checkpoints for _, index in indexes),
+            "bytes": sum(index.bytes for _, index in indexes),
+            **counters,
+            "largest_threads": largest,
+        }
+
+
+def create_checkpointer(
+    kind: Optional[str] = None, path: Optional[str] = None
+) -> BaseCheckpointSaver:
+    """
+    Create the checkpointer selected by ``CHECKPOINTER`` ("memory" or "sqlite").
+
+    Args:
+        kind: Overrides ``CHECKPOINTER``
+        path: Overrides ``CHECKPOINTER_SQLITE_PATH``, the database of "sqlite"
+    """
+    kind = (kind or os.getenv("CHECKPOINTER", "memory")).lower()
+    if kind == "memory":
+        saver = BoundedMemorySaver(
+            ttl=float(os.getenv("CHECKPOINTER_MEMORY_TTL", 86400)),
+            max_threads=int(os.getenv("CHECKPOINTER_MEMORY_MAX_THREADS", 1000)),
+            keep_checkpoints=int(os.getenv("CHECKPOINTER_MEMORY_KEEP", 20)),
+            compact_after=float(os.getenv("CHECKPOINTER_MEMORY_COMPACT_AFTER", 300)),
+        )
+        register_metrics_provider("checkpointer", saver.stats)
+        return saver
+    if kind == "sqlite":
+        path = path or os.getenv(
+            "CHECKPOINTER_SQLITE_PATH", "~/.cache/deer-flow/checkpoints.sqlite3"
+        )
+        path = os.path.expanduser(path)
+        saver = SQLiteSaver(
+            path, pool_size=int(os.getenv("CHECKPOINTER_SQLITE_POOL_SIZE", 4))
+        )
+        register_metrics_provider("checkpointer", saver.stats)
+        return saver
+    raise ValueError(f"Unknown checkpointer: {kind}")
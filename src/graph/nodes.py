@@ -4,7 +4,7 @@
 import json
 import logging
 import os
-from typing import Annotated, Literal
+from typing import Annotated, Literal, Optional
 
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
@@ -27,6 +27,7 @@ from src.config.configuration import Configuration
 from src.llms.llm import get_llm_by_type
 from src.prompts.planner_model import Plan, StepType
 from src.prompts.template import apply_prompt_template
+from src.repl import get_repl_pool
 from src.utils.json_utils import repair_json_output
 
 from .types import State
@@ -451,8 +452,18 @@ def research_team_node(
     return Command(goto="planner")
 
 
+def _repl_usage_since(before: dict, after: dict) -> dict:
+    """Resources used by a thread's code executions between two snapshots."""
+    usage = {
+        key: max(after.get(key, 0) - before.get(key, 0), 0)
+        for key in ("executions", "wall_time", "cpu_time", "limits_exceeded")
+    }
+    usage["peak_rss_bytes"] = after.get("peak_rss_bytes", 0)
+    return usage
+
+
 async def _execute_agent_step(
-    state: State, agent, agent_name: str
+    state: State, agent, agent_name: str, config: Optional[RunnableConfig] = None
 ) -> Command[Literal["research_team", "__end__"]]:
     """Helper function to execute a step using the specified agent."""
     logger.info(f"Executing step via _execute_agent_step for agent: {agent_name}")
@@ -502,6 +513,20 @@ async def _execute_agent_step(
             ]
         }
 
+        thread_id = ((config or {}).get("configurable") or {}).get(
+            "thread_id", "default"
+        )
+        if agent_name == "coder":
+            saved_artifacts = get_repl_pool().list_artifacts(thread_id)
+            if saved_artifacts:
+                agent_input["messages"].append(
+                    HumanMessage(
+                        content="Data saved by earlier steps is available with `artifacts.load(name)`:\n"
+                        + "\n".join(f"- {summary}" for summary in saved_artifacts),
+                        name="system",
+                    )
+                )
+
         if agent_name == "researcher":
             agent_input["messages"].append(
                 HumanMessage(
@@ -533,14 +558,31 @@ async def _execute_agent_step(
             recursion_limit = default_recursion_limit
 
         logger.info(f"Agent {agent_name} recursion limit set to: {recursion_limit}")
-        result = await agent.ainvoke(
-            input=agent_input, config={"recursion_limit": recursion_limit}
+        # Expose the step being executed to tools, e.g. so crawl_tool can pick the
+        # passages of a page that are relevant to it.
+        agent_config = {
+            "recursion_limit": recursion_limit,
+            "configurable": {
+                **((config or {}).get("configurable") or {}),
+                "research_step": {
+                    "title": current_step.title,
+                    "description": current_step.description,
+                },
+            },
+        }
+        repl_usage_before = (
+            get_repl_pool().session_usage(thread_id) if agent_name == "coder" else None
         )
+        result = await agent.ainvoke(input=agent_input, config=agent_config)
 
         response_content = result["messages"][-1].content
         logger.debug(f"{agent_name.capitalize()} full response: {response_content}")
 
         current_step.execution_res = response_content
+        if repl_usage_before is not None:
+            current_step.resource_usage = _repl_usage_since(
+                repl_usage_before, get_repl_pool().session_usage(thread_id)
+            )
         logger.info(f"Step '{current_step.title}' execution completed by {agent_name}")
 
         updated_state_changes = {
@@ -636,7 +678,7 @@ async def _setup_and_execute_agent_step(
                 llm_runtime_config_dict=agent_runtime_config,
             )
 
-        return await _execute_agent_step(state, agent_to_execute, agent_type)
+        return await _execute_agent_step(state, agent_to_execute, agent_type, config)
 
     except Exception as e:
         error_message = (
@@ -0,0 +1,199 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+A registry of the compiled workflow graphs, shared by all requests.
+
+Graphs are compiled on first use, exactly once per process, instead of on every
+request or when their builder module is imported. ``warmup`` compiles graphs ahead
+of the first request, along with the prompts and LLM clients their nodes use, so
+that a server can pay for it at startup.
+"""
+
+import importlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from src.utils.metrics import register_metrics_provider
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class GraphSpec:
+    """How to build a graph, and what its nodes load on their first run."""
+
+    # "module:function", imported only when the graph is first needed.
+    factory: str
+    prompts: Tuple[str, ...] = ()
+    agents: Tuple[str, ...] = ()
+
+    def build(self) -> Any:
+        module, function = self.factory.split(":")
+        return getattr(importlib.import_module(module), function)()
+
+
+GRAPHS: Dict[str, GraphSpec] = {
+    "research": GraphSpec(
+        "src.graph.builder:build_graph_with_memory",
+        prompts=("coordinator", "planner", "researcher", "coder", "reporter"),
+        agents=("coordinator", "planner", "researcher", "coder", "reporter"),
+    ),
+    "research_without_memory": GraphSpec(
+        "src.graph.builder:build_graph",
+        prompts=("coordinator", "planner", "researcher", "coder", "reporter"),
+        agents=("coordinator", "planner", "researcher", "coder", "reporter"),
+    ),
+    "podcast": GraphSpec(
+        "src.podcast.graph.builder:build_graph",
+        prompts=("podcast/podcast_script_writer",),
+        agents=("podcast_script_writer",),
+    ),
+    "ppt": GraphSpec(
+        "src.ppt.graph.builder:build_graph",
+        prompts=("ppt/ppt_composer",),
+        agents=("ppt_composer",),
+    ),
+    "prose": GraphSpec(
+        "src.prose.graph.builder:build_graph",
+        prompts=(
+            "prose/prose_continue",
+            "prose/prose_improver",
+            "prose/prose_shorter",
+            "prose/prose_longer",
+            "prose/prose_fix",
+            "prose/prose_zap",
+        ),
+        agents=("prose_writer",),
+    ),
+}
+
+
+class GraphRegistry:
+    """Compiles each registered graph once and hands out the compiled graph."""
+
+    def __init__(self, specs: Optional[Dict[str, GraphSpec]] = None):
+        self.specs = dict(GRAPHS if specs is None else specs)
+        self._graphs: Dict[str, Any] = {}
+        self._compile_seconds: Dict[str, float] = {}
+        self._warmed: Dict[str, float] = {}
+        # One lock per graph, so that a slow compile doesn't hold up the others.
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, spec: GraphSpec) -> None:
+        with self._lock:
+            self.specs[name] = spec
+            self._graphs.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        """Return the compiled graph, compiling it if this is its first use."""
+        graph = self._graphs.get(name)
+        if graph is not None:
+            return graph
+        with self._lock:
+            if name not in self.specs:
+                raise KeyError(f"Unknown graph: {name}")
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            graph = self._graphs.get(name)
+            if graph is None:
+                started = time.perf_counter()
+                graph = self.specs[name].build()
+                self._compile_seconds[name] = time.perf_counter() - started
+                self._graphs[name] = graph
+                logger.info(
+                    f"Compiled graph {name} in {self._compile_seconds[name]:.3f}s"
+                )
+        return graph
+
+    def warmup(self, names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Compile graphs and load their prompts and LLM clients ahead of use.
+
+        Returns the seconds each graph took to warm. A graph that fails to warm,
+        e.g. for a missing LLM configuration, is logged and left to fail on use.
+        """
+        from src.config.agents import AGENT_LLM_MAP
+        from src.llms.llm import get_llm_by_type
+        from src.prompts.template import get_prompt_template
+
+        timings = {}
+        for name in self.specs if names is None else names:
+            started = time.perf_counter()
+            try:
+                self.get(name)
+                spec = self.specs[name]
+                for prompt in spec.prompts:
+                    get_prompt_template(prompt)
+                for agent in spec.agents:
+                    get_llm_by_type(AGENT_LLM_MAP[agent])
+            except Exception as e:
+                logger.warning(f"Failed to warm graph {name}: {e}")
+                continue
+            timings[name] = time.perf_counter() - started
+            self._warmed[name] = timings[name]
+        return timings
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "compiled": sorted(self._graphs),
+            "compile_seconds": {
+                name: round(seconds, 4)
+                for name, seconds in self._compile_seconds.items()
+            },
+            "warmed": sorted(self._warmed),
+        }
+
+
+def warmup_graph_names() -> Tuple[str, ...]:
+    """
+    The graphs to warm at startup from GRAPH_WARMUP, a comma separated list.
+
+    "all" (the default) warms every graph the server uses, "none" none of them.
+    """
+    value = os.getenv("GRAPH_WARMUP", "all").strip().lower()
+    if value == "all":
+        return ("research", "podcast", "ppt", "prose")
+    if value in ("", "none"):
+        return ()
+    return tuple(name.strip() for name in value.split(",") if name.strip())
+
+
+_graph_registry: Optional[GraphRegistry] = None
+_graph_registry_lock = threading.Lock()
+
+
+def get_graph_registry() -> GraphRegistry:
+    """Return the process-wide graph registry."""
+    global _graph_registry
+    with _graph_registry_lock:
+        if _graph_registry is None:
+            _graph_registry = GraphRegistry()
+            register_metrics_provider("graphs", _graph_registry.stats)
+        return _graph_registry
+
+
+def get_graph(name: str) -> Any:
+    """Return the compiled graph registered under ``name``."""
+    return get_graph_registry().get(name)
+
+
+def lazy_graph_attribute(module: str, attributes: Dict[str, str]) -> Callable:
+    """
+    A module ``__getattr__`` that resolves module-level graphs from the registry.
+
+    Lets builder modules keep exposing e.g. ``workflow`` for ``langgraph.json``
+    without compiling it when they are imported.
+    """
+
+    def __getattr__(attribute: str) -> Any:
+        if attribute in attributes:
+            return get_graph(attributes[attribute])
+        raise AttributeError(f"module {module!r} has no attribute {attribute!r}")
+
+    return __getattr__
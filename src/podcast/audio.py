@@ -0,0 +1,142 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Assembly of the MP3 files TTS returns for each podcast line into one file.
+
+Every line's file starts with its own ID3 tag and a Xing/Info frame describing
+that file alone. Joining the files as they are leaves those in the middle of
+the podcast, where players show a wrong duration or play glitches. Here every
+file is cut down to its audio frames, which are written to a spooled temporary
+file, so that only one line's audio has to be held in memory at once.
+"""
+
+import logging
+import tempfile
+from typing import BinaryIO, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Changes whenever the way the lines are joined changes the podcast's bytes, so
+# that podcasts cached before are not served instead.
+FORMAT_VERSION = 1
+
+# Bitrates in kbps by (MPEG 1, layer) and (MPEG 2 or 2.5, layer).
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates by the version bits: MPEG 2.5, reserved, MPEG 2 and MPEG 1.
+_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+
+
+def _frame_length(data: bytes, offset: int) -> Optional[int]:
+    """The length of the MPEG audio frame whose header is at ``offset``, if any."""
+    if offset + 4 > len(data) or data[offset] != 0xFF or data[offset + 1] < 0xE0:
+        return None
+    version = (data[offset + 1] >> 3) & 3
+    layer = 4 - ((data[offset + 1] >> 1) & 3)
+    bitrate_index = data[offset + 2] >> 4
+    rate_index = (data[offset + 2] >> 2) & 3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    padding = (data[offset + 2] >> 1) & 1
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4
+    if layer == 3 and not mpeg1:
+        return 72 * bitrate // sample_rate + padding
+    return 144 * bitrate // sample_rate + padding
+
+
+def _is_info_frame(frame: memoryview) -> bool:
+    # A Xing/Info or VBRI frame is silent and only describes the file it starts.
+    mpeg1 = (frame[1] >> 3) & 3 == 3
+    mono = frame[3] >> 6 == 3
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    crc = 0 if frame[1] & 1 else 2
+    start = 4 + crc + side_info
+    return bytes(frame[start : start + 4]) in (b"Xing", b"Info") or (
+        bytes(frame[36:40]) == b"VBRI"
+    )
+
+
+def _audio_span(data: bytes) -> tuple:
+    """The start and end of ``data`` without its ID3v2 and ID3v1 tags."""
+    start = 0
+    while data[start : start + 3] == b"ID3" and len(data) >= start + 10:
+        # A synchsafe size after the 10 byte header, plus a footer if flagged.
+        size = 0
+        for byte in data[start + 6 : start + 10]:
+            size = (size << 7) | (byte & 0x7F)
+        start += 10 + size + (10 if data[start + 5] & 0x10 else 0)
+    end = len(data)
+    if end - start >= 128 and data[end - 128 : end - 125] == b"TAG":
+        end -= 128
+    return start, end
+
+
+def iter_frames(data: bytes) -> Iterator[memoryview]:
+    """Yield the complete audio frames of an MP3 file, skipping tags and junk."""
+    view = memoryview(data)
+    offset, end = _audio_span(data)
+    while offset < end:
+        length = _frame_length(data, offset)
+        if length is not None and offset + length <= end:
+            following = offset + length
+            # A false sync in junk rarely has a valid frame right after it.
+            if following == end or _frame_length(data, following) is not None:
+                frame = view[offset:following]
+                if not _is_info_frame(frame):
+                    yield frame
+                offset = following
+                continue
+        offset = data.find(b"\xff", offset + 1, end)
+        if offset < 0:
+            return
+
+
+def mp3_frames(data: bytes) -> bytes:
+    """The audio frames of an MP3 file, which can be joined to those of others."""
+    frames = b"".join(iter_frames(data))
+    if not frames and data:
+        # Not MP3 after all: better to pass it on than to lose the audio.
+        logger.warning("No MPEG audio frames found, keeping the audio as it is")
+        start, end = _audio_span(data)
+        return data[start:end]
+    return frames
+
+
+class Mp3Writer:
+    """Joins MP3 files frame by frame into a spooled temporary file."""
+
+    def __init__(self, max_memory: int = 1 << 20):
+        """
+        Initialize the writer.
+
+        Args:
+            max_memory: Bytes kept in memory before the file moves to disk
+        """
+        self.file: BinaryIO = tempfile.SpooledTemporaryFile(max_size=max_memory)
+        self.size = 0
+
+    def add(self, data: bytes) -> None:
+        """Append the audio of one MP3 file."""
+        frames = mp3_frames(data)
+        self.file.write(frames)
+        self.size += len(frames)
+
+    def finish(self) -> BinaryIO:
+        """Return the joined file, positioned at its start, for the caller to close."""
+        self.file.seek(0)
+        return self.file
@@ -10,7 +10,7 @@ logger = logging.getLogger(__name__)
 
 def audio_mixer_node(state: PodcastState):
     logger.info("Mixing audio chunks for podcast...")
-    audio_chunks = state["audio_chunks"]
-    combined_audio = b"".join(audio_chunks)
-    logger.info("The podcast audio is now ready.")
-    return {"output": combined_audio}
+    # The TTS node already joined the chunks frame by frame as they arrived.
+    audio = state["audio"]
+    logger.info(f"The podcast audio is now ready, {audio.size} bytes.")
+    return {"output": audio.finish()}
@@ -1,8 +1,12 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import shutil
+
 from langgraph.graph import END, START, StateGraph
 
+from src.graph.registry import get_graph, lazy_graph_attribute
+
 from src.podcast.graph.audio_mixer_node import audio_mixer_node
 from src.podcast.graph.script_writer_node import script_writer_node
 from src.podcast.graph.state import PodcastState
@@ -23,7 +27,8 @@ def build_graph():
     return builder.compile()
 
 
-workflow = build_graph()
+# Compiled on first use by the graph registry rather than on import.
+__getattr__ = lazy_graph_attribute(__name__, {"workflow": "podcast"})
 
 if __name__ == "__main__":
     from dotenv import load_dotenv
@@ -31,9 +36,9 @@ if __name__ == "__main__":
     load_dotenv()
 
     report_content = open("examples/nanjing_tangbao.md").read()
-    final_state = workflow.invoke({"input": report_content})
+    final_state = get_graph("podcast").invoke({"input": report_content})
     for line in final_state["script"].lines:
         print("<M>" if line.speaker == "male" else "<F>", line.text)
 
-    with open("final.mp3", "wb") as f:
-        f.write(final_state["output"])
+    with open("final.mp3", "wb") as f, final_state["output"] as output:
+        shutil.copyfileobj(output, f)
@@ -15,16 +15,22 @@ from .state import PodcastState
 logger = logging.getLogger(__name__)
 
 
-def script_writer_node(state: PodcastState):
-    logger.info("Generating script for podcast...")
-    model = get_llm_by_type(
+def create_script_writer():
+    """The model that writes a ``Script``, which can also stream partial scripts."""
+    return get_llm_by_type(
         AGENT_LLM_MAP["podcast_script_writer"]
     ).with_structured_output(Script, method="json_mode")
-    script = model.invoke(
-        [
-            SystemMessage(content=get_prompt_template("podcast/podcast_script_writer")),
-            HumanMessage(content=state["input"]),
-        ],
-    )
-    print(script)
-    return {"script": script, "audio_chunks": []}
+
+
+def script_writer_messages(content: str) -> list:
+    return [
+        SystemMessage(content=get_prompt_template("podcast/podcast_script_writer")),
+        HumanMessage(content=content),
+    ]
+
+
+def script_writer_node(state: PodcastState):
+    logger.info("Generating script for podcast...")
+    script = create_script_writer().invoke(script_writer_messages(state["input"]))
+    logger.debug(f"Podcast script: {script}")
+    return {"script": script}
@@ -1,10 +1,11 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
-from typing import Optional
+from typing import BinaryIO, Optional
 
 from langgraph.graph import MessagesState
 
+from ..audio import Mp3Writer
 from ..types import Script
 
 
@@ -14,9 +15,9 @@ class PodcastState(MessagesState):
     # Input
     input: str = ""
 
-    # Output
-    output: Optional[bytes] = None
+    # Output, a temporary file the caller closes
+    output: Optional[BinaryIO] = None
 
     # Assets
     script: Optional[Script] = None
-    audio_chunks: list[bytes] = []
+    audio: Optional[Mp3Writer] = None
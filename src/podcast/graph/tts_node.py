@@ -1,36 +1,94 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
-import base64
+import asyncio
 import logging
 import os
+from typing import Any, Dict, Optional, Tuple
 
+from src.podcast.audio import FORMAT_VERSION, Mp3Writer
 from src.podcast.graph.state import PodcastState
+from src.podcast.types import ScriptLine
 from src.tools.tts import VolcengineTTS
+from src.tools.tts_chunks import synthesize
+from src.tools.tts_cache import get_tts_cache
+from src.utils.background_loop import submit
 
 logger = logging.getLogger(__name__)
 
+VOICES = {"male": "BV002_streaming", "female": "BV001_streaming"}
+SPEED_RATIO = 1.05
+# Seconds before the first retry of a line, doubled for every further one.
+RETRY_BACKOFF = 0.5
+
 
 def tts_node(state: PodcastState):
     logger.info("Generating audio chunks for podcast...")
-    tts_client = _create_tts_client()
-    for line in state["script"].lines:
-        tts_client.voice_type = (
-            "BV002_streaming" if line.speaker == "male" else "BV001_streaming"
-        )
-        result = tts_client.text_to_speech(line.paragraph, speed_ratio=1.05)
-        if result["success"]:
-            audio_data = result["audio_data"]
-            audio_chunk = base64.b64decode(audio_data)
-            state["audio_chunks"].append(audio_chunk)
-        else:
-            logger.error(result["error"])
+    tts_client = create_tts_client()
+    lines = state["script"].lines
+    concurrency, retries = tts_settings()
+    limit = asyncio.Semaphore(concurrency)
+    audio = Mp3Writer()
+    # The lines are synthesized concurrently, and taken in script order, so each
+    # line's audio can be written out as soon as it is its turn.
+    futures = [
+        submit(synthesize_line(tts_client, line, retries, limit)) for line in lines
+    ]
+    try:
+        for index, future in enumerate(futures):
+            audio_chunk = future.result()
+            # A podcast with a line missing is not delivered, nor cached.
+            if audio_chunk is None:
+                raise RuntimeError(
+                    f"TTS failed for podcast line {index + 1} of {len(lines)}"
+                )
+            audio.add(audio_chunk)
+    finally:
+        for future in futures:
+            future.cancel()
+    return {
+        "audio": audio,
+    }
+
+
+def audio_settings() -> Dict[str, Any]:
+    """Everything besides the script that the podcast's audio depends on."""
     return {
-        "audio_chunks": state["audio_chunks"],
+        "voices": VOICES,
+        "speed_ratio": SPEED_RATIO,
+        "cluster": os.getenv("VOLCENGINE_TTS_CLUSTER", "volcano_tts"),
+        "audio_format": FORMAT_VERSION,
     }
 
 
-def _create_tts_client():
+def tts_settings() -> Tuple[int, int]:
+    """The lines synthesized at once, and the retries of a line that failed."""
+    concurrency = int(os.getenv("PODCAST_TTS_CONCURRENCY", 4))
+    return max(1, concurrency), int(os.getenv("PODCAST_TTS_RETRIES", 2))
+
+
+async def synthesize_line(
+    tts_client: VolcengineTTS,
+    line: ScriptLine,
+    retries: int = 2,
+    limit: Optional[asyncio.Semaphore] = None,
+) -> Optional[bytes]:
+    """Synthesize one script line, or return None once all attempts failed."""
+    audio = await synthesize(
+        tts_client,
+        line.paragraph,
+        retries,
+        RETRY_BACKOFF,
+        limit,
+        speed_ratio=SPEED_RATIO,
+        voice_type=VOICES[line.speaker],
+    )
+    if audio is None:
+        logger.error(f"A podcast line failed TTS: {line.paragraph[:50]}")
+    return audio
+
+
+def create_tts_client():
     app_id = os.getenv("VOLCENGINE_TTS_APPID", "")
     if not app_id:
         raise Exception("VOLCENGINE_TTS_APPID is not set")
@@ -44,4 +102,6 @@ def _create_tts_client():
         access_token=access_token,
         cluster=cluster,
         voice_type=voice_type,
+        cache=get_tts_cache(),
+        api_url=os.getenv("VOLCENGINE_TTS_API_URL") or None,
     )
@@ -0,0 +1,134 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+A podcast pipeline that streams audio while the script is still being written.
+
+The podcast graph runs its nodes one after another: the whole script, then the
+audio of every line, then the mix. Here the script writer's output is parsed as
+it streams, every line goes to TTS as soon as it is complete, and the audio of
+the lines is yielded in script order as it becomes ready.
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Iterator, List, Optional
+
+from src.podcast.audio import mp3_frames
+from src.podcast.graph.script_writer_node import (
+    create_script_writer,
+    script_writer_messages,
+)
+from src.podcast.graph.tts_node import create_tts_client, synthesize_line, tts_settings
+from src.podcast.types import ScriptLine
+from src.tools.tts import VolcengineTTS
+from src.utils.background_loop import submit
+
+logger = logging.getLogger(__name__)
+
+
+def stream_script_lines(
+    content: str, stop: Optional[threading.Event] = None
+) -> Iterator[ScriptLine]:
+    """
+    Yield the lines of the podcast script as soon as each one is complete.
+
+    Once ``stop`` is set, the script writer is stopped at its next token.
+    """
+    emitted = 0
+    script = None
+    # Every partial script holds the lines so far; the last one may still grow.
+    for script in create_script_writer().stream(script_writer_messages(content)):
+        if stop is not None and stop.is_set():
+            return
+        if script is None:
+            continue
+        for line in script.lines[emitted : len(script.lines) - 1]:
+            yield line
+        emitted = max(emitted, len(script.lines) - 1)
+    if script is not None:
+        yield from script.lines[emitted:]
+
+
+def stream_podcast(
+    content: str,
+    tts_client: Optional[VolcengineTTS] = None,
+    concurrency: Optional[int] = None,
+    retries: Optional[int] = None,
+) -> Iterator[bytes]:
+    """
+    Yield the audio of the podcast line by line, in script order.
+
+    Lines are synthesized ``concurrency`` at a time while the script is written.
+    A line that fails TTS ``retries`` more times ends the podcast with an error,
+    rather than leaving a gap in it. Closing the generator stops the script
+    writer and the outstanding TTS.
+    """
+    default_concurrency, default_retries = tts_settings()
+    concurrency = concurrency or default_concurrency
+    retries = default_retries if retries is None else retries
+    tts_client = tts_client or create_tts_client()
+    limit = asyncio.Semaphore(concurrency)
+    submitted: List[Future] = []
+    # Futures in script order. Bounded, so the script writer waits for TTS to
+    # catch up instead of holding the audio of the whole podcast.
+    futures: "queue.Queue[Optional[Future]]" = queue.Queue(maxsize=concurrency * 2)
+    stopped = threading.Event()
+
+    def put(item: Optional[Future]) -> None:
+        while not stopped.is_set():
+            try:
+                futures.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def write_script() -> None:
+        lines = stream_script_lines(content, stopped)
+        try:
+            for line in lines:
+                if stopped.is_set():
+                    return
+                future = submit(synthesize_line(tts_client, line, retries, limit))
+                submitted.append(future)
+                put(future)
+        except Exception as e:
+            failed: Future = Future()
+            failed.set_exception(e)
+            put(failed)
+        finally:
+            # Closes the script writer's model stream now, not when collected.
+            lines.close()
+            put(None)
+
+    started = time.monotonic()
+    writer = threading.Thread(target=write_script, name="podcast-script", daemon=True)
+    writer.start()
+    lines = 0
+    try:
+        while True:
+            future = futures.get()
+            if future is None:
+                break
+            audio = future.result()
+            if audio is None:
+                raise RuntimeError(f"TTS failed for podcast line {lines + 1}")
+            if not lines:
+                logger.info(
+                    f"First podcast audio after {time.monotonic() - started:.1f}s"
+                )
+            lines += 1
+            # Without the tags and info frame of each line's own file, the
+            # streamed lines play as one MP3.
+            yield mp3_frames(audio)
+        logger.info(
+            f"Streamed {lines} podcast lines in {time.monotonic() - started:.1f}s"
+        )
+    finally:
+        stopped.set()
+        for future in submitted:
+            future.cancel()
@@ -1,8 +1,12 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import shutil
+
 from langgraph.graph import END, START, StateGraph
 
+from src.graph.registry import get_graph, lazy_graph_attribute
+
 from src.ppt.graph.ppt_composer_node import ppt_composer_node
 from src.ppt.graph.ppt_generator_node import ppt_generator_node
 from src.ppt.graph.state import PPTState
@@ -20,7 +24,8 @@ def build_graph():
     return builder.compile()
 
 
-workflow = build_graph()
+# Compiled on first use by the graph registry rather than on import.
+__getattr__ = lazy_graph_attribute(__name__, {"workflow": "ppt"})
 
 if __name__ == "__main__":
     from dotenv import load_dotenv
@@ -28,4 +33,6 @@ if __name__ == "__main__":
     load_dotenv()
 
     report_content = open("examples/nanjing_tangbao.md").read()
-    final_state = workflow.invoke({"input": report_content})
+    final_state = get_graph("ppt").invoke({"input": report_content})
+    with open("final.pptx", "wb") as f, final_state["output"] as output:
+        shutil.copyfileobj(output, f)
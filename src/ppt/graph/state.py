@@ -1,7 +1,7 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
-from typing import Optional
+from typing import BinaryIO, Optional
 
 from langgraph.graph import MessagesState
 
@@ -12,9 +12,8 @@ class PPTState(MessagesState):
     # Input
     input: str = ""
 
-    # Output
-    generated_file_path: str = ""
+    # Output, a temporary file the caller closes
+    output: Optional[BinaryIO] = None
 
     # Assets
     ppt_content: str = ""
-    ppt_file_path: str = ""
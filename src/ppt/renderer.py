@@ -0,0 +1,336 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Rendering of marp decks to pptx by a pool of warm marp processes.
+
+Every run of the marp CLI starts Node and loads marp before converting a single
+deck. Instead, marp runs in server mode, which converts a markdown file of the
+directory it serves when it is requested with ``?pptx``, and a few of those
+servers are kept running. Decks are written to a private temporary directory,
+on tmpfs where available, and deleted as soon as they are rendered.
+
+A marp server lists the directory it serves, so while a deck is being rendered
+any local process that can connect to the server's port can read it. The pool
+is meant for hosts that don't run untrusted local processes, and the ports must
+not be reachable from other hosts.
+"""
+
+import asyncio
+import atexit
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, BinaryIO, Dict, List, Optional
+
+import httpx
+
+from src.utils.background_loop import submit
+from src.utils.metrics import register_metrics_provider
+
+logger = logging.getLogger(__name__)
+
+# Bytes of a rendered deck kept in memory before it moves to disk.
+_SPOOL_SIZE = 4 << 20
+
+
+def _default_temp_root() -> Optional[str]:
+    # Decks are small and short-lived, so they are kept in memory if possible.
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class _PortTaken(Exception):
+    pass
+
+
+class _Worker:
+    def __init__(self, process: asyncio.subprocess.Process, port: int):
+        self.process = process
+        self.url = f"http://127.0.0.1:{port}"
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    async def stop(self) -> None:
+        if self.alive:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), 5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+
+
+class MarpPool:
+    """
+    Renders marp markdown to pptx on pre-started marp server processes.
+
+    The processes are started on first use and replaced when they die. With no
+    workers, or when marp can't be started in server mode, every deck is
+    rendered by a run of the marp CLI instead. All the subprocess and HTTP I/O
+    happens on the background event loop; ``render`` blocks its caller only.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        marp: str = "marp",
+        temp_root: Optional[str] = None,
+        timeout: float = 120.0,
+        start_timeout: float = 30.0,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            workers: Number of marp server processes, 0 to run the CLI per deck
+            marp: The marp executable
+            temp_root: Directory to create the pool's temporary directory in
+            timeout: Seconds a deck may take to render
+            start_timeout: Seconds a marp server may take to start
+        """
+        self.workers = workers
+        self.marp = marp
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+        self.temp_dir = tempfile.mkdtemp(prefix="deer-flow-ppt-", dir=temp_root)
+        self._workers: List[_Worker] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._starting: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._closed = False
+        self._renders = 0
+        self._cli_renders = 0
+        self._failures = 0
+        self._restarts = 0
+        self._render_time = 0.0
+
+    def render(self, markdown: str) -> BinaryIO:
+        """Render a deck, returning the pptx as a temporary file the caller closes."""
+        return submit(self._render(markdown)).result()
+
+    async def _render(self, markdown: str) -> BinaryIO:
+        if self._closed:
+            raise RuntimeError("The marp pool is closed")
+        started = time.monotonic()
+        name = f"{uuid.uuid4().hex}.md"
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(markdown)
+        try:
+            await self._start()
+            if self._workers:
+                output = await self._render_on_worker(name)
+            else:
+                output = await self._render_with_cli(path)
+        except BaseException:
+            self._failures += 1
+            raise
+        finally:
+            os.remove(path)
+        self._renders += 1
+        self._render_time += time.monotonic() - started
+        return output
+
+    async def _start(self) -> None:
+        # Renders that arrive while the servers start wait for them.
+        if self._starting is None:
+            self._starting = asyncio.ensure_future(self._start_workers())
+        await self._starting
+
+    async def _start_workers(self) -> None:
+        self._idle = asyncio.Queue()
+        self._client = httpx.AsyncClient(timeout=self.timeout)
+        for _ in range(self.workers):
+            try:
+                worker = await self._start_worker()
+            except Exception as e:
+                logger.warning(
+                    f"Failed to start marp in server mode, rendering with the CLI: {e}"
+                )
+                break
+            self._workers.append(worker)
+            self._idle.put_nowait(worker)
+
+    async def _start_worker(self) -> _Worker:
+        # Another process can take the free port before marp binds it.
+        for _ in range(3):
+            try:
+                return await self._start_worker_on(_free_port())
+            except _PortTaken as e:
+                logger.warning(f"{e}, retrying on another port")
+        raise RuntimeError("marp could not bind a free port")
+
+    async def _start_worker_on(self, port: int) -> _Worker:
+        # A deck only marp, serving this pool's directory, can render.
+        token = uuid.uuid4().hex
+        sentinel = os.path.join(self.temp_dir, f"{token}.md")
+        with open(sentinel, "w", encoding="utf-8") as f:
+            f.write(token)
+        try:
+            return await self._launch(port, token)
+        finally:
+            os.remove(sentinel)
+
+    async def _launch(self, port: int, token: str) -> _Worker:
+        process = await asyncio.create_subprocess_exec(
+            self.marp,
+            "--server",
+            self.temp_dir,
+            env={**os.environ, "PORT": str(port)},
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        worker = _Worker(process, port)
+        deadline = time.monotonic() + self.start_timeout
+        while time.monotonic() < deadline:
+            try:
+                response = await self._client.get(
+                    f"{worker.url}/{token}.md", timeout=1.0
+                )
+            except httpx.TransportError:
+                if not worker.alive:
+                    raise RuntimeError(f"marp exited with code {process.returncode}")
+                await asyncio.sleep(0.1)
+                continue
+            if response.status_code != 200 or token not in response.text:
+                await worker.stop()
+                raise _PortTaken(f"Another server answers on port {port}")
+            logger.info(f"Started a marp server on port {port}")
+            return worker
+        await worker.stop()
+        raise RuntimeError(f"marp did not start in {self.start_timeout}s")
+
+    async def _render_on_worker(self, name: str) -> BinaryIO:
+        worker = await self._idle.get()
+        try:
+            if not worker.alive:
+                worker = await self._replace(worker)
+            try:
+                return await self._fetch(worker, name)
+            except httpx.TransportError as e:
+                # The server may have died without its exit being noticed yet.
+                logger.warning(f"marp server failed, restarting it: {e!r}")
+                worker = await self._replace(worker)
+                return await self._fetch(worker, name)
+        finally:
+            if not self._closed:
+                self._idle.put_nowait(worker)
+
+    async def _fetch(self, worker: _Worker, name: str) -> BinaryIO:
+        output = tempfile.SpooledTemporaryFile(_SPOOL_SIZE, dir=self.temp_dir)
+        try:
+            async with self._client.stream(
+                "GET", f"{worker.url}/{name}?pptx"
+            ) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    output.write(chunk)
+        except BaseException:
+            output.close()
+            raise
+        output.seek(0)
+        return output
+
+    async def _replace(self, worker: _Worker) -> _Worker:
+        await worker.stop()
+        replacement = await self._start_worker()
+        self._workers[self._workers.index(worker)] = replacement
+        self._restarts += 1
+        return replacement
+
+    async def _render_with_cli(self, path: str) -> BinaryIO:
+        # https://github.com/marp-team/marp-cli?tab=readme-ov-file
+        output_path = path[: -len(".md")] + ".pptx"
+        process = await asyncio.create_subprocess_exec(
+            self.marp,
+            path,
+            "-o",
+            output_path,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            try:
+                _, stderr = await asyncio.wait_for(process.communicate(), self.timeout)
+            except BaseException:
+                process.kill()
+                await process.wait()
+                raise
+            if process.returncode != 0:
+                raise RuntimeError(
+                    f"marp exited with code {process.returncode}: "
+                    f"{stderr.decode(errors='replace').strip()}"
+                )
+            output = tempfile.SpooledTemporaryFile(_SPOOL_SIZE, dir=self.temp_dir)
+            with open(output_path, "rb") as f:
+                shutil.copyfileobj(f, output)
+            self._cli_renders += 1
+            output.seek(0)
+            return output
+        finally:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": sum(worker.alive for worker in self._workers),
+            "idle_workers": self._idle.qsize() if self._idle is not None else 0,
+            "renders": self._renders,
+            "cli_renders": self._cli_renders,
+            "failures": self._failures,
+            "restarts": self._restarts,
+            "render_time_total": self._render_time,
+        }
+
+    def close(self) -> None:
+        """Stop the marp processes and delete the temporary directory."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            submit(self._close()).result(10)
+        except Exception as e:
+            logger.warning(f"Failed to stop the marp servers: {e}")
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    async def _close(self) -> None:
+        await asyncio.gather(*(worker.stop() for worker in self._workers))
+        if self._client is not None:
+            await self._client.aclose()
+
+
+_marp_pool: Optional[MarpPool] = None
+_marp_pool_lock = threading.Lock()
+
+
+def get_marp_pool() -> MarpPool:
+    """Return the process-wide marp pool configured from the environment."""
+    global _marp_pool
+    with _marp_pool_lock:
+        if _marp_pool is None:
+            _marp_pool = MarpPool(
+                workers=int(os.getenv("PPT_RENDER_WORKERS", 2)),
+                marp=os.getenv("MARP_PATH", "marp"),
+                temp_root=os.getenv("PPT_TEMP_DIR") or _default_temp_root(),
+                timeout=float(os.getenv("PPT_RENDER_TIMEOUT", 120)),
+            )
+            register_metrics_provider("ppt_renderer", _marp_pool.stats)
+            atexit.register(_marp_pool.close)
+        return _marp_pool
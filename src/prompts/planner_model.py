@@ -22,6 +22,9 @@ class Step(BaseModel):
     execution_res: Optional[str] = Field(
         default=None, description="The Step execution result"
     )
+    resource_usage: Optional[dict] = Field(
+        default=None, description="Resources used by the step's code executions"
+    )
 
 
 class Plan(BaseModel):
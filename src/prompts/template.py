@@ -3,6 +3,7 @@
 
 import os
 import dataclasses
+import functools
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 import jinja2
@@ -21,6 +22,14 @@ env = Environment(
 )
 
 
+@functools.lru_cache(maxsize=1)
+def _coordinator_personas() -> frozenset:
+    directory = os.path.join(os.path.dirname(__file__), "coordinator_personas")
+    return frozenset(
+        name[: -len(".md")] for name in os.listdir(directory) if name.endswith(".md")
+    )
+
+
 def get_prompt_template(
     prompt_name: str, selected_persona: Optional[str] = None
 ) -> str:
@@ -39,6 +48,16 @@ def get_prompt_template(
     Raises:
         ValueError: If the template or its fallback cannot be loaded.
     """
+    # The persona comes from the request, so only the ones that exist become
+    # cache keys; any other one gets the default coordinator.
+    if prompt_name != "coordinator" or selected_persona not in _coordinator_personas():
+        selected_persona = None
+    return _load_prompt_template(prompt_name, selected_persona)
+
+
+# Prompts ship with the code, so each one is loaded once per process.
+@functools.lru_cache(maxsize=128)
+def _load_prompt_template(prompt_name: str, selected_persona: Optional[str]) -> str:
     template_path_to_try = ""
     if prompt_name == "coordinator":
         default_coordinator_path = os.path.join("coordinator_personas", "default.md")
@@ -83,6 +102,11 @@ def get_prompt_template(
             ) from e
 
 
+@functools.lru_cache(maxsize=128)
+def _compile_template(template_str: str) -> jinja2.Template:
+    return env.from_string(template_str)
+
+
 def apply_prompt_template(
     prompt_name: str, state: AgentState, configurable: Optional[Dict[str, Any]] = None
 ) -> list:
@@ -118,7 +142,7 @@ def apply_prompt_template(
 
     try:
         template_str = get_prompt_template(prompt_name, selected_persona)
-        template_obj = env.from_string(template_str)
+        template_obj = _compile_template(template_str)
         system_prompt = template_obj.render(**state_vars)
 
         messages_from_state = state.get("messages", [])
@@ -5,6 +5,8 @@ import asyncio
 import logging
 from langgraph.graph import END, START, StateGraph
 
+from src.graph.registry import get_graph
+
 from src.prose.graph.prose_continue_node import prose_continue_node
 from src.prose.graph.prose_fix_node import prose_fix_node
 from src.prose.graph.prose_improve_node import prose_improve_node
@@ -45,7 +47,7 @@ def build_graph():
 
 
 async def _test_workflow():
-    workflow = build_graph()
+    workflow = get_graph("prose")
     events = workflow.astream(
         {
             "content": "The weather in Beijing is sunny",
@@ -0,0 +1,13 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from .limits import ExecutionLimits, ResourceUsage
+from .pool import ReplPool, ReplResult, get_repl_pool
+
+__all__ = [
+    "ExecutionLimits",
+    "ResourceUsage",
+    "ReplPool",
+    "ReplResult",
+    "get_repl_pool",
+]
@@ -0,0 +1,286 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Per-thread store of dataframes and arrays shared between coder steps.
+
+Every artifact is a directory holding one ``.npy`` file per column and a
+``meta.json`` file. Numeric columns are loaded memory-mapped, so reading a large
+price series back costs neither a download nor a copy. The metadata alone is
+enough to describe an artifact to the LLM, so the parent process never has to
+import numpy or pandas to list them.
+
+Like the worker, this module is imported in spawned interpreters and only
+imports numpy and pandas when an artifact is saved or loaded.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.-]{0,63}$")
+_META_FILE = "meta.json"
+_MAX_SUMMARY_COLUMNS = 12
+
+
+def thread_artifact_dir(root: str, thread_id: str) -> str:
+    """The artifact directory of a thread, safe for any thread id."""
+    return os.path.join(root, hashlib.sha256(thread_id.encode()).hexdigest()[:32])
+
+
+def summarize(meta: Dict[str, Any]) -> str:
+    """Describe an artifact in one line from its metadata."""
+    size = f"{meta['nbytes'] / 1024:.1f} KiB"
+    if meta["kind"] == "ndarray":
+        shape = "x".join(str(n) for n in meta["shape"])
+        return f"{meta['name']}: ndarray {shape} {meta['dtype']}, {size}"
+    columns = meta["columns"]
+    described = ", ".join(
+        f"{column['name']} ({column['dtype']})"
+        for column in columns[:_MAX_SUMMARY_COLUMNS]
+    )
+    if len(columns) > _MAX_SUMMARY_COLUMNS:
+        described += f", ... {len(columns) - _MAX_SUMMARY_COLUMNS} more"
+    text = f"{meta['name']}: {meta['kind']} {meta['rows']} rows, columns {described}"
+    index = meta.get("index")
+    if index:
+        text += f"; index {index}"
+    return f"{text}; {size}"
+
+
+class ArtifactStore:
+    """Saves and loads the artifacts of one thread."""
+
+    def __init__(self, directory: str, max_bytes: Optional[int] = None):
+        """
+        Initialize the store.
+
+        Args:
+            directory: The thread's artifact directory, created on first save
+            max_bytes: Total size the thread's artifacts may take on disk
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Summaries of the artifacts saved by the current execution.
+        self.saved: List[str] = []
+
+    def _path(self, name: str) -> str:
+        if not _NAME_PATTERN.match(name):
+            raise ValueError(
+                f"Invalid artifact name {name!r}: use letters, digits, '_', '.' or '-'"
+            )
+        return os.path.join(self.directory, name)
+
+    def _meta(self, name: str) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self._path(name), _META_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(f"No artifact named {name!r}") from None
+
+    def names(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name
+            for name in os.listdir(self.directory)
+            if os.path.isfile(os.path.join(self.directory, name, _META_FILE))
+        )
+
+    def list(self) -> List[str]:
+        """One-line summaries of every artifact of the thread."""
+        return [self.describe(name) for name in self.names()]
+
+    def describe(self, name: str) -> str:
+        return summarize(self._meta(name))
+
+    def size(self) -> int:
+        return sum(self._meta(name)["nbytes"] for name in self.names())
+
+    def save(self, name: str, obj: Any) -> str:
+        """
+        Save a pandas DataFrame or Series or a numpy array.
+
+        Column and index labels are stored as strings.
+
+        Args:
+            name: The artifact name, an existing artifact is replaced
+            obj: The object to save
+
+        Returns:
+            A one-line summary of the saved artifact
+        """
+        import numpy as np
+        import pandas as pd
+
+        path = self._path(name)
+        os.makedirs(self.directory, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{name}-", dir=self.directory)
+        try:
+            if isinstance(obj, np.ndarray):
+                np.save(os.path.join(staging, "data.npy"), obj, allow_pickle=False)
+                meta = {
+                    "kind": "ndarray",
+                    "shape": list(obj.shape),
+                    "dtype": str(obj.dtype),
+                }
+            elif isinstance(obj, (pd.DataFrame, pd.Series)):
+                meta = self._save_frame(staging, obj)
+            else:
+                raise TypeError(
+                    f"Artifacts must be pandas DataFrames/Series or numpy arrays, "
+                    f"got {type(obj).__name__}"
+                )
+            meta["name"] = name
+            meta["created_at"] = time.time()
+            meta["nbytes"] = sum(
+                os.path.getsize(os.path.join(staging, f)) for f in os.listdir(staging)
+            )
+            if self.max_bytes is not None:
+                previous = self._meta(name)["nbytes"] if name in self.names() else 0
+                if self.size() - previous + meta["nbytes"] > self.max_bytes:
+                    raise MemoryError(
+                        f"Saving {name!r} would exceed the artifact quota of "
+                        f"{self.max_bytes / 2**20:.0f} MiB"
+                    )
+            with open(os.path.join(staging, _META_FILE), "w") as f:
+                json.dump(meta, f)
+            shutil.rmtree(path, ignore_errors=True)
+            os.rename(staging, path)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        summary = summarize(meta)
+        self.saved.append(summary)
+        return summary
+
+    @staticmethod
+    def _save_frame(staging: str, obj) -> Dict[str, Any]:
+        import numpy as np
+        import pandas as pd
+
+        is_series = isinstance(obj, pd.Series)
+        frame = (
+            obj.to_frame(name=0 if obj.name is None else obj.name) if is_series else obj
+        )
+        if frame.columns.duplicated().any():
+            raise ValueError("Artifacts cannot have duplicate column names")
+        index_names = list(frame.index.names)
+        index_range = None
+        if (
+            len(frame)
+            and frame.index.nlevels == 1
+            and not isinstance(frame.index, pd.RangeIndex)
+        ):
+            try:
+                index_range = f"{frame.index.min()} .. {frame.index.max()}"
+            except TypeError:
+                pass
+        if isinstance(frame.index, pd.RangeIndex) and frame.index.equals(
+            pd.RangeIndex(len(frame))
+        ):
+            # The default index is rebuilt on load instead of being stored.
+            index_names = []
+        else:
+            frame = frame.reset_index()
+
+        columns = []
+        for position, (label, series) in enumerate(frame.items()):
+            column = {"name": str(label), "dtype": str(series.dtype)}
+            if isinstance(series.dtype, pd.DatetimeTZDtype):
+                column["tz"] = str(series.dt.tz)
+                values = series.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy()
+            elif isinstance(series.dtype, pd.CategoricalDtype):
+                values = series.astype(object).to_numpy()
+            else:
+                values = series.to_numpy()
+            column["pickled"] = values.dtype == object
+            column["file"] = f"col{position}.npy"
+            np.save(
+                os.path.join(staging, column["file"]),
+                values,
+                allow_pickle=column["pickled"],
+            )
+            columns.append(column)
+
+        index_columns = columns[: len(index_names)]
+        index = None
+        if index_columns:
+            index = ", ".join(f"{c['name']} ({c['dtype']})" for c in index_columns)
+            if index_range:
+                index += f" {index_range}"
+        series_name = None
+        if is_series and obj.name is not None:
+            series_name = str(obj.name)
+        return {
+            "kind": "Series" if is_series else "DataFrame",
+            "rows": len(frame),
+            "columns": columns[len(index_names) :],
+            "index_columns": index_columns,
+            "index_names": index_names,
+            "index": index,
+            "series_name": series_name,
+        }
+
+    def load(self, name: str) -> Any:
+        """
+        Load an artifact saved by this or an earlier step.
+
+        Numeric columns and arrays are memory-mapped read-only; call ``.copy()``
+        before modifying them in place.
+        """
+        import numpy as np
+        import pandas as pd
+
+        path = self._path(name)
+        meta = self._meta(name)
+        if meta["kind"] == "ndarray":
+            return np.load(os.path.join(path, "data.npy"), mmap_mode="r")
+
+        def read(column):
+            if column["pickled"]:
+                values = np.load(os.path.join(path, column["file"]), allow_pickle=True)
+            else:
+                values = np.load(os.path.join(path, column["file"]), mmap_mode="r")
+            if "tz" in column:
+                return pd.DatetimeIndex(values, tz="UTC").tz_convert(column["tz"]).array
+            if column["dtype"] == "category":
+                return pd.Categorical(values)
+            return values
+
+        index = None
+        if meta["index_columns"]:
+            # Built up front, since set_index() would copy the mapped columns.
+            index = pd.MultiIndex.from_arrays(
+                [read(c) for c in meta["index_columns"]], names=meta["index_names"]
+            )
+            if index.nlevels == 1:
+                index = index.get_level_values(0)
+        data = {c["name"]: read(c) for c in meta["columns"]}
+        frame = pd.DataFrame(data, index=index, copy=False)
+        if meta["kind"] == "Series":
+            series = frame.iloc[:, 0]
+            series.name = meta["series_name"]
+            return series
+        return frame
+
+    def delete(self, name: str) -> None:
+        shutil.rmtree(self._path(name), ignore_errors=True)
+
+
+def prune_artifacts(root: str, max_age: float) -> int:
+    """Delete the artifact directories of threads idle for ``max_age`` seconds."""
+    if not os.path.isdir(root):
+        return 0
+    removed = 0
+    cutoff = time.time() - max_age
+    for entry in os.scandir(root):
+        if entry.is_dir() and entry.stat().st_mtime < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+    return removed
@@ -0,0 +1,78 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import os
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Any, Dict, Optional
+
+
+@dataclass(frozen=True)
+class ExecutionLimits:
+    """Resource limits of one code execution. None disables a limit."""
+
+    wall_time: Optional[float] = 60  # Seconds before the worker is killed
+    cpu_time: Optional[float] = 60  # CPU seconds, rounded up to whole seconds
+    memory_mb: Optional[int] = 1024  # Resident set size before the worker is killed
+    max_output_chars: Optional[int] = 20000  # Characters of stdout kept
+
+    @classmethod
+    def from_env(cls) -> "ExecutionLimits":
+        def number(name: str, default, cast):
+            value = os.getenv(name)
+            if value is None:
+                return default
+            return cast(value) if float(value) > 0 else None
+
+        return cls(
+            wall_time=number("PYTHON_REPL_TIMEOUT", cls.wall_time, float),
+            cpu_time=number("PYTHON_REPL_CPU_TIME", cls.cpu_time, float),
+            memory_mb=number("PYTHON_REPL_RSS_LIMIT_MB", cls.memory_mb, int),
+            max_output_chars=number(
+                "PYTHON_REPL_MAX_OUTPUT_CHARS", cls.max_output_chars, int
+            ),
+        )
+
+    def tightened(self, overrides: Optional[Dict[str, Any]]) -> "ExecutionLimits":
+        """
+        Apply per-thread overrides, which may only lower the limits.
+
+        Args:
+            overrides: Limit values by field name, unknown names are ignored
+
+        Returns:
+            The limits with every overridden value no higher than before
+        """
+        if not overrides:
+            return self
+        changes = {}
+        for f in fields(self):
+            value = overrides.get(f.name)
+            if value is None or value <= 0:
+                continue
+            current = getattr(self, f.name)
+            value = type(current)(value) if current is not None else value
+            changes[f.name] = value if current is None else min(current, value)
+        return replace(self, **changes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class ResourceUsage:
+    """Resources used by one code execution."""
+
+    wall_time: float = 0.0
+    cpu_time: Optional[float] = None  # Unknown when the worker was killed
+    peak_rss_bytes: Optional[int] = None
+    output_chars: int = 0
+    output_truncated: bool = False
+
+    def summary(self) -> str:
+        parts = [f"wall {self.wall_time:.2f}s"]
+        if self.cpu_time is not None:
+            parts.append(f"cpu {self.cpu_time:.2f}s")
+        if self.peak_rss_bytes is not None:
+            parts.append(f"peak RSS {self.peak_rss_bytes / 2**20:.1f} MiB")
+        parts.append(f"output {self.output_chars} chars")
+        return ", ".join(parts)
@@ -0,0 +1,496 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from src.utils.metrics import register_metrics_provider
+
+from .artifacts import ArtifactStore, prune_artifacts, thread_artifact_dir
+from .limits import ExecutionLimits, ResourceUsage
+from .worker import rss_bytes, worker_main
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRELOAD = ["numpy", "pandas", "yfinance"]
+
+# How often a running worker's memory is sampled, in seconds.
+_POLL_INTERVAL = 0.05
+
+
+@dataclass
+class ReplResult:
+    """The outcome of one code execution."""
+
+    output: str
+    error: Optional[str] = None
+    usage: ResourceUsage = field(default_factory=ResourceUsage)
+    # The limit that stopped the execution: wall_time, cpu_time or memory.
+    limit_exceeded: Optional[str] = None
+    # True when the session lost its variables because its worker was replaced.
+    session_restarted: bool = False
+    # Summaries of the artifacts the code saved.
+    artifacts: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def timed_out(self) -> bool:
+        return self.limit_exceeded == "wall_time"
+
+
+class _Worker:
+    def __init__(self, context, preload: List[str], memory_limit: Optional[int]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=worker_main,
+            args=(child_conn, preload, memory_limit),
+            name="python-repl",
+        )
+        self.process.start()
+        child_conn.close()
+        self.executions = 0
+        self.ready = False
+
+    def wait_ready(self, timeout: float) -> bool:
+        try:
+            if not self.ready and self.conn.poll(timeout):
+                self.ready = self.conn.recv().get("ready", False)
+        except (EOFError, OSError):
+            return False
+        return self.ready
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+    def close(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(1)
+        self.conn.close()
+
+
+@dataclass
+class _Session:
+    worker: Optional[_Worker] = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    last_used: float = field(default_factory=time.monotonic)
+    used: bool = False
+    executions: int = 0
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    peak_rss_bytes: int = 0
+    limits_exceeded: int = 0
+
+
+class ReplPool:
+    """
+    Runs Python code in pre-started worker processes, one session per thread.
+
+    Each session owns a worker process whose globals persist between calls,
+    so sessions of different threads are isolated from each other. Spare
+    workers are started ahead of time with the preload modules already
+    imported, so the first call of a session does not pay for interpreter
+    start-up and the numpy/pandas imports.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 8,
+        spare_workers: int = 1,
+        limits: Optional[ExecutionLimits] = None,
+        memory_limit_mb: int = 2048,
+        max_executions: int = 100,
+        idle_ttl: float = 1800,
+        preload: Optional[List[str]] = None,
+        start_timeout: float = 60,
+        artifact_root: Optional[str] = None,
+        artifact_max_mb: Optional[int] = 1024,
+        artifact_ttl: Optional[float] = 7 * 24 * 3600,
+    ):
+        """
+        Initialize the pool and start its spare workers.
+
+        Args:
+            max_sessions: Maximum number of live sessions, the least recently
+                used idle session is closed beyond it
+            spare_workers: Number of warm workers kept ready for new sessions
+            limits: Default resource limits of one execution
+            memory_limit_mb: Address space limit of a worker, 0 disables it.
+                A backstop for the per-execution RSS limit, which is sampled
+            max_executions: Executions after which a worker is replaced
+            idle_ttl: Seconds after which an unused session is closed
+            preload: Modules imported by workers before they accept code
+            start_timeout: Seconds to wait for a worker to become ready
+            artifact_root: Directory of the per-thread artifact stores, None
+                disables the ``artifacts`` object in sessions
+            artifact_max_mb: Disk quota of one thread's artifacts
+            artifact_ttl: Seconds after which the artifacts of an idle thread
+                are deleted, checked when the pool starts
+        """
+        self.max_sessions = max_sessions
+        self.spare_workers = spare_workers
+        self.limits = limits or ExecutionLimits()
+        self.memory_limit = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+        self.max_executions = max_executions
+        self.idle_ttl = idle_ttl
+        self.preload = DEFAULT_PRELOAD if preload is None else preload
+        self.start_timeout = start_timeout
+        self.artifact_root = artifact_root
+        self.artifact_max_bytes = (
+            artifact_max_mb * 1024 * 1024 if artifact_max_mb else None
+        )
+        # Workers are spawned rather than forked, since forking a process with
+        # running threads (the server's) can deadlock the child.
+        self._context = multiprocessing.get_context("spawn")
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._spares: Deque[_Worker] = deque()
+        self._lock = threading.Lock()
+        self._refilling = False
+        self._closed = False
+        self._executions = 0
+        self._wall_time = 0.0
+        self._cpu_time = 0.0
+        self._peak_rss_bytes = 0
+        self._output_truncated = 0
+        self._limits_exceeded = {"wall_time": 0, "cpu_time": 0, "memory": 0}
+        self._crashes = 0
+        self._recycled = 0
+        self._workers_started = 0
+        self._refill()
+        if artifact_root and artifact_ttl:
+            threading.Thread(
+                target=prune_artifacts, args=(artifact_root, artifact_ttl), daemon=True
+            ).start()
+
+    def _start_worker(self) -> _Worker:
+        with self._lock:
+            self._workers_started += 1
+        return _Worker(self._context, self.preload, self.memory_limit)
+
+    def _refill(self) -> None:
+        with self._lock:
+            if self._refilling or self._closed:
+                return
+            self._refilling = True
+
+        def refill():
+            try:
+                while True:
+                    with self._lock:
+                        if self._closed or len(self._spares) >= self.spare_workers:
+                            return
+                    worker = self._start_worker()
+                    if not worker.wait_ready(self.start_timeout):
+                        logger.error("Python REPL worker failed to start")
+                        worker.kill()
+                        return
+                    with self._lock:
+                        if self._closed:
+                            worker.close()
+                            return
+                        self._spares.append(worker)
+            finally:
+                with self._lock:
+                    self._refilling = False
+
+        threading.Thread(target=refill, name="python-repl-refill", daemon=True).start()
+
+    def _take_worker(self) -> _Worker:
+        with self._lock:
+            worker = self._spares.popleft() if self._spares else None
+        self._refill()
+        return worker or self._start_worker()
+
+    def _session(self, session_id: str) -> _Session:
+        now = time.monotonic()
+        evicted: List[_Session] = []
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = _Session()
+                self._sessions[session_id] = session
+            session.last_used = now
+            self._sessions.move_to_end(session_id)
+            for other_id, other in list(self._sessions.items()):
+                if other is session:
+                    continue
+                expired = now - other.last_used > self.idle_ttl
+                if not expired and len(self._sessions) <= self.max_sessions:
+                    continue
+                if other.lock.acquire(blocking=False):
+                    del self._sessions[other_id]
+                    evicted.append(other)
+        for other in evicted:
+            if other.worker is not None:
+                self._retire(other, kill=False)
+            other.lock.release()
+        return session
+
+    def _retire(self, session: _Session, kill: bool) -> None:
+        worker, session.worker = session.worker, None
+        if kill:
+            worker.kill()
+        else:
+            threading.Thread(target=worker.close, daemon=True).start()
+
+    def run(
+        self,
+        code: str,
+        session_id: str = "default",
+        limits: Optional[ExecutionLimits] = None,
+    ) -> ReplResult:
+        """
+        Execute code in the session's worker.
+
+        Args:
+            code: The Python code to execute
+            session_id: The session, usually the conversation thread id
+            limits: Resource limits of this execution, defaults to the pool's
+
+        Returns:
+            What the code printed, the exception it raised if any, and the
+            resources it used
+        """
+        if self._closed:
+            raise RuntimeError("The Python REPL pool has been shut down")
+        limits = limits or self.limits
+        while True:
+            session = self._session(session_id)
+            session.lock.acquire()
+            with self._lock:
+                current = self._sessions.get(session_id) is session
+            if current:
+                break
+            # The session was evicted while we waited for it.
+            session.lock.release()
+        try:
+            restarted = False
+            if session.worker is None or not session.worker.process.is_alive():
+                restarted = session.used
+                session.worker = self._take_worker()
+            session.used = True
+            worker = session.worker
+            if not worker.wait_ready(self.start_timeout):
+                self._retire(session, kill=True)
+                return ReplResult(
+                    output="", error="RuntimeError('Python worker failed to start')"
+                )
+
+            start = time.monotonic()
+            worker.conn.send(
+                {
+                    "code": code,
+                    "cpu_time": limits.cpu_time,
+                    "max_output_chars": limits.max_output_chars,
+                    "artifact_dir": self._artifact_dir(session_id),
+                    "artifact_max_bytes": self.artifact_max_bytes,
+                }
+            )
+            try:
+                reply, exceeded, peak_rss = self._wait(worker, limits, start)
+            except (EOFError, OSError):
+                reply, exceeded, peak_rss = None, None, None
+            usage = ResourceUsage(
+                wall_time=time.monotonic() - start, peak_rss_bytes=peak_rss
+            )
+
+            if reply is None:
+                exitcode = worker.process.exitcode
+                self._retire(session, kill=True)
+                if exceeded == "wall_time":
+                    error = f"TimeoutError('Execution exceeded {limits.wall_time:g} seconds')"
+                elif exceeded == "memory":
+                    error = f"MemoryError('Execution exceeded {limits.memory_mb} MiB of memory')"
+                else:
+                    error = f"RuntimeError('Python worker exited with code {exitcode}')"
+                    with self._lock:
+                        self._crashes += 1
+                result = ReplResult(
+                    output="",
+                    error=error,
+                    usage=usage,
+                    limit_exceeded=exceeded,
+                    session_restarted=restarted,
+                )
+            else:
+                if reply["rss_bytes"] is not None:
+                    usage.peak_rss_bytes = max(peak_rss or 0, reply["rss_bytes"])
+                usage.cpu_time = reply["cpu_time"]
+                usage.output_chars = reply["output_chars"]
+                usage.output_truncated = reply["output_chars"] > len(reply["output"])
+                error = reply["error"]
+                if error and error.startswith("CpuTimeExceeded"):
+                    exceeded = "cpu_time"
+                elif error and error.startswith("MemoryError"):
+                    exceeded = "memory"
+                result = ReplResult(
+                    output=reply["output"],
+                    error=error,
+                    usage=usage,
+                    limit_exceeded=exceeded,
+                    session_restarted=restarted,
+                    artifacts=reply["artifacts"],
+                )
+                worker.executions += 1
+                if worker.executions >= self.max_executions:
+                    self._retire(session, kill=False)
+                    with self._lock:
+                        self._recycled += 1
+            self._account(session, result)
+            return result
+        finally:
+            session.lock.release()
+
+    @staticmethod
+    def _wait(
+        worker: _Worker, limits: ExecutionLimits, start: float
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str], Optional[int]]:
+        # Wait for the worker's reply while enforcing the wall-clock and RSS
+        # limits. Returns the reply, the limit exceeded and the peak RSS seen.
+        deadline = start + limits.wall_time if limits.wall_time else None
+        max_rss = limits.memory_mb * 1024 * 1024 if limits.memory_mb else None
+        peak_rss = None
+        while True:
+            interval = _POLL_INTERVAL
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None, "wall_time", peak_rss
+                interval = min(interval, remaining)
+            if worker.conn.poll(interval):
+                return worker.conn.recv(), None, peak_rss
+            rss = rss_bytes(worker.process.pid)
+            if rss is not None:
+                peak_rss = max(peak_rss or 0, rss)
+                if max_rss is not None and rss > max_rss:
+                    return None, "memory", peak_rss
+
+    def _account(self, session: _Session, result: ReplResult) -> None:
+        usage = result.usage
+        session.executions += 1
+        session.wall_time += usage.wall_time
+        session.cpu_time += usage.cpu_time or 0.0
+        session.peak_rss_bytes = max(session.peak_rss_bytes, usage.peak_rss_bytes or 0)
+        session.limits_exceeded += result.limit_exceeded is not None
+        with self._lock:
+            self._executions += 1
+            self._wall_time += usage.wall_time
+            self._cpu_time += usage.cpu_time or 0.0
+            self._peak_rss_bytes = max(self._peak_rss_bytes, usage.peak_rss_bytes or 0)
+            self._output_truncated += usage.output_truncated
+            if result.limit_exceeded is not None:
+                self._limits_exceeded[result.limit_exceeded] += 1
+
+    def _artifact_dir(self, session_id: str) -> Optional[str]:
+        if not self.artifact_root:
+            return None
+        return thread_artifact_dir(self.artifact_root, session_id)
+
+    def list_artifacts(self, session_id: str) -> List[str]:
+        """Summaries of the artifacts a session's code has saved."""
+        directory = self._artifact_dir(session_id)
+        return ArtifactStore(directory).list() if directory else []
+
+    def session_usage(self, session_id: str) -> Dict[str, Any]:
+        """Resources used by a session's executions so far."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return {}
+            return {
+                "executions": session.executions,
+                "wall_time": session.wall_time,
+                "cpu_time": session.cpu_time,
+                "peak_rss_bytes": session.peak_rss_bytes,
+                "limits_exceeded": session.limits_exceeded,
+            }
+
+    def close_session(self, session_id: str) -> None:
+        """Close a session and its worker, e.g. when its thread ends."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            with session.lock:
+                if session.worker is not None:
+                    self._retire(session, kill=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "spare_workers": len(self._spares),
+                "workers_started": self._workers_started,
+                "executions": self._executions,
+                "wall_time_total": self._wall_time,
+                "cpu_time_total": self._cpu_time,
+                "peak_rss_bytes": self._peak_rss_bytes,
+                "output_truncated": self._output_truncated,
+                "limits_exceeded": dict(self._limits_exceeded),
+                "crashes": self._crashes,
+                "recycled": self._recycled,
+                "limits": self.limits.to_dict(),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            workers = list(self._spares)
+            workers += [s.worker for s in self._sessions.values() if s.worker]
+            self._spares.clear()
+            self._sessions.clear()
+        for worker in workers:
+            worker.close()
+
+
+_repl_pool: Optional[ReplPool] = None
+_repl_pool_lock = threading.Lock()
+
+
+def get_repl_pool() -> ReplPool:
+    """Return the process-wide REPL pool configured from the environment."""
+    global _repl_pool
+    with _repl_pool_lock:
+        if _repl_pool is None:
+            preload = os.getenv("PYTHON_REPL_PRELOAD")
+            _repl_pool = ReplPool(
+                max_sessions=int(os.getenv("PYTHON_REPL_MAX_SESSIONS", 8)),
+                spare_workers=int(os.getenv("PYTHON_REPL_SPARE_WORKERS", 1)),
+                limits=ExecutionLimits.from_env(),
+                memory_limit_mb=int(os.getenv("PYTHON_REPL_MEMORY_LIMIT_MB", 2048)),
+                max_executions=int(os.getenv("PYTHON_REPL_MAX_EXECUTIONS", 100)),
+                idle_ttl=float(os.getenv("PYTHON_REPL_IDLE_TTL", 1800)),
+                artifact_root=os.path.expanduser(
+                    os.getenv(
+                        "PYTHON_REPL_ARTIFACT_DIR", "~/.cache/deer-flow/artifacts"
+                    )
+                ),
+                artifact_max_mb=int(os.getenv("PYTHON_REPL_ARTIFACT_MAX_MB", 1024)),
+                artifact_ttl=float(
+                    os.getenv("PYTHON_REPL_ARTIFACT_TTL", 7 * 24 * 3600)
+                ),
+                preload=(
+                    [name.strip() for name in preload.split(",") if name.strip()]
+                    if preload is not None
+                    else None
+                ),
+            )
+            register_metrics_provider("python_repl", _repl_pool.stats)
+            atexit.register(_repl_pool.shutdown)
+        return _repl_pool
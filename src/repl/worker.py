@@ -0,0 +1,188 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Entry point of REPL worker processes.
+
+This module is imported in freshly spawned interpreters, so it must stay light:
+only the standard library is imported before the preload modules.
+"""
+
+import contextlib
+import importlib
+import io
+import math
+import os
+import re
+import signal
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional
+
+from .artifacts import ArtifactStore
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class CpuTimeExceeded(BaseException):
+    """
+    Raised in user code when it runs out of CPU time.
+
+    Derived from BaseException so that ``except Exception`` in user code does
+    not swallow it.
+    """
+
+
+class _CappedOutput(io.TextIOBase):
+    # Keeps the first ``limit`` characters written and counts the rest, so a
+    # print loop cannot grow the worker's memory without bound.
+    def __init__(self, limit: Optional[int]):
+        self.limit = limit
+        self.parts: List[str] = []
+        self.kept = 0
+        self.total = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self.total += len(text)
+        if self.limit is None:
+            self.parts.append(text)
+        elif self.kept < self.limit:
+            text = text[: self.limit - self.kept]
+            self.parts.append(text)
+            self.kept += len(text)
+        return len(text)
+
+    def getvalue(self) -> str:
+        return "".join(self.parts)
+
+
+def _cpu_time() -> float:
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def rss_bytes(pid: Optional[int] = None) -> Optional[int]:
+    """Resident set size of a process, or None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _on_cpu_limit(signum, frame):
+    raise CpuTimeExceeded("CPU time limit exceeded")
+
+
+def _set_cpu_limit(seconds: Optional[float]) -> None:
+    if resource is None or not hasattr(signal, "SIGXCPU"):
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = resource.RLIM_INFINITY
+    if seconds:
+        # RLIMIT_CPU counts whole seconds of the process' lifetime CPU time.
+        soft = math.ceil(_cpu_time() + seconds)
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def sanitize_input(code: str) -> str:
+    """Strip the backticks and ``python`` prefix LLMs sometimes wrap code in."""
+    code = re.sub(r"^(\s|`)*(?i:python)?\s*", "", code)
+    code = re.sub(r"(\s|`)*$", "", code)
+    return code
+
+
+def _preload(modules: List[str]) -> List[str]:
+    loaded = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception:
+            # A missing optional library must not keep the worker from starting.
+            pass
+    return loaded
+
+
+def _limit_memory(memory_limit: Optional[int]) -> None:
+    # Applied after the preload so the limit only has to cover user code.
+    if memory_limit and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def execute(
+    code: str,
+    namespace: Dict[str, Any],
+    cpu_time: Optional[float] = None,
+    max_output_chars: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Run code in a namespace, capturing what it prints and what it used."""
+    artifacts = namespace.get("artifacts")
+    if isinstance(artifacts, ArtifactStore):
+        artifacts.saved = []
+    stdout = _CappedOutput(max_output_chars)
+    error = None
+    cpu_before = _cpu_time()
+    try:
+        _set_cpu_limit(cpu_time)
+        with contextlib.redirect_stdout(stdout):
+            exec(sanitize_input(code), namespace)
+    except BaseException as e:
+        error = repr(e)
+    finally:
+        _set_cpu_limit(None)
+    return {
+        "output": stdout.getvalue(),
+        "error": error,
+        "cpu_time": _cpu_time() - cpu_before,
+        "rss_bytes": rss_bytes(),
+        "output_chars": stdout.total,
+        "artifacts": (
+            list(artifacts.saved) if isinstance(artifacts, ArtifactStore) else []
+        ),
+    }
+
+
+def worker_main(
+    conn: Connection, preload: List[str], memory_limit: Optional[int]
+) -> None:
+    """Serve code execution requests on ``conn`` until it is closed."""
+    loaded = _preload(preload)
+    _limit_memory(memory_limit)
+    if hasattr(signal, "SIGXCPU"):
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    conn.send({"ready": True, "preloaded": loaded})
+    namespace: Dict[str, Any] = {"__name__": "__main__"}
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        if request.get("artifact_dir"):
+            store = namespace.get("artifacts")
+            if (
+                not isinstance(store, ArtifactStore)
+                or store.directory != request["artifact_dir"]
+            ):
+                namespace["artifacts"] = ArtifactStore(
+                    request["artifact_dir"], request.get("artifact_max_bytes")
+                )
+        conn.send(
+            execute(
+                request["code"],
+                namespace,
+                request.get("cpu_time"),
+                request.get("max_output_chars"),
+            )
+        )
@@ -0,0 +1,250 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Admission control for the endpoints that start expensive runs.
+
+Every endpoint has a controller that lets a fixed number of runs execute at
+once and makes further runs wait in a bounded FIFO queue. When the queue is
+full, requests are rejected with an estimate of when to retry instead of
+making every run slower. Waiting runs can report their queue position.
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from src.utils.metrics import register_metrics_provider
+
+# Runs per endpoint and queued runs per endpoint, overridable with
+# ADMISSION_<NAME>_CONCURRENCY and ADMISSION_<NAME>_QUEUE.
+DEFAULT_LIMITS = {
+    "chat": (16, 64),
+    "podcast": (4, 16),
+    "ppt": (4, 16),
+    "prose": (8, 32),
+    "tts": (8, 32),
+}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a run is submitted while the wait queue is full."""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"Too many {name} runs are waiting, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class Ticket:
+    """A run's place in an admission controller, from queued to released."""
+
+    def __init__(self, controller: "AdmissionController"):
+        self.controller = controller
+        self.enqueued_at = time.monotonic()
+        self.admitted_at: Optional[float] = None
+        self.released = False
+        self._wake: Optional[asyncio.Future] = None
+
+    @property
+    def admitted(self) -> bool:
+        return self.admitted_at is not None
+
+    @property
+    def position(self) -> Optional[int]:
+        """The number of runs ahead of this one, None once admitted."""
+        return self.controller._position(self)
+
+    def _notify(self) -> None:
+        wake = self._wake
+        if wake is not None and not wake.done():
+            # Releases may come from runs on other threads' event loops.
+            wake.get_loop().call_soon_threadsafe(_resolve, wake)
+
+    async def wait(self) -> AsyncIterator[int]:
+        """Wait until admitted, yielding the queue position whenever it changes."""
+        loop = asyncio.get_running_loop()
+        last = None
+        try:
+            while True:
+                # The wakeup is armed before the state is read, so that a
+                # release on another thread in between still resolves it.
+                self._wake = loop.create_future()
+                if self.admitted:
+                    break
+                position = self.position
+                if position is not None and position != last:
+                    last = position
+                    yield position
+                    continue
+                await self._wake
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self) -> None:
+        """Free the run's slot, or leave the queue if it was still waiting."""
+        if not self.released:
+            self.released = True
+            self.controller._release(self)
+
+
+class AdmissionController:
+    """Bounds the concurrent runs of one endpoint with a bounded wait queue."""
+
+    def __init__(
+        self, name: str, max_concurrent: int, max_queue: int, window: int = 200
+    ):
+        """
+        Initialize the controller.
+
+        Args:
+            name: The endpoint, used in messages and metrics
+            max_concurrent: Runs executing at once, 0 for no limit
+            max_queue: Runs waiting at once before new ones are rejected
+            window: Recent runs the wait and run time statistics cover
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self._running = 0
+        self._waiting: Deque[Ticket] = deque()
+        self._lock = threading.Lock()
+        self._wait_times: Deque[float] = deque(maxlen=window)
+        self._run_times: Deque[float] = deque(maxlen=window)
+        self._counters = {"admitted": 0, "queued": 0, "rejected": 0, "abandoned": 0}
+
+    def _has_slot(self) -> bool:
+        return not self.max_concurrent or self._running < self.max_concurrent
+
+    def _admit(self, ticket: Ticket) -> None:
+        self._running += 1
+        ticket.admitted_at = time.monotonic()
+        self._wait_times.append(ticket.admitted_at - ticket.enqueued_at)
+        self._counters["admitted"] += 1
+
+    def enqueue(self, reject: bool = True) -> Ticket:
+        """
+        Admit a run now or queue it.
+
+        Args:
+            reject: Whether a full wait queue rejects the run. Runs that are
+                already bounded elsewhere, like background jobs, pass False
+                to wait their turn regardless.
+
+        Raises:
+            AdmissionRejected: If the wait queue is full
+        """
+        ticket = Ticket(self)
+        with self._lock:
+            if self._has_slot() and not self._waiting:
+                self._admit(ticket)
+            elif reject and len(self._waiting) >= self.max_queue:
+                self._counters["rejected"] += 1
+                raise AdmissionRejected(self.name, self._retry_after())
+            else:
+                self._waiting.append(ticket)
+                self._counters["queued"] += 1
+        return ticket
+
+    async def acquire(self) -> Ticket:
+        """Wait for a slot, raising AdmissionRejected if the queue is full."""
+        ticket = self.enqueue()
+        async for _ in ticket.wait():
+            pass
+        return ticket
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[Ticket]:
+        ticket = await self.acquire()
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def _position(self, ticket: Ticket) -> Optional[int]:
+        with self._lock:
+            try:
+                return self._waiting.index(ticket)
+            except ValueError:
+                return None
+
+    def _release(self, ticket: Ticket) -> None:
+        with self._lock:
+            if ticket.admitted:
+                self._running -= 1
+                self._run_times.append(time.monotonic() - ticket.admitted_at)
+            else:
+                self._waiting.remove(ticket)
+                self._counters["abandoned"] += 1
+            admitted = []
+            while self._waiting and self._has_slot():
+                waiting = self._waiting.popleft()
+                self._admit(waiting)
+                admitted.append(waiting)
+            # Everyone behind a departed run moved up the queue.
+            notify = admitted + list(self._waiting)
+        for waiting in notify:
+            waiting._notify()
+
+    def _retry_after(self) -> int:
+        """Seconds until the queue has likely drained enough to accept a run."""
+        if not self._run_times:
+            return 5
+        average = sum(self._run_times) / len(self._run_times)
+        slots = self.max_concurrent or 1
+        return max(1, min(600, math.ceil(average * (len(self._waiting) + 1) / slots)))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._wait_times)
+            runs = list(self._run_times)
+            stats = {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queue_length": len(self._waiting),
+                **self._counters,
+            }
+        stats["wait_time"] = {
+            "avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "p95": round(waits[int(len(waits) * 0.95)], 3) if waits else 0.0,
+            "max": round(waits[-1], 3) if waits else 0.0,
+        }
+        stats["avg_run_time"] = round(sum(runs) / len(runs), 3) if runs else 0.0
+        return stats
+
+
+_controllers: Dict[str, AdmissionController] = {}
+_controllers_lock = threading.Lock()
+
+
+def get_admission_controller(name: str) -> AdmissionController:
+    """Return the process-wide controller of an endpoint configured from the environment."""
+    with _controllers_lock:
+        if name not in _controllers:
+            concurrency, queue = DEFAULT_LIMITS.get(name, (8, 32))
+            prefix = f"ADMISSION_{name.upper()}"
+            _controllers[name] = AdmissionController(
+                name,
+                max_concurrent=int(os.getenv(f"{prefix}_CONCURRENCY", concurrency)),
+                max_queue=int(os.getenv(f"{prefix}_QUEUE", queue)),
+            )
+            if len(_controllers) == 1:
+                register_metrics_provider("admission", _admission_stats)
+        return _controllers[name]
+
+
+def _admission_stats() -> Dict[str, Any]:
+    with _controllers_lock:
+        controllers = dict(_controllers)
+    return {name: controller.stats() for name, controller in controllers.items()}
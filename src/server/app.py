@@ -1,23 +1,24 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
-import base64
-import json
+import asyncio
 import logging
 import os
-from typing import List, cast, Optional, Dict, Any
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, BinaryIO, Iterator, List, cast, Optional, Dict, Any
 from uuid import uuid4
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response, StreamingResponse
 from langchain_core.messages import AIMessageChunk, ToolMessage, BaseMessage
 from langgraph.types import Command
 
-from src.graph.builder import build_graph_with_memory
-from src.podcast.graph.builder import build_graph as build_podcast_graph
-from src.ppt.graph.builder import build_graph as build_ppt_graph
-from src.prose.graph.builder import build_graph as build_prose_graph
+from src.graph.registry import get_graph, get_graph_registry, warmup_graph_names
+from src.podcast.graph.tts_node import audio_settings, create_tts_client
+from src.podcast.pipeline import stream_podcast
 from src.server.chat_request import (
     ChatMessage,
     ChatRequest,
@@ -28,7 +29,21 @@ from src.server.chat_request import (
 )
 from src.server.mcp_request import MCPServerMetadataRequest, MCPServerMetadataResponse
 from src.server.mcp_utils import load_mcp_tools
+from src.server.admission import (
+    AdmissionRejected,
+    Ticket,
+    get_admission_controller,
+)
+from src.server.event_log import RunInProgress, get_event_logs, parse_event_id
+from src.server.generation_cache import generation_key, get_generation_cache
+from src.server.sse import (
+    coalesce_max_bytes,
+    coalesce_message_chunks,
+    coalesce_window,
+)
 from src.tools import VolcengineTTS
+from src.tools.tts_cache import get_tts_cache
+from src.tools.tts_chunks import split_text, stream_speech
 from src.graph_visualization.models import KnowledgeGraphResponse
 from src.graph_visualization.serializer import serialize_langgraph_state_for_thread
 from src.server.graph_chatbot_models import GraphChatbotRequest, GraphChatbotResponse
@@ -36,13 +51,32 @@ from src.graph_chatbot.chatbot import answer_graph_question
 from src.server.chat_request import CoordinatorFeedbackRequest
 from src.server.expert_feedback_models import ExpertFeedbackResponse
 from src.expert_feedback.generator import generate_expert_feedback
+from src.server.jobs import Job, JobManager, JobQueueFull, create_job_queue
+from src.utils.metrics import collect_metrics, register_metrics_provider
 
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Picks up jobs a previous run of a persistent queue left queued, or left
+    # running when it stopped, once their lease expires.
+    job_manager.start()
+    # Compiles graphs and loads prompts and LLM clients before the first request
+    # needs them, without holding up requests that arrive in the meantime.
+    warmup = asyncio.create_task(
+        asyncio.to_thread(get_graph_registry().warmup, warmup_graph_names())
+    )
+    yield
+    warmup.cancel()
+    await job_manager.shutdown()
+
+
 app = FastAPI(
     title="DeerFlow API",
     description="API for Deer",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -54,33 +88,105 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-graph = build_graph_with_memory()
+graph = get_graph("research")
 
 
 @app.post("/api/chat/stream")
-async def chat_stream(request: ChatRequest):
+async def chat_stream(
+    request: ChatRequest, last_event_id: Optional[str] = Header(None)
+):
     thread_id = request.thread_id
+    event_logs = get_event_logs()
+    if last_event_id is not None:
+        # A reconnect: replay what the client missed and follow the run that
+        # is already going instead of starting the graph again.
+        after = parse_event_id(last_event_id)
+        log = event_logs.resume(thread_id, after) if after is not None else None
+        if log is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No resumable stream for thread {thread_id} after event {last_event_id}",
+            )
+        return StreamingResponse(log.follow(after), media_type="text/event-stream")
+
     if thread_id == "__default__":
         thread_id = str(uuid4())
-    return StreamingResponse(
-        _astream_workflow_generator(
-            request.model_dump()["messages"],
+    ticket = _admit("chat")
+    try:
+        log = event_logs.start(
             thread_id,
-            request.max_plan_iterations,
-            request.max_step_num,
-            request.max_search_results,
-            request.auto_accepted_plan,
-            request.interrupt_feedback,
-            request.mcp_settings,
-            request.enable_background_investigation,
-            request.llm_configurations,
-            request.selected_persona,
-        ),
-        media_type="text/event-stream",
+            _admitted_stream(
+                ticket, thread_id, _chat_request_stream(request, thread_id)
+            ),
+            cancel_when_abandoned=True,
+        )
+    except RunInProgress as e:
+        ticket.release()
+        raise HTTPException(status_code=409, detail=str(e))
+    # The stream only releases its slot if the run got to start.
+    log.task.add_done_callback(lambda _: ticket.release())
+    return StreamingResponse(log.follow(), media_type="text/event-stream")
+
+
+@app.delete("/api/chat/stream/{thread_id}")
+async def cancel_chat_stream(thread_id: str):
+    # Closing the stream does not stop the run, so that it can be resumed.
+    if not await get_event_logs().cancel(thread_id):
+        raise HTTPException(
+            status_code=404, detail=f"Thread {thread_id} has no run in progress"
+        )
+    return {"thread_id": thread_id, "cancelled": True}
+
+
+def _admit(name: str) -> Ticket:
+    try:
+        return get_admission_controller(name).enqueue()
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+async def _admitted_stream(ticket: Ticket, thread_id: str, events):
+    # Tell a waiting client where it is in the queue until the run may start.
+    async for position in ticket.wait():
+        yield "queue_position", {"thread_id": thread_id, "position": position}
+    try:
+        async for event in events:
+            yield event
+    finally:
+        ticket.release()
+
+
+def _chat_request_stream(request: ChatRequest, thread_id: str):
+    return _astream_workflow_stream(
+        request.model_dump()["messages"],
+        thread_id,
+        request.max_plan_iterations,
+        request.max_step_num,
+        request.max_search_results,
+        request.auto_accepted_plan,
+        request.interrupt_feedback,
+        request.mcp_settings,
+        request.enable_background_investigation,
+        request.llm_configurations,
+        request.selected_persona,
+        request.python_repl_limits,
     )
 
 
-async def _astream_workflow_generator(
+def _astream_workflow_stream(*args, **kwargs):
+    events = _astream_workflow_events(*args, **kwargs)
+    window = coalesce_window()
+    if window > 0:
+        # Fewer, larger message_chunk events cost less to serialize and send.
+        events = coalesce_message_chunks(events, window, coalesce_max_bytes())
+    return events
+
+
+async def _astream_workflow_events(
     messages: List[ChatMessage],
     thread_id: str,
     max_plan_iterations: int,
@@ -92,6 +198,7 @@ async def _astream_workflow_generator(
     enable_background_investigation: bool,
     llm_configurations: Optional[Dict[str, Dict[str, Any]]],
     selected_persona: Optional[str],
+    python_repl_limits: Optional[Dict[str, float]] = None,
 ):
     input_: Any = {
         "messages": messages,
@@ -119,6 +226,7 @@ async def _astream_workflow_generator(
             "mcp_settings": mcp_settings,
             "runtime_llm_configs": llm_configurations,
             "selected_persona": selected_persona,
+            "python_repl_limits": python_repl_limits,
         }
         # Add other top-level config keys like "recursion_limit" here if needed
     }
@@ -131,7 +239,7 @@ async def _astream_workflow_generator(
     ):
         if isinstance(event_data, dict):
             if "__interrupt__" in event_data:
-                yield _make_event(
+                yield (
                     "interrupt",
                     {
                         "thread_id": thread_id,
@@ -163,7 +271,7 @@ async def _astream_workflow_generator(
         if isinstance(message_chunk, ToolMessage):
             # Tool Message - Return the result of the tool call
             event_stream_message["tool_call_id"] = message_chunk.tool_call_id
-            yield _make_event("tool_call_result", event_stream_message)
+            yield "tool_call_result", event_stream_message
         elif isinstance(message_chunk, AIMessageChunk):
             # AI Message - Raw message tokens
             if message_chunk.tool_calls:
@@ -172,22 +280,16 @@ async def _astream_workflow_generator(
                 event_stream_message["tool_call_chunks"] = (
                     message_chunk.tool_call_chunks
                 )
-                yield _make_event("tool_calls", event_stream_message)
+                yield "tool_calls", event_stream_message
             elif message_chunk.tool_call_chunks:
                 # AI Message - Tool Call Chunks
                 event_stream_message["tool_call_chunks"] = (
                     message_chunk.tool_call_chunks
                 )
-                yield _make_event("tool_call_chunks", event_stream_message)
+                yield "tool_call_chunks", event_stream_message
             else:
                 # AI Message - Raw message tokens
-                yield _make_event("message_chunk", event_stream_message)
-
-
-def _make_event(event_type: str, data: dict[str, any]):
-    if data.get("content") == "":
-        data.pop("content")
-    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+                yield "message_chunk", event_stream_message
 
 
 @app.post("/api/tts")
@@ -207,73 +309,257 @@ async def text_to_speech(request: TTSRequest):
         cluster = os.getenv("VOLCENGINE_TTS_CLUSTER", "volcano_tts")
         voice_type = os.getenv("VOLCENGINE_TTS_VOICE_TYPE", "BV700_V2_streaming")
 
+        # Every part of a long text is a paid request to the API.
+        max_total_bytes = int(os.getenv("TTS_MAX_TOTAL_BYTES", 16384))
+        if len(request.text.encode("utf-8")) > max_total_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"text is longer than {max_total_bytes} bytes",
+            )
+        # Long texts are split at sentences into requests the API accepts.
+        chunks = split_text(request.text, int(os.getenv("TTS_MAX_TEXT_BYTES", 1024)))
+        if not chunks:
+            raise HTTPException(status_code=400, detail="text is empty")
+        if len(chunks) > 1 and request.text_type == "ssml":
+            raise HTTPException(
+                status_code=400, detail="SSML text is too long to synthesize"
+            )
+        if len(chunks) > 1 and request.encoding == "wav":
+            raise HTTPException(
+                status_code=400,
+                detail="Long text can only be synthesized as mp3, ogg_opus or pcm",
+            )
+
         tts_client = VolcengineTTS(
             appid=app_id,
             access_token=access_token,
             cluster=cluster,
             voice_type=voice_type,
-        )
-        # Call the TTS API
-        result = tts_client.text_to_speech(
-            text=request.text[:1024],
-            encoding=request.encoding,
-            speed_ratio=request.speed_ratio,
-            volume_ratio=request.volume_ratio,
-            pitch_ratio=request.pitch_ratio,
-            text_type=request.text_type,
-            with_frontend=request.with_frontend,
-            frontend_type=request.frontend_type,
-        )
-
-        if not result["success"]:
-            raise HTTPException(status_code=500, detail=str(result["error"]))
-
-        # Decode the base64 audio data
-        audio_data = base64.b64decode(result["audio_data"])
+            cache=get_tts_cache(),
+            api_url=os.getenv("VOLCENGINE_TTS_API_URL") or None,
+        )
+        ticket = _admit("tts")
+        audio = tempfile.SpooledTemporaryFile(1 << 20)
+        try:
+            async for _ in ticket.wait():
+                pass
+            # Call the TTS API, for all chunks at once. The whole audio is ready
+            # before the response starts, so that a part that fails is an
+            # error status rather than a file cut short.
+            async for chunk in stream_speech(
+                tts_client,
+                chunks,
+                concurrency=int(os.getenv("TTS_CONCURRENCY", 4)),
+                retries=int(os.getenv("TTS_RETRIES", 2)),
+                encoding=request.encoding,
+                speed_ratio=request.speed_ratio,
+                volume_ratio=request.volume_ratio,
+                pitch_ratio=request.pitch_ratio,
+                text_type=request.text_type,
+                with_frontend=request.with_frontend,
+                frontend_type=request.frontend_type,
+            ):
+                audio.write(chunk)
+        except BaseException:
+            audio.close()
+            raise
+        finally:
+            ticket.release()
+        size = audio.tell()
+        audio.seek(0)
 
-        # Return the audio file
-        return Response(
-            content=audio_data,
+        return StreamingResponse(
+            _iter_file(audio),
             media_type=f"audio/{request.encoding}",
             headers={
                 "Content-Disposition": (
                     f"attachment; filename=tts_output.{request.encoding}"
-                )
+                ),
+                "Content-Length": str(size),
             },
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(f"Error in TTS endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# The podcast and ppt workflows block on LLM calls, TTS requests and the marp
+# subprocess, so they run on their own threads instead of the event loop.
+_workflow_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("WORKFLOW_MAX_WORKERS", 8)),
+    thread_name_prefix="workflow",
+)
+
+
+async def _run_workflow(ticket: Ticket, function, *args):
+    """Run a blocking workflow on the workflow executor once admitted."""
+    try:
+        async for _ in ticket.wait():
+            pass
+        future = asyncio.get_running_loop().run_in_executor(
+            _workflow_executor, function, *args
+        )
+    except BaseException:
+        ticket.release()
+        raise
+    # A run can't be stopped once started, so when the request is cancelled it
+    # holds on to its slot until it has finished.
+    future.add_done_callback(lambda _: ticket.release())
+    return await asyncio.shield(future)
+
+
+# Generations running per cache key, so that a repeated click on "generate" waits
+# for the output of the first one instead of generating it again.
+_generations: Dict[str, asyncio.Future] = {}
+
+
+async def _generate_cached(name: str, content: str, generate, **params) -> BinaryIO:
+    """Run a generation workflow, or serve its output from the generation cache."""
+    cache = get_generation_cache()
+    key = None
+    if cache is not None:
+        try:
+            key = await asyncio.to_thread(generation_key, name, content, **params)
+        except Exception as e:
+            logger.warning(f"Not caching this {name}, its key failed: {e}")
+    done = asyncio.get_running_loop().create_future()
+    try:
+        if key is not None:
+            while (running := _generations.get(key)) is not None:
+                await asyncio.shield(running)
+            _generations[key] = done
+            cached = await asyncio.to_thread(cache.open, key)
+            if cached is not None:
+                logger.info(f"Serving a cached {name}")
+                return cached
+        ticket = _admit(name)
+        output = await _run_workflow(ticket, generate, content)
+        if key is not None:
+            try:
+                await asyncio.to_thread(cache.put, key, name, output)
+            except Exception as e:
+                logger.warning(f"Failed to cache a generated {name}: {e}")
+                output.seek(0)
+        return output
+    finally:
+        if key is not None and _generations.get(key) is done:
+            del _generations[key]
+        done.set_result(None)
+
+
+def _generate_podcast(content: str) -> BinaryIO:
+    return get_graph("podcast").invoke({"input": content})["output"]
+
+
+def _iter_file(file: BinaryIO, chunk_size: int = 1 << 16) -> Iterator[bytes]:
+    with file:
+        while chunk := file.read(chunk_size):
+            yield chunk
+
+
+def _generate_ppt(content: str) -> BinaryIO:
+    return get_graph("ppt").invoke({"input": content})["output"]
+
+
 @app.post("/api/podcast/generate")
 async def generate_podcast(request: GeneratePodcastRequest):
     try:
-        report_content = request.content
-        print(report_content)
-        workflow = build_podcast_graph()
-        final_state = workflow.invoke({"input": report_content})
-        audio_bytes = final_state["output"]
-        return Response(content=audio_bytes, media_type="audio/mp3")
+        logger.info(f"Generating podcast for {len(request.content)} characters")
+        audio = await _generate_cached(
+            "podcast", request.content, _generate_podcast, **audio_settings()
+        )
+        # Streamed from the spooled file rather than read into memory at once.
+        size = audio.seek(0, os.SEEK_END)
+        audio.seek(0)
+        return StreamingResponse(
+            _iter_file(audio),
+            media_type="audio/mp3",
+            headers={"Content-Length": str(size)},
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(f"Error occurred during podcast generation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/podcast/stream")
+async def stream_podcast_audio(request: GeneratePodcastRequest):
+    """Stream the podcast audio in order while the rest is still generated."""
+    try:
+        # Fails before the response starts rather than in the middle of it.
+        tts_client = create_tts_client()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    ticket = _admit("podcast")
+    logger.info(f"Streaming podcast for {len(request.content)} characters")
+    audio = _stream_in_workflow_executor(
+        ticket, stream_podcast(request.content, tts_client)
+    )
+    # The first line is ready before the response starts, so that a podcast
+    # that can't be generated is an error status rather than an empty file.
+    # Failures after it abort the response instead of cutting the audio short.
+    try:
+        first = await anext(audio)
+    except StopAsyncIteration:
+        raise HTTPException(status_code=500, detail="The podcast script is empty")
+    except Exception as e:
+        logger.exception(f"Error occurred during podcast streaming: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(_prepend(first, audio), media_type="audio/mpeg")
+
+
+async def _prepend(first: bytes, rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    try:
+        yield first
+        async for item in rest:
+            yield item
+    finally:
+        await rest.aclose()
+
+
+async def _stream_in_workflow_executor(ticket: Ticket, items: Iterator):
+    """Stream a blocking generator, pulling every item on the workflow executor."""
+    loop = asyncio.get_running_loop()
+    future = None
+
+    def close():
+        items.close()
+        ticket.release()
+
+    try:
+        async for _ in ticket.wait():
+            pass
+        while True:
+            future = loop.run_in_executor(_workflow_executor, next, items, None)
+            item = await asyncio.shield(future)
+            if item is None:
+                break
+            yield item
+    finally:
+        if future is not None and not future.done():
+            # The generator is busy on a thread, so close it once it returns.
+            future.add_done_callback(lambda _: _workflow_executor.submit(close))
+        else:
+            close()
+
+
 @app.post("/api/ppt/generate")
 async def generate_ppt(request: GeneratePPTRequest):
     try:
-        report_content = request.content
-        print(report_content)
-        workflow = build_ppt_graph()
-        final_state = workflow.invoke({"input": report_content})
-        generated_file_path = final_state["generated_file_path"]
-        with open(generated_file_path, "rb") as f:
-            ppt_bytes = f.read()
-        return Response(
-            content=ppt_bytes,
+        logger.info(f"Generating ppt for {len(request.content)} characters")
+        deck = await _generate_cached("ppt", request.content, _generate_ppt)
+        size = deck.seek(0, os.SEEK_END)
+        deck.seek(0)
+        return StreamingResponse(
+            _iter_file(deck),
             media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
+            headers={"Content-Length": str(size)},
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(f"Error occurred during ppt generation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -281,9 +567,10 @@ async def generate_ppt(request: GeneratePPTRequest):
 
 @app.post("/api/prose/generate")
 async def generate_prose(request: GenerateProseRequest):
+    ticket = _admit("prose")
     try:
         logger.info(f"Generating prose for prompt: {request.prompt}")
-        workflow = build_prose_graph()
+        workflow = get_graph("prose")
         events = workflow.astream(
             {
                 "content": request.prompt,
@@ -294,14 +581,25 @@ async def generate_prose(request: GenerateProseRequest):
             subgraphs=True,
         )
         return StreamingResponse(
-            (f"data: {event[0].content}\n\n" async for _, event in events),
-            media_type="text/event-stream",
+            _admitted_prose_stream(ticket, events), media_type="text/event-stream"
         )
     except Exception as e:
+        ticket.release()
         logger.exception(f"Error occurred during prose generation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _admitted_prose_stream(ticket: Ticket, events):
+    async for _ in ticket.wait():
+        # Comments keep the connection open without adding to the prose.
+        yield ": queued\n\n"
+    try:
+        async for _, event in events:
+            yield f"data: {event[0].content}\n\n"
+    finally:
+        ticket.release()
+
+
 @app.post("/api/mcp/server/metadata", response_model=MCPServerMetadataResponse)
 async def mcp_server_metadata(request: MCPServerMetadataRequest):
     """Get information about an MCP server."""
@@ -452,328 +750,105 @@ async def get_expert_feedback_for_thread(thread_id: str):
         )
 
 
-async def _astream_workflow_generator(
-    messages: List[ChatMessage],
-    thread_id: str,
-    max_plan_iterations: int,
-    max_step_num: int,
-    max_search_results: int,
-    auto_accepted_plan: bool,
-    interrupt_feedback: Optional[str],
-    mcp_settings: Optional[dict],
-    enable_background_investigation: bool,
-    llm_configurations: Optional[Dict[str, Dict[str, Any]]],
-    selected_persona: Optional[str],
-):
-    input_: Any = {
-        "messages": messages,
-        "plan_iterations": 0,
-        "final_report": "",
-        "current_plan": None,
-        "observations": [],
-        "auto_accepted_plan": auto_accepted_plan,
-        "enable_background_investigation": enable_background_investigation,
+async def _finalize_job(job: Job) -> Dict[str, Any]:
+    state = await graph.aget_state({"configurable": {"thread_id": job.thread_id}})
+    return {
+        "final_report": state.values.get("final_report") or None,
+        # Pending nodes mean the run stopped at an interrupt, e.g. plan review.
+        "interrupt": bool(state.next),
     }
-    if not auto_accepted_plan and interrupt_feedback:
-        resume_msg = f"[{interrupt_feedback}]"
-        # add the last message to the resume message
-        if messages:
-            resume_msg += f" {messages[-1]['content']}"
-        input_ = Command(resume=resume_msg)
-
-    # Construct the config dictionary with a 'configurable' key
-    graph_config = {
-        "configurable": {
-            "thread_id": thread_id,
-            "max_plan_iterations": max_plan_iterations,
-            "max_step_num": max_step_num,
-            "max_search_results": max_search_results,
-            "mcp_settings": mcp_settings,
-            "runtime_llm_configs": llm_configurations,
-            "selected_persona": selected_persona,
-        }
-        # Add other top-level config keys like "recursion_limit" here if needed
-    }
-
-    async for agent, _, event_data in graph.astream(
-        input_,
-        config=graph_config,
-        stream_mode=["messages", "updates"],
-        subgraphs=True,
-    ):
-        if isinstance(event_data, dict):
-            if "__interrupt__" in event_data:
-                yield _make_event(
-                    "interrupt",
-                    {
-                        "thread_id": thread_id,
-                        "id": event_data["__interrupt__"][0].ns[0],
-                        "role": "assistant",
-                        "content": event_data["__interrupt__"][0].value,
-                        "finish_reason": "interrupt",
-                        "options": [
-                            {"text": "Edit plan", "value": "edit_plan"},
-                            {"text": "Start research", "value": "accepted"},
-                        ],
-                    },
-                )
-            continue
-        message_chunk, message_metadata = cast(
-            tuple[BaseMessage, dict[str, any]], event_data
-        )
-        event_stream_message: dict[str, any] = {
-            "thread_id": thread_id,
-            "agent": agent[0].split(":")[0],
-            "id": message_chunk.id,
-            "role": "assistant",
-            "content": message_chunk.content,
-        }
-        if message_chunk.response_metadata.get("finish_reason"):
-            event_stream_message["finish_reason"] = message_chunk.response_metadata.get(
-                "finish_reason"
-            )
-        if isinstance(message_chunk, ToolMessage):
-            # Tool Message - Return the result of the tool call
-            event_stream_message["tool_call_id"] = message_chunk.tool_call_id
-            yield _make_event("tool_call_result", event_stream_message)
-        elif isinstance(message_chunk, AIMessageChunk):
-            # AI Message - Raw message tokens
-            if message_chunk.tool_calls:
-                # AI Message - Tool Call
-                event_stream_message["tool_calls"] = message_chunk.tool_calls
-                event_stream_message["tool_call_chunks"] = (
-                    message_chunk.tool_call_chunks
-                )
-                yield _make_event("tool_calls", event_stream_message)
-            elif message_chunk.tool_call_chunks:
-                # AI Message - Tool Call Chunks
-                event_stream_message["tool_call_chunks"] = (
-                    message_chunk.tool_call_chunks
-                )
-                yield _make_event("tool_call_chunks", event_stream_message)
-            else:
-                # AI Message - Raw message tokens
-                yield _make_event("message_chunk", event_stream_message)
 
 
-def _make_event(event_type: str, data: dict[str, any]):
-    if data.get("content") == "":
-        data.pop("content")
-    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+async def _run_job(job: Job):
+    # Jobs are bounded by their own queue, so they wait for a chat slot
+    # instead of failing when interactive runs fill the wait queue.
+    ticket = get_admission_controller("chat").enqueue(reject=False)
+    events = _chat_request_stream(ChatRequest(**job.request), job.thread_id)
+    async for event in _admitted_stream(ticket, job.thread_id, events):
+        yield event
 
 
-@app.post("/api/tts")
-async def text_to_speech(request: TTSRequest):
-    """Convert text to speech using volcengine TTS API."""
-    try:
-        app_id = os.getenv("VOLCENGINE_TTS_APPID", "")
-        if not app_id:
-            raise HTTPException(
-                status_code=400, detail="VOLCENGINE_TTS_APPID is not set"
-            )
-        access_token = os.getenv("VOLCENGINE_TTS_ACCESS_TOKEN", "")
-        if not access_token:
-            raise HTTPException(
-                status_code=400, detail="VOLCENGINE_TTS_ACCESS_TOKEN is not set"
-            )
-        cluster = os.getenv("VOLCENGINE_TTS_CLUSTER", "volcano_tts")
-        voice_type = os.getenv("VOLCENGINE_TTS_VOICE_TYPE", "BV700_V2_streaming")
-
-        tts_client = VolcengineTTS(
-            appid=app_id,
-            access_token=access_token,
-            cluster=cluster,
-            voice_type=voice_type,
-        )
-        # Call the TTS API
-        result = tts_client.text_to_speech(
-            text=request.text[:1024],
-            encoding=request.encoding,
-            speed_ratio=request.speed_ratio,
-            volume_ratio=request.volume_ratio,
-            pitch_ratio=request.pitch_ratio,
-            text_type=request.text_type,
-            with_frontend=request.with_frontend,
-            frontend_type=request.frontend_type,
-        )
-
-        if not result["success"]:
-            raise HTTPException(status_code=500, detail=str(result["error"]))
-
-        # Decode the base64 audio data
-        audio_data = base64.b64decode(result["audio_data"])
-
-        # Return the audio file
-        return Response(
-            content=audio_data,
-            media_type=f"audio/{request.encoding}",
-            headers={
-                "Content-Disposition": (
-                    f"attachment; filename=tts_output.{request.encoding}"
-                )
-            },
-        )
-    except Exception as e:
-        logger.exception(f"Error in TTS endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.post("/api/podcast/generate")
-async def generate_podcast(request: GeneratePodcastRequest):
-    try:
-        report_content = request.content
-        print(report_content)
-        workflow = build_podcast_graph()
-        final_state = workflow.invoke({"input": report_content})
-        audio_bytes = final_state["output"]
-        return Response(content=audio_bytes, media_type="audio/mp3")
-    except Exception as e:
-        logger.exception(f"Error occurred during podcast generation: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+job_manager = JobManager(
+    create_job_queue(
+        os.getenv("JOBS_QUEUE", "memory"),
+        path=os.path.expanduser(
+            os.getenv("JOBS_DB_PATH", "~/.cache/deer-flow/jobs.sqlite3")
+        ),
+        max_queued=int(os.getenv("JOBS_MAX_QUEUED", 100)),
+    ),
+    run=_run_job,
+    finalize=_finalize_job,
+    event_logs=get_event_logs,
+    max_workers=int(os.getenv("JOBS_MAX_WORKERS", 4)),
+    lease=float(os.getenv("JOBS_LEASE", 60)),
+)
+register_metrics_provider("jobs", job_manager.stats)
 
 
-@app.post("/api/ppt/generate")
-async def generate_ppt(request: GeneratePPTRequest):
-    try:
-        report_content = request.content
-        print(report_content)
-        workflow = build_ppt_graph()
-        final_state = workflow.invoke({"input": report_content})
-        generated_file_path = final_state["generated_file_path"]
-        with open(generated_file_path, "rb") as f:
-            ppt_bytes = f.read()
-        return Response(
-            content=ppt_bytes,
-            media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-        )
-    except Exception as e:
-        logger.exception(f"Error occurred during ppt generation: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+async def _get_job(job_id: str) -> Job:
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
 
 
-@app.post("/api/prose/generate")
-async def generate_prose(request: GenerateProseRequest):
+@app.post("/api/jobs", status_code=202)
+async def submit_job(request: ChatRequest):
+    """Queue a research run that continues without an open connection."""
+    thread_id = request.thread_id
+    if thread_id == "__default__":
+        thread_id = str(uuid4())
     try:
-        logger.info(f"Generating prose for prompt: {request.prompt}")
-        workflow = build_prose_graph()
-        events = workflow.astream(
-            {
-                "content": request.prompt,
-                "option": request.option,
-                "command": request.command,
-            },
-            stream_mode="messages",
-            subgraphs=True,
-        )
-        return StreamingResponse(
-            (f"data: {event[0].content}\n\n" async for _, event in events),
-            media_type="text/event-stream",
-        )
-    except Exception as e:
-        logger.exception(f"Error occurred during prose generation: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        job = await job_manager.submit(thread_id, request.model_dump())
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return job.to_dict()
 
 
-@app.post("/api/mcp/server/metadata", response_model=MCPServerMetadataResponse)
-async def mcp_server_metadata(request: MCPServerMetadataRequest):
-    """Get information about an MCP server."""
-    try:
-        # Set default timeout with a longer value for this endpoint
-        timeout = 300  # Default to 300 seconds for this endpoint
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await _get_job(job_id)
+    return {**job.to_dict(), "queue_position": await job_manager.position(job_id)}
 
-        # Use custom timeout from request if provided
-        if request.timeout_seconds is not None:
-            timeout = request.timeout_seconds
 
-        # Load tools from the MCP server using the utility function
-        tools = await load_mcp_tools(
-            server_type=request.transport,
-            command=request.command,
-            args=request.args,
-            url=request.url,
-            env=request.env,
-            timeout_seconds=timeout,
-        )
+@app.get("/api/jobs/{job_id}/events")
+async def get_job_events(job_id: str, last_event_id: Optional[str] = Header(None)):
+    """Stream the events of a job, resuming after Last-Event-ID if given."""
+    job = await _get_job(job_id)
+    after = parse_event_id(last_event_id) if last_event_id is not None else None
+    return StreamingResponse(
+        job_manager.follow(job, after), media_type="text/event-stream"
+    )
 
-        # Create the response with tools
-        response = MCPServerMetadataResponse(
-            transport=request.transport,
-            command=request.command,
-            args=request.args,
-            url=request.url,
-            env=request.env,
-            tools=tools,
-        )
 
-        return response
-    except Exception as e:
-        if not isinstance(e, HTTPException):
-            logger.exception(f"Error in MCP server metadata endpoint: {str(e)}")
-            raise HTTPException(status_code=500, detail=str(e))
-        raise
+@app.get("/api/jobs/{job_id}/report")
+async def get_job_report(job_id: str):
+    job = await _get_job(job_id)
+    if not job.finished:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status}")
+    return {
+        "job_id": job.job_id,
+        "thread_id": job.thread_id,
+        "status": job.status,
+        "final_report": job.final_report,
+        "error": job.error,
+    }
 
 
-@app.get("/api/graph_state/{thread_id}", response_model=KnowledgeGraphResponse)
-async def get_graph_state_snapshot(thread_id: str):
-    """
-    Retrieves a snapshot of the graph state for a given thread_id,
-    serialized for visualization.
-    """
-    if not thread_id:
-        raise HTTPException(status_code=400, detail="thread_id is required")
-
-    try:
-        # The 'graph' instance is already initialized in this file
-        graph_data = serialize_langgraph_state_for_thread(graph, thread_id)
-        return graph_data
-    except HTTPException as http_exc:  # Re-raise HTTPExceptions directly
-        raise http_exc
-    except Exception as e:
-        logger.error(
-            f"Error generating graph state for thread {thread_id}: {str(e)}",
-            exc_info=True,
-        )
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = await _get_job(job_id)
+    if job.finished or not await job_manager.cancel(job_id):
         raise HTTPException(
-            status_code=500, detail=f"Error generating graph state: {str(e)}"
+            status_code=409,
+            detail=f"Job {job_id} can't be cancelled while {job.status}",
         )
+    return {"job_id": job_id, "cancelled": True}
 
 
-@app.post("/api/graph_chatbot/query", response_model=GraphChatbotResponse)
-async def query_graph_chatbot(request: GraphChatbotRequest):
-    """
-    Receives a user's question about the graph state for a specific thread_id
-    and returns an LLM-generated answer based on the graph's current state.
-    """
-    if not request.thread_id:
-        raise HTTPException(status_code=400, detail="thread_id is required")
-    if not request.user_question:
-        raise HTTPException(status_code=400, detail="user_question is required")
-
-    try:
-        # The 'graph' instance is globally available in this file
-        answer = await answer_graph_question(
-            thread_id=request.thread_id,
-            user_question=request.user_question,
-            graph_executable=graph,
-        )
-        return GraphChatbotResponse(answer=answer)
-        # The 'graph' instance is already initialized in this file
-        graph_data = serialize_langgraph_state_for_thread(graph, thread_id)
-        return graph_data
-    except HTTPException as http_exc:  # Re-raise HTTPExceptions directly
-        raise http_exc
-    except Exception as e:
-        logger.error(
-            f"Error processing graph chatbot query for thread {request.thread_id}: {str(e)}",
-            exc_info=True,
-        )
-        raise HTTPException(
-            status_code=500, detail="Error processing your question about the graph."
-        )
-        logger.error(
-            f"Error generating graph state for thread {thread_id}: {str(e)}",
-            exc_info=True,
-        )
-        raise HTTPException(
-            status_code=500, detail=f"Error generating graph state: {str(e)}"
-        )
+@app.get("/api/metrics")
+async def get_metrics():
+    """Return a snapshot of the runtime metrics reported by server components."""
+    # Some components read a database for their metrics, like the job queue
+    # counting its jobs, so they are collected off the event loop.
+    return await asyncio.to_thread(collect_metrics)
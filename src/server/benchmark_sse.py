@@ -0,0 +1,136 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Benchmark of chat stream serialization with and without chunk coalescing.
+
+Usage:
+    python -m src.server.benchmark_sse [--streams 50] [--tokens 500] [--rate 100]
+        [--windows 0,10,25,50]
+
+Every stream emits ``--tokens`` message chunks of one token each at ``--rate``
+tokens per second (0 for as fast as possible), shaped like the chunks of a
+LangGraph chat stream. Every event is serialized into an SSE frame and written
+to a local socket, and the CPU time reported includes the reading side.
+"""
+
+import argparse
+import asyncio
+import time
+from typing import AsyncIterator, Dict, List
+
+from .sse import Event, coalesce_message_chunks, make_event
+
+_TOKENS = ["The", " market", " rose", " 3", ".", "2", "%", " on", " strong", " demand"]
+
+
+async def _token_stream(stream: int, tokens: int, rate: float) -> AsyncIterator[Event]:
+    interval = 1 / rate if rate > 0 else 0
+    message_id = f"run-{stream:04d}-0000-0000-0000-000000000000"
+    for i in range(tokens):
+        data = {
+            "thread_id": f"thread-{stream:04d}",
+            "agent": "reporter",
+            "id": message_id,
+            "role": "assistant",
+            "content": _TOKENS[i % len(_TOKENS)],
+        }
+        if i == tokens - 1:
+            data["finish_reason"] = "stop"
+        yield "message_chunk", data
+        await asyncio.sleep(interval)
+
+
+async def _discard(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    while await reader.read(65536):
+        pass
+    writer.close()
+
+
+async def _consume(
+    port: int, stream: int, tokens: int, rate: float, window: float, max_bytes: int
+) -> Dict[str, int]:
+    _, writer = await asyncio.open_connection("127.0.0.1", port)
+    events = _token_stream(stream, tokens, rate)
+    if window > 0:
+        events = coalesce_message_chunks(events, window, max_bytes)
+    frames = 0
+    sent = 0
+    # One socket write per frame, as StreamingResponse does.
+    async for event_type, data in events:
+        frame = make_event(event_type, data).encode("utf-8")
+        writer.write(frame)
+        await writer.drain()
+        sent += len(frame)
+        frames += 1
+    writer.close()
+    await writer.wait_closed()
+    return {"events": frames, "bytes": sent}
+
+
+async def _run(
+    streams: int, tokens: int, rate: float, window: float, max_bytes: int
+) -> Dict[str, float]:
+    server = await asyncio.start_server(_discard, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    async with server:
+        results = await asyncio.gather(
+            *(
+                _consume(port, i, tokens, rate, window, max_bytes)
+                for i in range(streams)
+            )
+        )
+    return {
+        "wall": time.perf_counter() - wall,
+        "cpu": time.process_time() - cpu,
+        "events": sum(r["events"] for r in results),
+        "bytes": sum(r["bytes"] for r in results),
+    }
+
+
+def run_benchmark(
+    streams: int, tokens: int, rate: float, windows_ms: List[float], max_bytes: int
+) -> None:
+    print(
+        f"{streams} concurrent streams x {tokens} tokens at "
+        f"{f'{rate:g} tokens/s' if rate > 0 else 'full speed'}"
+    )
+    for window_ms in windows_ms:
+        result = asyncio.run(_run(streams, tokens, rate, window_ms / 1000, max_bytes))
+        label = f"coalesce {window_ms:g}ms" if window_ms > 0 else "no coalescing"
+        print(
+            f"{label:>18}: {result['events']:7d} events, "
+            f"{result['events'] / result['wall']:9.0f} events/s, "
+            f"{result['bytes'] / result['wall'] / 1024:8.0f} KiB/s, "
+            f"{result['bytes'] / 1024:8.0f} KiB, "
+            f"cpu {result['cpu'] * 1000:7.0f} ms in {result['wall']:5.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark SSE chunk coalescing")
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--tokens", type=int, default=500)
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=100,
+        help="Tokens per second per stream, 0 for no delay",
+    )
+    parser.add_argument(
+        "--windows",
+        default="0,10,25,50",
+        help="Comma separated coalescing windows in milliseconds, 0 is off",
+    )
+    parser.add_argument("--max-bytes", type=int, default=1024)
+    args = parser.parse_args()
+
+    run_benchmark(
+        args.streams,
+        args.tokens,
+        args.rate,
+        [float(w) for w in args.windows.split(",")],
+        args.max_bytes,
+    )
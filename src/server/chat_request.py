@@ -63,6 +63,10 @@ class ChatRequest(BaseModel):
         None,
         description="The ID of the selected coordinator persona (e.g., 'default', 'analytical_researcher')",
     )
+    python_repl_limits: Optional[Dict[str, float]] = Field(
+        None,
+        description="Per-execution limits of the coder's Python code (wall_time, cpu_time, memory_mb, max_output_chars); they can only lower the server's limits",
+    )
 
 
 class TTSRequest(BaseModel):
@@ -0,0 +1,475 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Per-thread logs of chat stream events, so that clients can reconnect and resume.
+
+A chat run writes its events into the log of its thread from a background task
+instead of straight into the HTTP response. Every event gets a sequential id
+that is sent as the SSE ``id:`` field; a client that lost its connection sends
+the last id it received as ``Last-Event-ID`` and is replayed the missed events
+before following the still running graph, without any node being run again.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from src.server.sse import Event, make_event
+from src.utils.metrics import register_metrics_provider
+
+logger = logging.getLogger(__name__)
+
+
+def parse_event_id(value: Optional[str]) -> Optional[int]:
+    """The sequence number of a ``Last-Event-ID`` header, None if invalid."""
+    try:
+        seq = int((value or "").strip())
+    except ValueError:
+        return None
+    return seq if seq >= 0 else None
+
+
+class RunInProgress(Exception):
+    """Raised when a thread is started while its previous run is still going."""
+
+    def __init__(self, thread_id: str):
+        super().__init__(f"Thread {thread_id} already has a run in progress")
+        self.thread_id = thread_id
+
+
+class ThreadEventLog:
+    """The events of one run of a thread, in memory with an optional disk spill."""
+
+    def __init__(
+        self,
+        thread_id: str,
+        first_seq: int = 0,
+        max_events: int = 2000,
+        spill_path: Optional[str] = None,
+    ):
+        """
+        Initialize the log.
+
+        Args:
+            thread_id: The thread the run belongs to
+            first_seq: The id of the first event, following the thread's previous run
+            max_events: Events kept in memory, older ones are spilled or
+                dropped. Without a spill file, events a connected client has not
+                received yet are kept and the run waits for the client instead.
+            spill_path: File older events are appended to, None drops them
+        """
+        self.thread_id = thread_id
+        self.first_seq = first_seq
+        self.max_events = max_events
+        self.spill_path = spill_path
+        self._events: Deque[Tuple[int, str]] = deque()
+        self._next_seq = first_seq
+        # Events before this one are on disk, or lost without a spill file.
+        self._memory_start = first_seq
+        self._spill_file = None
+        self._changed = asyncio.Event()
+        self._progress = asyncio.Event()
+        # The last event id each connected client has received.
+        self._cursors: Dict[int, int] = {}
+        self._subscriber_ids = itertools.count()
+        self.finished = False
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self.error: Optional[str] = None
+        # Seconds the run keeps going without clients, None for no limit.
+        self.abandon_timeout: Optional[float] = None
+        self._abandon_handle: Optional[asyncio.TimerHandle] = None
+        # Whether events are kept for a client that is about to connect.
+        self.awaiting_client = False
+
+    @property
+    def last_seq(self) -> int:
+        return self._next_seq - 1
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._cursors)
+
+    @property
+    def backlogged(self) -> bool:
+        """Whether a slow client holds more events in memory than the log keeps."""
+        return len(self._events) > self.max_events
+
+    @property
+    def spilled(self) -> int:
+        return self._memory_start - self.first_seq if self.spill_path else 0
+
+    def append(self, event_type: str, data: Dict[str, Any]) -> int:
+        seq = self._next_seq
+        self._next_seq += 1
+        self._events.append((seq, make_event(event_type, data, event_id=str(seq))))
+        self._trim()
+        self._notify()
+        return seq
+
+    async def wait_for_room(self) -> None:
+        """Wait until connected clients have caught up enough to drop events."""
+        while self.backlogged:
+            await self._progress.wait()
+
+    def _trim(self) -> None:
+        # Spilled events can still be replayed, dropped ones cannot.
+        if self._cursors:
+            needed = min(self._cursors.values()) + 1
+        elif self.awaiting_client:
+            needed = self.first_seq
+        else:
+            needed = self._next_seq
+        while len(self._events) > self.max_events:
+            if not self.spill_path and self._events[0][0] >= needed:
+                break
+            self._spill(*self._events.popleft())
+
+    def close(self) -> None:
+        self.finished = True
+        self.finished_at = time.time()
+        if self._abandon_handle is not None:
+            self._abandon_handle.cancel()
+            self._abandon_handle = None
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        self._notify()
+
+    def discard(self) -> None:
+        """Stop the run if it is still going and delete the spill file."""
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+        self.remove_spill()
+
+    def remove_spill(self) -> None:
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        if self.spill_path and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+    def can_resume(self, after: int) -> bool:
+        """Whether every event following ``after`` is still available."""
+        if not self.first_seq - 1 <= after <= self.last_seq:
+            return False
+        return self.spill_path is not None or after + 1 >= self._memory_start
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _notify_progress(self) -> None:
+        self._progress.set()
+        self._progress = asyncio.Event()
+
+    def arm_abandon_timer(self) -> None:
+        """Cancel the run if no client follows it within ``abandon_timeout``."""
+        if self.finished or self.abandon_timeout is None:
+            return
+        if self._abandon_handle is not None:
+            self._abandon_handle.cancel()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Closed while the event loop shuts down.
+            return
+        self._abandon_handle = loop.call_later(
+            self.abandon_timeout, self._cancel_if_abandoned
+        )
+
+    def _cancel_if_abandoned(self) -> None:
+        self._abandon_handle = None
+        if self._cursors or self.task is None or self.task.done():
+            return
+        logger.info(
+            f"Cancelling the run of thread {self.thread_id}, no client followed it "
+            f"for {self.abandon_timeout}s"
+        )
+        self.task.cancel()
+
+    def _spill(self, seq: int, frame: str) -> None:
+        self._memory_start = seq + 1
+        if not self.spill_path:
+            return
+        if self._spill_file is None:
+            self._spill_file = open(self.spill_path, "a", encoding="utf-8")
+        self._spill_file.write(json.dumps([seq, frame], ensure_ascii=False) + "\n")
+
+    def _read_spilled(self, after: int, before: int) -> list:
+        if self._spill_file is not None:
+            self._spill_file.flush()
+        frames = []
+        try:
+            with open(self.spill_path, encoding="utf-8") as f:
+                for line in f:
+                    seq, frame = json.loads(line)
+                    if after < seq < before:
+                        frames.append((seq, frame))
+        except FileNotFoundError:
+            # Discarded while being followed.
+            pass
+        return frames
+
+    async def follow(self, after: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Yield the SSE frames following event ``after`` until the run finishes.
+
+        Args:
+            after: The last event id the client received, None for the whole run
+        """
+        seq = self.first_seq - 1 if after is None else after
+        subscriber = next(self._subscriber_ids)
+        self._cursors[subscriber] = seq
+        self.awaiting_client = False
+        if self._abandon_handle is not None:
+            self._abandon_handle.cancel()
+            self._abandon_handle = None
+        try:
+            while True:
+                if seq + 1 < self._memory_start:
+                    spilled = (
+                        self._read_spilled(seq, self._memory_start)
+                        if self.spill_path
+                        else []
+                    )
+                    if not spilled:
+                        # Only a client that joined late, or a log discarded
+                        # while being followed, can miss events, and the client
+                        # is told so instead of being sent a stream with holes.
+                        yield make_event(
+                            "error",
+                            {
+                                "thread_id": self.thread_id,
+                                "message": (
+                                    f"Events {seq + 1} to {self._memory_start - 1} "
+                                    "of this run are no longer available"
+                                ),
+                            },
+                        )
+                        return
+                    for seq, frame in spilled:
+                        yield frame
+                        self._delivered(subscriber, seq)
+                    continue
+                if seq < self.last_seq:
+                    # Indexed rather than iterated, since events may be appended
+                    # or spilled while the frame is being written.
+                    seq, frame = self._events[seq + 1 - self._memory_start]
+                    yield frame
+                    self._delivered(subscriber, seq)
+                    continue
+                if self.finished:
+                    return
+                await self._changed.wait()
+        finally:
+            del self._cursors[subscriber]
+            self._trim()
+            self._notify_progress()
+            if not self._cursors:
+                self.arm_abandon_timer()
+
+    def _delivered(self, subscriber: int, seq: int) -> None:
+        self._cursors[subscriber] = seq
+        if self.backlogged:
+            self._trim()
+            self._notify_progress()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "events": self._next_seq - self.first_seq,
+            "in_memory": len(self._events),
+            "spilled": self.spilled,
+            "finished": self.finished,
+            "subscribers": self.subscribers,
+        }
+
+
+class EventLogRegistry:
+    """The event logs of the most recent run of each thread."""
+
+    def __init__(
+        self,
+        max_threads: int = 256,
+        ttl: float = 900,
+        max_events: int = 2000,
+        spill_dir: Optional[str] = None,
+        abandon_timeout: Optional[float] = 300,
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            max_threads: Logs kept, the least recently used finished ones go first
+            ttl: Seconds a finished run stays resumable
+            max_events: Events of a run kept in memory
+            spill_dir: Directory older events are spilled to, None drops them
+            abandon_timeout: Seconds a run started with ``cancel_when_abandoned``
+                keeps going after its last client disconnected, None for no limit
+        """
+        self.max_threads = max_threads
+        self.ttl = ttl
+        self.max_events = max_events
+        self.spill_dir = spill_dir
+        self.abandon_timeout = abandon_timeout
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+        self._logs: "OrderedDict[str, ThreadEventLog]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "runs": 0,
+            "resumes": 0,
+            "resume_misses": 0,
+            "evicted": 0,
+            "cancelled": 0,
+        }
+        # The event loop only keeps weak references to tasks.
+        self._tasks: set = set()
+
+    def _spill_path(self, thread_id: str, first_seq: int) -> Optional[str]:
+        if not self.spill_dir:
+            return None
+        digest = hashlib.sha256(thread_id.encode()).hexdigest()[:32]
+        return os.path.join(self.spill_dir, f"{digest}-{first_seq}.jsonl")
+
+    def start(
+        self,
+        thread_id: str,
+        events: AsyncIterator[Event],
+        cancel_when_abandoned: bool = False,
+    ) -> ThreadEventLog:
+        """
+        Run ``events`` in the background into a new log of the thread.
+
+        Must be called from the event loop the run should execute on.
+
+        Args:
+            thread_id: The thread the run belongs to
+            events: The events of the run
+            cancel_when_abandoned: Whether the run is cancelled once no client
+                has followed it for ``abandon_timeout`` seconds
+
+        Raises:
+            RunInProgress: If the previous run of the thread is still going,
+                since two runs would write the thread's checkpoints at once
+        """
+        with self._lock:
+            previous = self._logs.get(thread_id)
+            if previous is not None and not previous.finished:
+                raise RunInProgress(thread_id)
+            self._logs.pop(thread_id, None)
+            first_seq = previous.last_seq + 1 if previous is not None else 0
+            log = ThreadEventLog(
+                thread_id,
+                first_seq=first_seq,
+                max_events=self.max_events,
+                spill_path=self._spill_path(thread_id, first_seq),
+            )
+            if cancel_when_abandoned:
+                # The client that started the run follows it right away.
+                log.abandon_timeout = self.abandon_timeout
+                log.awaiting_client = True
+            self._logs[thread_id] = log
+            self._counters["runs"] += 1
+            self._prune()
+        if previous is not None:
+            previous.discard()
+        log.task = asyncio.create_task(self._produce(log, events))
+        log.arm_abandon_timer()
+        self._tasks.add(log.task)
+        log.task.add_done_callback(self._tasks.discard)
+        # A run cancelled before it started never gets to close its log.
+        log.task.add_done_callback(lambda _: log.finished or log.close())
+        return log
+
+    async def _produce(self, log: ThreadEventLog, events: AsyncIterator[Event]) -> None:
+        try:
+            async for event_type, data in events:
+                log.append(event_type, data)
+                if log.backlogged:
+                    await log.wait_for_room()
+        except Exception as e:
+            logger.exception(f"Chat run of thread {log.thread_id} failed: {e}")
+            log.error = str(e)
+            log.append("error", {"thread_id": log.thread_id, "message": str(e)})
+        finally:
+            log.close()
+            with self._lock:
+                superseded = self._logs.get(log.thread_id) is not log
+            if superseded:
+                log.remove_spill()
+
+    async def cancel(self, thread_id: str, timeout: float = 10) -> bool:
+        """Cancel the running run of a thread and wait for it to stop."""
+        with self._lock:
+            log = self._logs.get(thread_id)
+        if log is None or log.task is None or log.task.done():
+            return False
+        log.task.cancel()
+        with self._lock:
+            self._counters["cancelled"] += 1
+        await asyncio.wait({log.task}, timeout=timeout)
+        return True
+
+    def resume(self, thread_id: str, after: int) -> Optional[ThreadEventLog]:
+        """The log to replay after event ``after``, None if it cannot be resumed."""
+        with self._lock:
+            log = self._logs.get(thread_id)
+            if log is None or not log.can_resume(after):
+                self._counters["resume_misses"] += 1
+                return None
+            self._logs.move_to_end(thread_id)
+            self._counters["resumes"] += 1
+            return log
+
+    def _prune(self) -> None:
+        now = time.time()
+        for thread_id, log in list(self._logs.items()):
+            expired = log.finished and now - log.finished_at > self.ttl
+            if expired or (len(self._logs) > self.max_threads and log.finished):
+                del self._logs[thread_id]
+                log.discard()
+                self._counters["evicted"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            logs = list(self._logs.values())
+            counters = dict(self._counters)
+        return {
+            "threads": len(logs),
+            "running": sum(1 for log in logs if not log.finished),
+            "subscribers": sum(log.subscribers for log in logs),
+            "events_in_memory": sum(len(log._events) for log in logs),
+            "events_spilled": sum(log.spilled for log in logs),
+            **counters,
+        }
+
+
+_event_logs: Optional[EventLogRegistry] = None
+_event_logs_lock = threading.Lock()
+
+
+def get_event_logs() -> EventLogRegistry:
+    """Return the process-wide event log registry configured from the environment."""
+    global _event_logs
+    with _event_logs_lock:
+        if _event_logs is None:
+            spill_dir = os.getenv("SSE_EVENT_LOG_DIR")
+            _event_logs = EventLogRegistry(
+                max_threads=int(os.getenv("SSE_EVENT_LOG_MAX_THREADS", 256)),
+                ttl=float(os.getenv("SSE_EVENT_LOG_TTL", 900)),
+                max_events=int(os.getenv("SSE_EVENT_LOG_MAX_EVENTS", 2000)),
+                spill_dir=os.path.expanduser(spill_dir) if spill_dir else None,
+                abandon_timeout=float(os.getenv("SSE_ABANDONED_RUN_TIMEOUT", 300))
+                or None,
+            )
+            register_metrics_provider("sse_event_logs", _event_logs.stats)
+        return _event_logs
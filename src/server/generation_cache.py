@@ -0,0 +1,242 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Persistent cache of generated podcasts and decks.
+
+A podcast or deck is keyed by a hash of the report it was generated from, the
+prompts and models of its workflow and any further settings that change the
+output, so that generating it again from the same report is served from disk.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Optional
+
+from src.config.agents import AGENT_LLM_MAP
+from src.graph.registry import GRAPHS
+from src.llms.llm import get_llm_by_type
+from src.prompts.template import get_prompt_template
+from src.utils.metrics import register_metrics_provider
+
+logger = logging.getLogger(__name__)
+
+
+def _model_name(llm: Any) -> str:
+    for attribute in ("model_name", "model", "deployment_name"):
+        name = getattr(llm, attribute, None)
+        if isinstance(name, str) and name:
+            return f"{type(llm).__name__}:{name}"
+    return type(llm).__name__
+
+
+def generation_key(graph: str, content: str, **params: Any) -> str:
+    """
+    The key of the output of a workflow graph for ``content``.
+
+    Besides the content and ``params``, the key covers the text of the graph's
+    prompts and the models of its agents, so that changing either of them
+    generates the output anew.
+    """
+    spec = GRAPHS[graph]
+    prompts = {
+        name: hashlib.sha256(get_prompt_template(name).encode("utf-8")).hexdigest()
+        for name in spec.prompts
+    }
+    models = {
+        agent: _model_name(get_llm_by_type(AGENT_LLM_MAP[agent]))
+        for agent in spec.agents
+    }
+    request = json.dumps(
+        {
+            "graph": graph,
+            "content": content,
+            "prompts": prompts,
+            "models": models,
+            **params,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """
+    A size-bounded cache of generated files, indexed in SQLite.
+
+    The files are kept in ``cache_dir`` and evicted in least-recently-used order
+    once their total size exceeds ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 1024 * 1024 * 1024):
+        """
+        Initialize the generation cache.
+
+        Args:
+            cache_dir: Directory holding the cached files and their index
+            max_bytes: Maximum total size of the cached files
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(cache_dir, "generation_cache.db"), check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                graph TEXT NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+        )
+        self._conn.commit()
+        self._hits = 0
+        self._misses = 0
+        self._bytes_saved = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.bin")
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """Open the cached file for reading, or return None if it is not cached."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            try:
+                # An open file stays readable even if it is evicted meanwhile.
+                file = open(self._path(key), "rb") if row is not None else None
+            except FileNotFoundError:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                file = None
+            if file is None:
+                self._conn.commit()
+                self._misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self._hits += 1
+            self._bytes_saved += row[0]
+        return file
+
+    def put(self, key: str, graph: str, file: BinaryIO) -> None:
+        """
+        Store a copy of a generated file, from its start.
+
+        The file is left positioned at its start for the caller to read.
+        """
+        size = file.seek(0, os.SEEK_END)
+        file.seek(0)
+        if size > self.max_bytes:
+            logger.debug(f"Generated {graph} is larger than the cache, skipping")
+            return
+        # Written next to its final path and renamed, so that it is never read
+        # half written.
+        f = tempfile.NamedTemporaryFile(dir=self.cache_dir, delete=False)
+        try:
+            with f:
+                shutil.copyfileobj(file, f)
+            with self._lock:
+                os.replace(f.name, self._path(key))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, graph, last_access, size)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key, graph, time.time(), size),
+                )
+                self._evict()
+                self._conn.commit()
+        except BaseException:
+            # A copy that failed is not left behind in the cache directory.
+            try:
+                os.remove(f.name)
+            except FileNotFoundError:
+                pass
+            raise
+        finally:
+            file.seek(0)
+
+    def _evict(self) -> None:
+        # Caller must hold self._lock.
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access ASC"
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        logger.debug(f"Evicted {len(evicted)} entries from the generation cache")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit ratio, bytes saved and occupancy of the cache."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "bytes_saved": self._bytes_saved,
+                "entries": entries,
+                "size_bytes": size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_generation_cache: Optional[GenerationCache] = None
+_generation_cache_lock = threading.Lock()
+
+
+def get_generation_cache() -> Optional[GenerationCache]:
+    """
+    Return the process-wide generation cache configured from the environment.
+
+    Returns None when the cache is disabled with ``GENERATION_CACHE_ENABLED=false``.
+    """
+    global _generation_cache
+    if os.getenv("GENERATION_CACHE_ENABLED", "true").lower() in ("false", "0", "no"):
+        return None
+    with _generation_cache_lock:
+        if _generation_cache is None:
+            _generation_cache = GenerationCache(
+                cache_dir=os.path.expanduser(
+                    os.getenv("GENERATION_CACHE_DIR", "~/.cache/deer-flow/generated")
+                ),
+                max_bytes=int(
+                    os.getenv("GENERATION_CACHE_MAX_BYTES", 1024 * 1024 * 1024)
+                ),
+            )
+            register_metrics_provider("generation_cache", _generation_cache.stats)
+        return _generation_cache
@@ -0,0 +1,598 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Background research jobs, decoupled from the HTTP connection that submitted them.
+
+A job is a chat request put on a queue. A bounded pool of workers on the server's
+event loop claims queued jobs and runs the graph for them, writing the events
+into the thread's event log so that clients can subscribe to them, and stores
+the final report once the run is over.
+
+The queue is pluggable: ``MemoryJobQueue`` keeps jobs in the process, while
+``SQLiteJobQueue`` keeps them in a local database file, so that jobs survive
+restarts and several server processes can share one queue in place of a
+broker. A claimed job holds a lease that its worker renews while the job runs,
+so that jobs of a process that crashed are queued again once the lease expires.
+The events of a running job can only be followed on the process that
+runs it; its status and report are available from every process.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from src.server.event_log import EventLogRegistry, RunInProgress, ThreadEventLog
+from src.server.sse import Event
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ("queued", "running", "succeeded", "interrupted", "failed", "cancelled")
+FINISHED_STATUSES = ("succeeded", "interrupted", "failed", "cancelled")
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue holds its maximum."""
+
+
+@dataclass
+class Job:
+    thread_id: str
+    request: Dict[str, Any]
+    job_id: str = field(default_factory=lambda: uuid4().hex)
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    final_report: Optional[str] = None
+    error: Optional[str] = None
+    # When the job is queued again unless its worker renews the lease.
+    lease_expires: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The job without its request, as reported by the API."""
+        data = asdict(self)
+        data.pop("request")
+        data.pop("lease_expires")
+        return data
+
+
+class JobQueue(ABC):
+    """Storage of jobs, from which workers claim queued jobs in submission order."""
+
+    @abstractmethod
+    def put(self, job: Job) -> None:
+        """Add a queued job, raising JobQueueFull when the queue is full."""
+
+    @abstractmethod
+    def claim(self, lease: float = 60) -> Optional[Job]:
+        """
+        Mark the oldest queued job as running and return it, None if there is none.
+
+        Args:
+            lease: Seconds the job stays claimed unless the lease is renewed
+        """
+
+    @abstractmethod
+    def renew(self, job_id: str, lease: float = 60) -> None:
+        """Extend the lease of a running job."""
+
+    @abstractmethod
+    def requeue_expired(self) -> int:
+        """Queue running jobs whose lease expired again, returning how many."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        pass
+
+    @abstractmethod
+    def update(self, job_id: str, **fields: Any) -> None:
+        pass
+
+    @abstractmethod
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that is still queued, returning whether it was."""
+
+    @abstractmethod
+    def position(self, job_id: str) -> Optional[int]:
+        """The number of jobs ahead of a queued job, None if it is not queued."""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """The number of jobs in every status."""
+
+
+class MemoryJobQueue(JobQueue):
+    """A queue in the memory of the process, keeping the most recent finished jobs."""
+
+    def __init__(self, max_queued: int = 100, max_finished: int = 1000):
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queued: "OrderedDict[str, None]" = OrderedDict()
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, job: Job) -> None:
+        with self._lock:
+            if len(self._queued) >= self.max_queued:
+                raise JobQueueFull(f"{len(self._queued)} jobs are already queued")
+            self._jobs[job.job_id] = job
+            self._queued[job.job_id] = None
+
+    def claim(self, lease: float = 60) -> Optional[Job]:
+        with self._lock:
+            if not self._queued:
+                return None
+            job_id, _ = self._queued.popitem(last=False)
+            job = self._jobs[job_id]
+            job.status = "running"
+            job.started_at = time.time()
+            job.lease_expires = job.started_at + lease
+            return Job(**asdict(job))
+
+    def renew(self, job_id: str, lease: float = 60) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == "running":
+                job.lease_expires = time.time() + lease
+
+    def requeue_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [
+                job
+                for job in self._jobs.values()
+                if job.status == "running" and (job.lease_expires or 0) < now
+            ]
+            for job in expired:
+                job.status = "queued"
+                job.started_at = job.lease_expires = None
+                self._queued[job.job_id] = None
+            # Back in submission order.
+            for job_id in sorted(self._queued, key=lambda i: self._jobs[i].created_at):
+                self._queued.move_to_end(job_id)
+        return len(expired)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return Job(**asdict(job)) if job is not None else None
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            for name, value in fields.items():
+                setattr(job, name, value)
+            if job.finished:
+                self._finished[job_id] = None
+                while len(self._finished) > self.max_finished:
+                    old_id, _ = self._finished.popitem(last=False)
+                    self._jobs.pop(old_id, None)
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock:
+            if self._queued.pop(job_id, False) is False:
+                return False
+        self.update(job_id, status="cancelled", finished_at=time.time())
+        return True
+
+    def position(self, job_id: str) -> Optional[int]:
+        with self._lock:
+            for position, queued_id in enumerate(self._queued):
+                if queued_id == job_id:
+                    return position
+        return None
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts = dict.fromkeys(STATUSES, 0)
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+
+class SQLiteJobQueue(JobQueue):
+    """A queue in a local SQLite database that several processes can share."""
+
+    _COLUMNS = [
+        "job_id",
+        "thread_id",
+        "request",
+        "status",
+        "created_at",
+        "started_at",
+        "finished_at",
+        "final_report",
+        "error",
+        "lease_expires",
+    ]
+
+    def __init__(self, path: str, max_queued: int = 100):
+        self.path = path
+        self.max_queued = max_queued
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # sqlite3 connections can't be shared between threads, and the workers
+        # access the queue from the default executor.
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    thread_id TEXT NOT NULL,
+                    request TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    final_report TEXT,
+                    error TEXT,
+                    lease_expires REAL
+                )""")
+            columns = {row[1] for row in db.execute("PRAGMA table_info(jobs)")}
+            if "lease_expires" not in columns:
+                # Databases created before jobs had leases.
+                db.execute("ALTER TABLE jobs ADD COLUMN lease_expires REAL")
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA busy_timeout=30000")
+            self._local.db = db
+        return db
+
+    def _job(self, row) -> Job:
+        data = dict(zip(self._COLUMNS, row))
+        data["request"] = json.loads(data["request"])
+        return Job(**data)
+
+    def put(self, job: Job) -> None:
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            (queued,) = db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued'"
+            ).fetchone()
+            if queued >= self.max_queued:
+                raise JobQueueFull(f"{queued} jobs are already queued")
+            values = asdict(job)
+            values["request"] = json.dumps(job.request, ensure_ascii=False)
+            db.execute(
+                f"INSERT INTO jobs ({', '.join(self._COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(self._COLUMNS))})",
+                [values[column] for column in self._COLUMNS],
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def claim(self, lease: float = 60) -> Optional[Job]:
+        db = self._connect()
+        # An immediate transaction, so that two processes never claim the same job.
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE status = 'queued' "
+                "ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+            job = self._job(row)
+            job.status = "running"
+            job.started_at = time.time()
+            job.lease_expires = job.started_at + lease
+            db.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, lease_expires = ? "
+                "WHERE job_id = ?",
+                (job.status, job.started_at, job.lease_expires, job.job_id),
+            )
+            db.execute("COMMIT")
+            return job
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def renew(self, job_id: str, lease: float = 60) -> None:
+        self._connect().execute(
+            "UPDATE jobs SET lease_expires = ? WHERE job_id = ? AND status = 'running'",
+            (time.time() + lease, job_id),
+        )
+
+    def requeue_expired(self) -> int:
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL, lease_expires = NULL "
+            "WHERE status = 'running' AND COALESCE(lease_expires, 0) < ?",
+            (time.time(),),
+        )
+        return cursor.rowcount
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = (
+            self._connect()
+            .execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE job_id = ?",
+                (job_id,),
+            )
+            .fetchone()
+        )
+        return self._job(row) if row is not None else None
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        unknown = set(fields) - set(self._COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {sorted(unknown)}")
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self._connect().execute(
+            f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+            [*fields.values(), job_id],
+        )
+
+    def cancel(self, job_id: str) -> bool:
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? "
+            "WHERE job_id = ? AND status = 'queued'",
+            (time.time(), job_id),
+        )
+        return cursor.rowcount == 1
+
+    def position(self, job_id: str) -> Optional[int]:
+        row = (
+            self._connect()
+            .execute(
+                "SELECT (SELECT COUNT(*) FROM jobs AS ahead WHERE ahead.status = 'queued' "
+                "AND ahead.created_at < jobs.created_at) FROM jobs "
+                "WHERE job_id = ? AND status = 'queued'",
+                (job_id,),
+            )
+            .fetchone()
+        )
+        return row[0] if row is not None else None
+
+    def counts(self) -> Dict[str, int]:
+        counts = dict.fromkeys(STATUSES, 0)
+        for status, count in self._connect().execute(
+            "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+        ):
+            counts[status] = count
+        return counts
+
+
+def create_job_queue(
+    kind: str = "memory", path: Optional[str] = None, max_queued: int = 100
+) -> JobQueue:
+    """
+    Create a job queue.
+
+    Args:
+        kind: "memory" or "sqlite"
+        path: The database file of a SQLite queue
+        max_queued: Jobs that may wait in the queue
+    """
+    if kind == "memory":
+        return MemoryJobQueue(max_queued=max_queued)
+    if kind == "sqlite":
+        if not path:
+            raise ValueError("A SQLite job queue needs a database path")
+        return SQLiteJobQueue(path, max_queued=max_queued)
+    raise ValueError(f"Unknown job queue: {kind}")
+
+
+class JobManager:
+    """Runs queued jobs with a bounded number of workers on the event loop."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        run: Callable[[Job], AsyncIterator[Event]],
+        finalize: Callable[[Job], Awaitable[Dict[str, Any]]],
+        event_logs: Callable[[], EventLogRegistry],
+        max_workers: int = 4,
+        poll_interval: float = 1.0,
+        lease: float = 60,
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            queue: The queue jobs are submitted to and claimed from
+            run: Starts the graph for a job and returns its events
+            finalize: Reads the outcome of a finished run, a dict with the
+                "final_report" and whether the run stopped at an "interrupt"
+            event_logs: Returns the registry the events are written to
+            max_workers: Jobs run at the same time by this process
+            poll_interval: Seconds between checks for jobs submitted by other processes
+            lease: Seconds a job of a process that stopped renewing it stays
+                running before it is queued again
+        """
+        self.queue = queue
+        self.run = run
+        self.finalize = finalize
+        self.event_logs = event_logs
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._next_requeue = 0.0
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running: Dict[str, ThreadEventLog] = {}
+        # The logs of recent jobs, for as long as the registry keeps them.
+        self._logs: "weakref.WeakValueDictionary[str, ThreadEventLog]" = (
+            weakref.WeakValueDictionary()
+        )
+
+    def start(self) -> None:
+        """Start the workers on the running event loop, if they are not running yet."""
+        if self._workers and not all(worker.done() for worker in self._workers):
+            return
+        self._wakeup = asyncio.Event()
+        self._workers = [
+            asyncio.create_task(self._work()) for _ in range(self.max_workers)
+        ]
+
+    async def shutdown(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, thread_id: str, request: Dict[str, Any]) -> Job:
+        self.start()
+        job = Job(thread_id=thread_id, request=request)
+        await asyncio.to_thread(self.queue.put, job)
+        self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self.queue.get, job_id)
+
+    async def position(self, job_id: str) -> Optional[int]:
+        return await asyncio.to_thread(self.queue.position, job_id)
+
+    async def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job, or stop a job running on this process."""
+        if await asyncio.to_thread(self.queue.cancel, job_id):
+            return True
+        log = self._running.get(job_id)
+        if log is None or log.task is None or log.task.done():
+            return False
+        log.task.cancel()
+        return True
+
+    async def follow(self, job: Job, after: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Yield the SSE frames of a job, waiting for it to start if it is queued.
+
+        Ends without frames when the job ran on another process or its events
+        are no longer kept.
+        """
+        while job.status == "queued":
+            # A comment line keeps proxies from closing the idle connection.
+            yield ": queued\n\n"
+            await asyncio.sleep(self.poll_interval)
+            job = await self.get(job.job_id)
+            if job is None:
+                return
+        log = self._logs.get(job.job_id)
+        if log is None or (after is not None and not log.can_resume(after)):
+            return
+        async for frame in log.follow(after):
+            yield frame
+
+    async def _work(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await self._requeue_expired()
+                job = await asyncio.to_thread(self.queue.claim, self.lease)
+            except Exception as e:
+                logger.exception(f"Failed to claim a job: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except TimeoutError:
+                    pass
+                continue
+            await self._execute(job)
+
+    async def _requeue_expired(self) -> None:
+        # Jobs of a process that crashed, checked on startup and every half lease.
+        if time.monotonic() < self._next_requeue:
+            return
+        self._next_requeue = time.monotonic() + self.lease / 2
+        requeued = await asyncio.to_thread(self.queue.requeue_expired)
+        if requeued:
+            logger.warning(f"Queued {requeued} jobs with an expired lease again")
+            self._wakeup.set()
+
+    async def _execute(self, job: Job) -> None:
+        logger.info(f"Running job {job.job_id} of thread {job.thread_id}")
+        try:
+            log = self.event_logs().start(job.thread_id, self.run(job))
+        except RunInProgress as e:
+            await asyncio.to_thread(
+                self.queue.update,
+                job.job_id,
+                status="failed",
+                error=str(e),
+                finished_at=time.time(),
+            )
+            logger.info(f"Job {job.job_id} failed: {e}")
+            return
+        self._logs[job.job_id] = log
+        self._running[job.job_id] = log
+        fields: Dict[str, Any] = {}
+        try:
+            # Waiting without awaiting the task itself, so that cancelling the
+            # job does not cancel the worker.
+            while not log.task.done():
+                await asyncio.wait({log.task}, timeout=self.lease / 3)
+                if log.task.done():
+                    break
+                try:
+                    await asyncio.to_thread(self.queue.renew, job.job_id, self.lease)
+                except Exception as e:
+                    logger.warning(
+                        f"Failed to renew the lease of job {job.job_id}: {e}"
+                    )
+            if log.task.cancelled():
+                fields["status"] = "cancelled"
+            elif log.error is not None:
+                fields.update(status="failed", error=log.error)
+            else:
+                try:
+                    outcome = await self.finalize(job)
+                    fields.update(
+                        status=(
+                            "interrupted" if outcome.get("interrupt") else "succeeded"
+                        ),
+                        final_report=outcome.get("final_report"),
+                    )
+                except Exception as e:
+                    logger.exception(f"Failed to finalize job {job.job_id}: {e}")
+                    fields.update(status="failed", error=str(e))
+        except asyncio.CancelledError:
+            # The server is shutting down, so the job is left for the next
+            # process to claim by expiring its lease.
+            log.task.cancel()
+            fields["lease_expires"] = 0
+            raise
+        except BaseException as e:
+            log.task.cancel()
+            fields.update(status="failed", error=repr(e))
+            raise
+        finally:
+            self._running.pop(job.job_id, None)
+            if "status" in fields:
+                fields["finished_at"] = time.time()
+            await asyncio.to_thread(self.queue.update, job.job_id, **fields)
+            logger.info(f"Job {job.job_id} {fields.get('status', 'left to requeue')}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "running_here": len(self._running),
+            "jobs": self.queue.counts(),
+        }
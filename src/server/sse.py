@@ -0,0 +1,140 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Server-sent event formatting and coalescing of streamed message chunks.
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+Event = Tuple[str, Dict[str, Any]]
+
+_END = object()
+# Events read ahead of the client before the upstream generator is paused.
+_QUEUE_SIZE = 256
+
+
+def make_event(
+    event_type: str, data: dict[str, any], event_id: Optional[str] = None
+) -> str:
+    if data.get("content") == "":
+        data.pop("content")
+    frame = f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return f"id: {event_id}\n{frame}" if event_id is not None else frame
+
+
+def coalesce_window() -> float:
+    """The coalescing window in seconds configured by ``SSE_COALESCE_MS``, 0 is off."""
+    return float(os.getenv("SSE_COALESCE_MS", 0)) / 1000
+
+
+def coalesce_max_bytes() -> int:
+    return int(os.getenv("SSE_COALESCE_MAX_BYTES", 1024))
+
+
+def _mergeable(event_type: str, data: Dict[str, Any]) -> bool:
+    return event_type == "message_chunk" and isinstance(data.get("content", ""), str)
+
+
+def _same_message(batch: Dict[str, Any], data: Dict[str, Any]) -> bool:
+    return (
+        batch.get("id") == data.get("id")
+        and batch.get("agent") == data.get("agent")
+        and batch.get("thread_id") == data.get("thread_id")
+        and "finish_reason" not in batch
+    )
+
+
+async def _pump(events: AsyncIterator[Event], queue: asyncio.Queue) -> None:
+    try:
+        async for event in events:
+            await queue.put(event)
+    except Exception as e:
+        await queue.put((_END, e))
+    else:
+        await queue.put((_END, None))
+
+
+async def coalesce_message_chunks(
+    events: AsyncIterator[Event], window: float, max_bytes: int = 1024
+) -> AsyncIterator[Event]:
+    """
+    Merge consecutive ``message_chunk`` events of the same message.
+
+    A batch is emitted when ``window`` seconds have passed since its first
+    chunk, when its content reaches ``max_bytes``, when the message finishes,
+    or when any other event arrives. Merged events have the same shape as the
+    chunks they replace, with their contents concatenated.
+
+    Args:
+        events: The (event type, data) pairs to coalesce
+        window: Longest time in seconds a chunk is held back
+        max_bytes: Content size in UTF-8 bytes at which a batch is emitted
+
+    Yields:
+        The events with message chunks merged
+    """
+    loop = asyncio.get_running_loop()
+    # The upstream generator is read by its own task, so that waiting for the
+    # window to expire never interrupts it.
+    queue: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_SIZE)
+    pump = asyncio.create_task(_pump(events, queue))
+    batch: Optional[Dict[str, Any]] = None
+    batch_bytes = 0
+    deadline = 0.0
+    try:
+        while True:
+            if batch is None:
+                event_type, data = await queue.get()
+            elif loop.time() >= deadline:
+                yield "message_chunk", batch
+                batch = None
+                continue
+            elif not queue.empty():
+                event_type, data = queue.get_nowait()
+            else:
+                try:
+                    async with asyncio.timeout_at(deadline):
+                        event_type, data = await queue.get()
+                except TimeoutError:
+                    continue
+            if event_type is _END:
+                if data is not None:
+                    raise data
+                break
+
+            if not _mergeable(event_type, data):
+                if batch is not None:
+                    yield "message_chunk", batch
+                    batch = None
+                yield event_type, data
+                continue
+
+            content = data.get("content", "")
+            if batch is not None and _same_message(batch, data):
+                batch["content"] += content
+                batch_bytes += len(content.encode("utf-8"))
+                if "finish_reason" in data:
+                    batch["finish_reason"] = data["finish_reason"]
+            else:
+                if batch is not None:
+                    yield "message_chunk", batch
+                batch = {**data, "content": content}
+                batch_bytes = len(content.encode("utf-8"))
+                deadline = loop.time() + window
+            if batch_bytes >= max_bytes or "finish_reason" in batch:
+                yield "message_chunk", batch
+                batch = None
+        if batch is not None:
+            yield "message_chunk", batch
+    finally:
+        pump.cancel()
+        await asyncio.wait([pump])
+        # The pump may have stopped while the upstream generator was paused
+        # at a yield, which leaves it open; close it now, not when collected.
+        aclose = getattr(events, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -2,12 +2,15 @@
 # SPDX-License-Identifier: MIT
 
 import logging
+import os
 from typing import Annotated
 
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from .decorators import log_io
 
-from src.crawler import Crawler
+from src.crawler import get_crawl_scheduler
+from src.crawler.passages import select_passages
 
 logger = logging.getLogger(__name__)
 
@@ -16,12 +19,32 @@ logger = logging.getLogger(__name__)
 @log_io
 def crawl_tool(
     url: Annotated[str, "The url to crawl."],
+    config: RunnableConfig,
 ) -> str:
     """Use this to crawl a url and get a readable content in markdown format."""
     try:
-        crawler = Crawler()
-        article = crawler.crawl(url)
-        return {"url": url, "crawled_content": article.to_markdown()[:1000]}
+        # The scheduler rate-limits requests per domain and honours robots.txt,
+        # so concurrent research threads do not hammer the same site.
+        timeout = float(os.getenv("CRAWLER_QUEUE_TIMEOUT", 120))
+        try:
+            article = get_crawl_scheduler().crawl(url, timeout=timeout)
+        except TimeoutError:
+            error_msg = (
+                f"Failed to crawl. Error: {url} was not crawled within "
+                f"{timeout:g}s, its site is busy"
+            )
+            logger.error(error_msg)
+            return error_msg
+        # Rank the page's passages against the research step being executed,
+        # so the agent sees the relevant sections instead of the page header.
+        step = (config or {}).get("configurable", {}).get("research_step") or {}
+        query = f"{step.get('title', '')}\n{step.get('description', '')}"
+        crawled_content = select_passages(
+            article.to_markdown(),
+            query,
+            max_chars=int(os.getenv("CRAWL_TOOL_MAX_CHARS", 1000)),
+        )
+        return {"url": url, "crawled_content": crawled_content}
     except BaseException as e:
         error_msg = f"Failed to crawl. Error: {repr(e)}"
         logger.error(error_msg)
@@ -26,7 +26,10 @@ def log_io(func: Callable) -> Callable:
         # Log input parameters
         func_name = func.__name__
         params = ", ".join(
-            [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
+            [
+                *(str(arg) for arg in args),
+                *(f"{k}={v}" for k, v in kwargs.items() if k != "config"),
+            ]
         )
         logger.info(f"Tool {func_name} called with parameters: {params}")
 
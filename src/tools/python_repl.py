@@ -3,12 +3,12 @@
 
 import logging
 from typing import Annotated
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from langchain_experimental.utilities import PythonREPL
 from .decorators import log_io
 
-# Initialize REPL and logger
-repl = PythonREPL()
+from src.repl import get_repl_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,6 +18,7 @@ def python_repl_tool(
     code: Annotated[
         str, "The python code to execute to do further analysis or calculation."
     ],
+    config: RunnableConfig,
 ):
     """Use this to execute python code and do data analysis or calculation. If you want to see the output of a value,
     you should print it out with `print(...)`. This is visible to the user."""
@@ -27,17 +28,36 @@ def python_repl_tool(
         return f"Error executing code:\n```python\n{code}\n```\nError: {error_msg}"
 
     logger.info("Executing Python code")
+    # Every conversation thread gets its own worker process, so variables
+    # persist across the coder's calls without leaking into other threads.
+    configurable = (config or {}).get("configurable", {})
+    thread_id = configurable.get("thread_id", "default")
     try:
-        result = repl.run(code)
-        # Check if the result is an error message by looking for typical error patterns
-        if isinstance(result, str) and ("Error" in result or "Exception" in result):
-            logger.error(result)
-            return f"Error executing code:\n```python\n{code}\n```\nError: {result}"
-        logger.info("Code execution successful")
+        pool = get_repl_pool()
+        limits = pool.limits.tightened(configurable.get("python_repl_limits"))
+        result = pool.run(code, session_id=thread_id, limits=limits)
     except BaseException as e:
         error_msg = repr(e)
         logger.error(error_msg)
         return f"Error executing code:\n```python\n{code}\n```\nError: {error_msg}"
 
-    result_str = f"Successfully executed:\n```python\n{code}\n```\nStdout: {result}"
+    note = ""
+    if result.session_restarted:
+        note = "Note: the Python session was restarted, variables defined by earlier calls are gone.\n"
+    output = result.output
+    if result.usage.output_truncated:
+        omitted = result.usage.output_chars - len(output)
+        output += f"\n[Output truncated, {omitted} more characters omitted]"
+    resources = f"Resources: {result.usage.summary()}"
+    if result.artifacts:
+        # Only the summaries go back to the model, never the data itself.
+        resources += "\nSaved artifacts:\n" + "\n".join(
+            f"- {summary}" for summary in result.artifacts
+        )
+    if not result.ok:
+        logger.error(result.error)
+        return f"{note}Error executing code:\n```python\n{code}\n```\nError: {result.error}\n{resources}"
+    logger.info(f"Code execution successful. {resources}")
+
+    result_str = f"{note}Successfully executed:\n```python\n{code}\n```\nStdout: {output}\n{resources}"
     return result_str
@@ -5,15 +5,78 @@
 Text-to-Speech module using volcengine TTS API.
 """
 
+import asyncio
+import base64
 import json
+import os
+import random
+import time
 import uuid
 import logging
+import httpx
 import requests
-from typing import Optional, Dict, Any
+from typing import Any, Dict, Optional
+
+from src.utils.background_loop import run_in_background
+
+from .tts_cache import TTSCache
 
 logger = logging.getLogger(__name__)
 
 
+def _timeout() -> float:
+    return float(os.getenv("TTS_TIMEOUT", 30))
+
+
+def _retry_delay(attempt: int, backoff: float) -> float:
+    # Full jitter, so that requests throttled together don't retry together.
+    return random.uniform(0, backoff * 2 ** (attempt - 1))
+
+
+def _retryable(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+def _response_json(response: Any) -> Any:
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
+
+
+def _result(status_code: int, response_json: Any) -> Dict[str, Any]:
+    if status_code != 200:
+        logger.error(f"TTS API error: {response_json}")
+        return {"success": False, "error": response_json, "audio_data": None}
+    if not isinstance(response_json, dict) or "data" not in response_json:
+        logger.error(f"TTS API returned no data: {response_json}")
+        return {
+            "success": False,
+            "error": "No audio data returned",
+            "audio_data": None,
+        }
+    return {
+        "success": True,
+        "response": response_json,
+        "audio_data": response_json["data"],  # Base64 encoded audio data
+    }
+
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http_client() -> httpx.AsyncClient:
+    # Only used on the background event loop, which owns the client's
+    # connections, so all TTS requests of the process share them.
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(_timeout(), connect=5.0),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=16),
+        )
+    return _client
+
+
 class VolcengineTTS:
     """
     Client for volcengine Text-to-Speech API.
@@ -26,6 +89,8 @@ class VolcengineTTS:
         cluster: str = "volcano_tts",
         voice_type: str = "BV700_V2_streaming",
         host: str = "openspeech.bytedance.com",
+        cache: Optional[TTSCache] = None,
+        api_url: Optional[str] = None,
     ):
         """
         Initialize the volcengine TTS client.
@@ -36,14 +101,17 @@ class VolcengineTTS:
             cluster: TTS cluster name
             voice_type: Voice type to use
             host: API host
+            cache: Cache of the audio of earlier requests, if any
+            api_url: URL of the API, if not the one on ``host``
         """
         self.appid = appid
         self.access_token = access_token
         self.cluster = cluster
         self.voice_type = voice_type
         self.host = host
-        self.api_url = f"https://{host}/api/v1/tts"
+        self.api_url = api_url or f"https://{host}/api/v1/tts"
         self.header = {"Authorization": f"Bearer;{access_token}"}
+        self.cache = cache
 
     def text_to_speech(
         self,
@@ -56,10 +124,17 @@ class VolcengineTTS:
         with_frontend: int = 1,
         frontend_type: str = "unitTson",
         uid: Optional[str] = None,
+        voice_type: Optional[str] = None,
+        retries: int = 2,
+        backoff: float = 0.5,
     ) -> Dict[str, Any]:
         """
         Convert text to speech using volcengine TTS API.
 
+        Connection errors, timeouts, throttling and server errors are retried
+        ``retries`` times, after a random delay of up to ``backoff`` seconds,
+        doubled for every further attempt.
+
         Args:
             text: Text to convert to speech
             encoding: Audio encoding format
@@ -70,62 +145,187 @@ class VolcengineTTS:
             with_frontend: Whether to use frontend processing
             frontend_type: Frontend type
             uid: User ID (generated if not provided)
+            voice_type: Voice type of this request, the client's if not provided
+            retries: Attempts after the first one for a request that can be retried
+            backoff: Upper bound in seconds of the delay before the first retry
+
+        Returns:
+            Dictionary containing the API response and base64-encoded audio data
+        """
+        params = {
+            "voice_type": voice_type or self.voice_type,
+            "encoding": encoding,
+            "speed_ratio": speed_ratio,
+            "volume_ratio": volume_ratio,
+            "pitch_ratio": pitch_ratio,
+            "text_type": text_type,
+            "with_frontend": with_frontend,
+            "frontend_type": frontend_type,
+        }
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(text, cluster=self.cluster, **params)
+            audio = self.cache.get(cache_key)
+            if audio is not None:
+                return self._cached(audio)
+
+        body = json.dumps(self._request_json(text, uid, **params))
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(_retry_delay(attempt, backoff))
+            try:
+                logger.debug(f"Sending TTS request for text: {text[:50]}...")
+                response = requests.post(
+                    self.api_url,
+                    body,
+                    headers=self.header,
+                    timeout=(5.0, _timeout()),
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error: Any = f"{type(e).__name__}: {e}"
+                logger.warning(
+                    f"TTS attempt {attempt + 1} of {retries + 1} failed: {error}"
+                )
+                continue
+            except Exception as e:
+                logger.exception(f"Error in TTS API call: {str(e)}")
+                return {"success": False, "error": str(e), "audio_data": None}
+
+            response_json = _response_json(response)
+            if _retryable(response.status_code):
+                error = response_json
+                logger.warning(
+                    f"TTS attempt {attempt + 1} of {retries + 1} failed:"
+                    f" {response.status_code} {error}"
+                )
+                continue
+            result = _result(response.status_code, response_json)
+            if result["success"] and cache_key is not None:
+                self.cache.put(cache_key, base64.b64decode(result["audio_data"]))
+            return result
+        return {"success": False, "error": error, "audio_data": None}
+
+    async def atext_to_speech(
+        self,
+        text: str,
+        encoding: str = "mp3",
+        speed_ratio: float = 1.0,
+        volume_ratio: float = 1.0,
+        pitch_ratio: float = 1.0,
+        text_type: str = "plain",
+        with_frontend: int = 1,
+        frontend_type: str = "unitTson",
+        uid: Optional[str] = None,
+        voice_type: Optional[str] = None,
+        retries: int = 2,
+        backoff: float = 0.5,
+    ) -> Dict[str, Any]:
+        """
+        Convert text to speech like ``text_to_speech``, without blocking.
+
+        The request goes through a pooled HTTP client shared by the process,
+        and is retried like those of ``text_to_speech``.
 
         Returns:
             Dictionary containing the API response and base64-encoded audio data
         """
-        if not uid:
-            uid = str(uuid.uuid4())
+        params = {
+            "voice_type": voice_type or self.voice_type,
+            "encoding": encoding,
+            "speed_ratio": speed_ratio,
+            "volume_ratio": volume_ratio,
+            "pitch_ratio": pitch_ratio,
+            "text_type": text_type,
+            "with_frontend": with_frontend,
+            "frontend_type": frontend_type,
+        }
+        return await run_in_background(
+            self._asynthesize(text, uid, retries, backoff, params)
+        )
+
+    async def _asynthesize(
+        self,
+        text: str,
+        uid: Optional[str],
+        retries: int,
+        backoff: float,
+        params: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(text, cluster=self.cluster, **params)
+            audio = await asyncio.to_thread(self.cache.get, cache_key)
+            if audio is not None:
+                return self._cached(audio)
+
+        body = json.dumps(self._request_json(text, uid, **params))
+        client = _http_client()
+        for attempt in range(retries + 1):
+            if attempt:
+                await asyncio.sleep(_retry_delay(attempt, backoff))
+            try:
+                logger.debug(f"Sending TTS request for text: {text[:50]}...")
+                response = await client.post(
+                    self.api_url, content=body, headers=self.header
+                )
+            except httpx.TransportError as e:
+                error: Any = f"{type(e).__name__}: {e}"
+                logger.warning(
+                    f"TTS attempt {attempt + 1} of {retries + 1} failed: {error}"
+                )
+                continue
+            except Exception as e:
+                logger.exception(f"Error in TTS API call: {str(e)}")
+                return {"success": False, "error": str(e), "audio_data": None}
 
-        request_json = {
+            response_json = _response_json(response)
+            if _retryable(response.status_code):
+                error = response_json
+                logger.warning(
+                    f"TTS attempt {attempt + 1} of {retries + 1} failed:"
+                    f" {response.status_code} {error}"
+                )
+                continue
+            result = _result(response.status_code, response_json)
+            if result["success"] and cache_key is not None:
+                await asyncio.to_thread(
+                    self.cache.put, cache_key, base64.b64decode(result["audio_data"])
+                )
+            return result
+        return {"success": False, "error": error, "audio_data": None}
+
+    def _request_json(
+        self, text: str, uid: Optional[str], **params: Any
+    ) -> Dict[str, Any]:
+        return {
             "app": {
                 "appid": self.appid,
                 "token": self.access_token,
                 "cluster": self.cluster,
             },
-            "user": {"uid": uid},
+            "user": {"uid": uid or str(uuid.uuid4())},
             "audio": {
-                "voice_type": self.voice_type,
-                "encoding": encoding,
-                "speed_ratio": speed_ratio,
-                "volume_ratio": volume_ratio,
-                "pitch_ratio": pitch_ratio,
+                "voice_type": params["voice_type"],
+                "encoding": params["encoding"],
+                "speed_ratio": params["speed_ratio"],
+                "volume_ratio": params["volume_ratio"],
+                "pitch_ratio": params["pitch_ratio"],
             },
             "request": {
                 "reqid": str(uuid.uuid4()),
                 "text": text,
-                "text_type": text_type,
+                "text_type": params["text_type"],
                 "operation": "query",
-                "with_frontend": with_frontend,
-                "frontend_type": frontend_type,
+                "with_frontend": params["with_frontend"],
+                "frontend_type": params["frontend_type"],
             },
         }
 
-        try:
-            logger.debug(f"Sending TTS request for text: {text[:50]}...")
-            response = requests.post(
-                self.api_url, json.dumps(request_json), headers=self.header
-            )
-            response_json = response.json()
-
-            if response.status_code != 200:
-                logger.error(f"TTS API error: {response_json}")
-                return {"success": False, "error": response_json, "audio_data": None}
-
-            if "data" not in response_json:
-                logger.error(f"TTS API returned no data: {response_json}")
-                return {
-                    "success": False,
-                    "error": "No audio data returned",
-                    "audio_data": None,
-                }
-
-            return {
-                "success": True,
-                "response": response_json,
-                "audio_data": response_json["data"],  # Base64 encoded audio data
-            }
-
-        except Exception as e:
-            logger.exception(f"Error in TTS API call: {str(e)}")
-            return {"success": False, "error": str(e), "audio_data": None}
+    @staticmethod
+    def _cached(audio: bytes) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "response": None,
+            "audio_data": base64.b64encode(audio).decode(),
+            "cached": True,
+        }
@@ -0,0 +1,163 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Persistent cache of synthesized speech keyed by text, voice and prosody.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from src.utils.metrics import register_metrics_provider
+
+logger = logging.getLogger(__name__)
+
+
+class TTSCache:
+    """
+    A size-bounded cache of TTS audio stored in SQLite.
+
+    Entries are evicted in least-recently-used order once the total size of the
+    audio exceeds ``max_bytes``. Synthesis is deterministic enough for the same
+    request to be answered with the same audio, so entries never expire.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize the TTS cache.
+
+        Args:
+            cache_dir: Directory holding the cache database
+            max_bytes: Maximum total size of the cached audio
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(cache_dir, "tts_cache.db"), check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL,
+                audio BLOB NOT NULL
+            )
+            """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+        )
+        self._conn.commit()
+        self._hits = 0
+        self._misses = 0
+        self._bytes_saved = 0
+
+    @staticmethod
+    def key(text: str, **params: Any) -> str:
+        """The key of a request for ``text`` with the given voice and prosody."""
+        request = json.dumps({"text": text, **params}, sort_keys=True)
+        return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached audio, or None if it is not cached."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT audio FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self._hits += 1
+            self._bytes_saved += len(row[0])
+        return row[0]
+
+    def put(self, key: str, audio: bytes) -> None:
+        """Store audio, evicting least recently used entries if needed."""
+        if len(audio) > self.max_bytes:
+            logger.debug("Synthesized audio is larger than the TTS cache, skipping")
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, last_access, size, audio)"
+                " VALUES (?, ?, ?, ?)",
+                (key, time.time(), len(audio), audio),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # Caller must hold self._lock.
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access ASC"
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        logger.debug(f"Evicted {len(evicted)} entries from the TTS cache")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit ratio, bytes saved and occupancy of the cache."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "bytes_saved": self._bytes_saved,
+                "entries": entries,
+                "size_bytes": size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_tts_cache: Optional[TTSCache] = None
+_tts_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> Optional[TTSCache]:
+    """
+    Return the process-wide TTS cache configured from the environment.
+
+    Returns None when the cache is disabled with ``TTS_CACHE_ENABLED=false``.
+    """
+    global _tts_cache
+    if os.getenv("TTS_CACHE_ENABLED", "true").lower() in ("false", "0", "no"):
+        return None
+    with _tts_cache_lock:
+        if _tts_cache is None:
+            _tts_cache = TTSCache(
+                cache_dir=os.path.expanduser(
+                    os.getenv("TTS_CACHE_DIR", "~/.cache/deer-flow/tts")
+                ),
+                max_bytes=int(os.getenv("TTS_CACHE_MAX_BYTES", 512 * 1024 * 1024)),
+            )
+            register_metrics_provider("tts_cache", _tts_cache.stats)
+        return _tts_cache
@@ -0,0 +1,130 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Synthesis of texts longer than one TTS request allows.
+
+The text is split at sentence boundaries into chunks under the provider's limit,
+falling back to clauses, words and finally characters for overlong sentences.
+The chunks are synthesized concurrently and their audio is yielded in order.
+"""
+
+import asyncio
+import base64
+import contextlib
+import logging
+import re
+from typing import AsyncIterator, List, Optional
+
+from src.podcast.audio import mp3_frames
+
+from .tts import VolcengineTTS
+
+logger = logging.getLogger(__name__)
+
+# The ends of sentences, then of clauses, then of words, each with the closing
+# quotes and whitespace that follow. Latin punctuation only counts before
+# whitespace, so that numbers like 3.14 stay whole.
+_BOUNDARIES = [
+    re.compile(r"[。！？；…]+[”’」』)）]*\s*|[.!?;]+[\"')\]]*(?:\s+|$)|\n\s*"),
+    re.compile(r"[，、：,:]+\s*"),
+    re.compile(r"\s+"),
+]
+
+
+def _size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _pieces(text: str, boundary: re.Pattern) -> List[str]:
+    pieces = []
+    start = 0
+    for match in boundary.finditer(text):
+        if match.end() > start:
+            pieces.append(text[start : match.end()])
+            start = match.end()
+    if start < len(text):
+        pieces.append(text[start:])
+    return pieces
+
+
+def _split(text: str, max_bytes: int, level: int) -> List[str]:
+    if level == len(_BOUNDARIES):
+        # No boundary left to split at, so cut between characters.
+        pieces = list(text)
+    else:
+        pieces = _pieces(text, _BOUNDARIES[level])
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if _size(piece) > max_bytes:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.extend(_split(piece, max_bytes, level + 1))
+        elif _size(current + piece) > max_bytes:
+            chunks.append(current)
+            current = piece
+        else:
+            current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_text(text: str, max_bytes: int = 1024) -> List[str]:
+    """Split text into chunks of at most ``max_bytes`` in UTF-8, at sentences if possible."""
+    return [chunk.strip() for chunk in _split(text, max_bytes, 0) if chunk.strip()]
+
+
+async def synthesize(
+    tts_client: VolcengineTTS,
+    text: str,
+    retries: int = 2,
+    backoff: float = 0.5,
+    limit: Optional[asyncio.Semaphore] = None,
+    **params,
+) -> Optional[bytes]:
+    """Synthesize text, at most ``limit`` requests at once, or return None."""
+    async with limit or contextlib.nullcontext():
+        result = await tts_client.atext_to_speech(
+            text, retries=retries, backoff=backoff, **params
+        )
+    if not result["success"]:
+        logger.warning(f"TTS failed after {retries + 1} attempts: {result['error']}")
+        return None
+    return base64.b64decode(result["audio_data"])
+
+
+async def stream_speech(
+    tts_client: VolcengineTTS,
+    chunks: List[str],
+    concurrency: int = 4,
+    retries: int = 2,
+    encoding: str = "mp3",
+    **params,
+) -> AsyncIterator[bytes]:
+    """
+    Yield the audio of the chunks in order, synthesizing ``concurrency`` at once.
+
+    MP3 chunks are cut to their audio frames so that they play as one file.
+    Raises RuntimeError when a chunk can't be synthesized.
+    """
+    limit = asyncio.Semaphore(max(1, concurrency))
+    tasks = [
+        asyncio.ensure_future(
+            synthesize(
+                tts_client, chunk, retries, limit=limit, encoding=encoding, **params
+            )
+        )
+        for chunk in chunks
+    ]
+    try:
+        for index, task in enumerate(tasks):
+            audio = await task
+            if audio is None:
+                raise RuntimeError(f"TTS failed for part {index + 1} of {len(chunks)}")
+            yield mp3_frames(audio) if encoding == "mp3" and len(chunks) > 1 else audio
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,42 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+An event loop on its own thread for asynchronous I/O shared by the process.
+
+Pooled async HTTP clients and subprocesses belong to the loop they were created
+on. Running them on one loop of their own lets the server's event loop and the
+threads of blocking workflows share them alike.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Coroutine, Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def background_loop() -> asyncio.AbstractEventLoop:
+    """Return the background event loop, starting it on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="background-loop", daemon=True
+            ).start()
+        return _loop
+
+
+def submit(coroutine: Coroutine) -> concurrent.futures.Future:
+    """Run a coroutine on the background event loop, from any thread."""
+    return asyncio.run_coroutine_threadsafe(coroutine, background_loop())
+
+
+async def run_in_background(coroutine: Coroutine):
+    """Await a coroutine that must run on the background event loop."""
+    if asyncio.get_running_loop() is background_loop():
+        return await coroutine
+    return await asyncio.wrap_future(submit(coroutine))
@@ -0,0 +1,53 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import logging
+import threading
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+MetricsProvider = Callable[[], Dict[str, Any]]
+
+_providers: Dict[str, MetricsProvider] = {}
+_lock = threading.Lock()
+
+
+def register_metrics_provider(name: str, provider: MetricsProvider) -> None:
+    """
+    Register a callable that returns a snapshot of metrics for a component.
+
+    Registering the same name again replaces the previous provider.
+
+    Args:
+        name: The component name the metrics will be reported under
+        provider: A zero-argument callable returning a JSON-serializable dict
+    """
+    with _lock:
+        _providers[name] = provider
+
+
+def unregister_metrics_provider(name: str) -> None:
+    """Remove a previously registered metrics provider."""
+    with _lock:
+        _providers.pop(name, None)
+
+
+def collect_metrics() -> Dict[str, Dict[str, Any]]:
+    """
+    Collect a snapshot from every registered metrics provider.
+
+    Returns:
+        A dict mapping component names to their metrics. Providers that raise
+        are reported with an "error" entry instead of failing the collection.
+    """
+    with _lock:
+        providers = dict(_providers)
+    snapshot: Dict[str, Dict[str, Any]] = {}
+    for name, provider in providers.items():
+        try:
+            snapshot[name] = provider()
+        except Exception as e:
+            logger.warning(f"Failed to collect metrics for '{name}': {e}")
+            snapshot[name] = {"error": str(e)}
+    return snapshot
@@ -3,7 +3,7 @@
 
 import asyncio
 import logging
-from src.graph import build_graph
+from src.graph.registry import get_graph, lazy_graph_attribute
 
 # Configure logging
 logging.basicConfig(
@@ -19,8 +19,8 @@ def enable_debug_logging():
 
 logger = logging.getLogger(__name__)
 
-# Create the graph
-graph = build_graph()
+# The graph is compiled on first use rather than on import.
+__getattr__ = lazy_graph_attribute(__name__, {"graph": "research_without_memory"})
 
 
 async def run_agent_workflow_async(
@@ -75,7 +75,7 @@ async def run_agent_workflow_async(
         "recursion_limit": 100,
     }
     last_message_cnt = 0
-    async for s in graph.astream(
+    async for s in get_graph("research_without_memory").astream(
         input=initial_state, config=config, stream_mode="values"
     ):
         try:
@@ -99,4 +99,4 @@ async def run_agent_workflow_async(
 
 
 if __name__ == "__main__":
-    print(graph.get_graph(xray=True).draw_mermaid())
+    print(get_graph("research_without_memory").get_graph(xray=True).draw_mermaid())
@@ -0,0 +1,167 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import importlib
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessageChunk
+
+from src.server.admission import AdmissionController, AdmissionRejected
+from src.server.event_log import EventLogRegistry
+
+server_app = importlib.import_module("src.server.app")
+
+
+def test_runs_are_admitted_in_order():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrent=1, max_queue=2)
+        order = []
+        positions = {}
+
+        async def run(name):
+            ticket = controller.enqueue()
+            positions[name] = [position async for position in ticket.wait()]
+            order.append(name)
+            await asyncio.sleep(0.01)
+            ticket.release()
+
+        first = controller.enqueue()
+        tasks = [asyncio.create_task(run(name)) for name in ("b", "c")]
+        await asyncio.sleep(0.01)
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.enqueue()
+        first.release()
+        await asyncio.gather(*tasks)
+        return order, positions, rejected.value, controller.stats()
+
+    order, positions, rejected, stats = asyncio.run(scenario())
+    assert order == ["b", "c"]
+    assert positions == {"b": [0], "c": [1, 0]}
+    assert rejected.retry_after == 5
+    assert stats["admitted"] == 3
+    assert stats["rejected"] == 1
+    assert stats["running"] == stats["queue_length"] == 0
+    assert stats["wait_time"]["max"] > 0
+
+
+def test_abandoned_waiters_leave_the_queue():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrent=1, max_queue=2)
+        running = await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0.01)
+        assert controller.stats()["queue_length"] == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        running.release()
+        async with controller.slot():
+            during = controller.stats()
+        return during, controller.stats()
+
+    during, after = asyncio.run(scenario())
+    assert during["running"] == 1
+    assert during["abandoned"] == 1
+    assert after["running"] == 0
+    assert after["avg_run_time"] >= 0
+
+
+def test_releases_from_other_threads_wake_waiters():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrent=1, max_queue=1)
+        running = controller.enqueue()
+        position = controller._position
+
+        def release_while_checking(ticket):
+            # The run ahead finishes on another thread right as the waiter
+            # reads its state, before it goes to sleep.
+            if not running.released:
+                releaser = threading.Thread(target=running.release)
+                releaser.start()
+                releaser.join()
+            return position(ticket)
+
+        controller._position = release_while_checking
+        ticket = await asyncio.wait_for(controller.acquire(), 2)
+        ticket.release()
+        return controller.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["admitted"] == 2
+    assert stats["running"] == stats["queue_length"] == 0
+
+
+def test_chat_stream_reports_queue_position_and_rejects(monkeypatch):
+    started = []
+
+    class FakeGraph:
+        async def astream(self, *args, config, **kwargs):
+            started.append(config["configurable"]["thread_id"])
+            chunk = AIMessageChunk(content="done", id="run-1")
+            yield ("reporter:1",), "messages", (chunk, {})
+
+    controller = AdmissionController("chat", max_concurrent=1, max_queue=1)
+    registry = EventLogRegistry()
+    monkeypatch.setattr(server_app, "graph", FakeGraph())
+    monkeypatch.setattr(server_app, "get_event_logs", lambda: registry)
+    monkeypatch.setattr(server_app, "get_admission_controller", lambda name: controller)
+
+    body = {"messages": [], "auto_accepted_plan": True}
+    with TestClient(server_app.app) as client:
+        # One run holds the only slot and another fills the queue.
+        busy = controller.enqueue()
+        waiting = controller.enqueue()
+        rejected = client.post(
+            "/api/chat/stream", json={**body, "thread_id": "rejected"}
+        )
+        assert rejected.status_code == 429
+        assert rejected.headers["Retry-After"] == "5"
+        waiting.release()
+
+        # The test client reads whole responses, so the busy run finishes from
+        # another thread while the next request waits for its slot.
+        timer = threading.Timer(0.2, busy.release)
+        timer.start()
+        queued = client.post("/api/chat/stream", json={**body, "thread_id": "queued"})
+        timer.join()
+    events = [line for line in queued.text.splitlines() if line.startswith("event: ")]
+    assert events == ["event: queue_position", "event: message_chunk"]
+    assert '"position": 0' in queued.text
+    assert started == ["queued"]
+    assert controller.stats()["running"] == 0
+
+
+def test_jobs_wait_for_a_chat_slot(monkeypatch):
+    class FakeGraph:
+        async def astream(self, *args, **kwargs):
+            chunk = AIMessageChunk(content="done", id="run-1")
+            yield ("reporter:1",), "messages", (chunk, {})
+
+        async def aget_state(self, config):
+            return SimpleNamespace(values={"final_report": "# Findings"}, next=())
+
+    # A full wait queue rejects chat requests but not jobs.
+    controller = AdmissionController("chat", max_concurrent=1, max_queue=0)
+    monkeypatch.setattr(server_app, "graph", FakeGraph())
+    monkeypatch.setattr(server_app, "get_admission_controller", lambda name: controller)
+    body = {"thread_id": "job-thread", "messages": [], "auto_accepted_plan": True}
+    with TestClient(server_app.app) as client:
+        busy = controller.enqueue()
+        job_id = client.post("/api/jobs", json=body).json()["job_id"]
+        deadline = time.time() + 10
+        while controller.stats()["queue_length"] != 1:
+            assert time.time() < deadline
+            time.sleep(0.02)
+        assert client.get(f"/api/jobs/{job_id}").json()["status"] == "running"
+
+        busy.release()
+        while client.get(f"/api/jobs/{job_id}").json()["status"] != "succeeded":
+            assert time.time() < deadline
+            time.sleep(0.02)
+        events = client.get(f"/api/jobs/{job_id}/events").text
+    assert events.index("event: queue_position") < events.index("event: message_chunk")
+    assert controller.stats()["running"] == 0
@@ -0,0 +1,221 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import operator
+import threading
+import time
+from typing import Annotated, TypedDict
+
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Command, interrupt
+
+from src.graph.checkpoint import BoundedMemorySaver, SQLiteSaver, create_checkpointer
+
+
+class _State(TypedDict):
+    steps: Annotated[list, operator.add]
+    plan: str
+
+
+def _graph(checkpointer):
+    def planner(state):
+        return {"steps": ["planner"], "plan": "draft"}
+
+    def review(state):
+        feedback = interrupt("Please review the plan")
+        return {"steps": ["review"], "plan": f"{state['plan']} ({feedback})"}
+
+    def reporter(state):
+        return {"steps": ["reporter"]}
+
+    builder = StateGraph(_State)
+    builder.add_node("planner", planner)
+    builder.add_node("review", review)
+    builder.add_node("reporter", reporter)
+    builder.add_edge(START, "planner")
+    builder.add_edge("planner", "review")
+    builder.add_edge("review", "reporter")
+    builder.add_edge("reporter", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "checkpoints.sqlite3")
+
+
+def test_interrupt_is_resumed_by_another_instance(path):
+    config = {"configurable": {"thread_id": "thread-1"}}
+    first = SQLiteSaver(path)
+    _graph(first).invoke({"steps": [], "plan": ""}, config)
+    first.close()
+
+    # A second saver on the same file, as another server process would have.
+    second = SQLiteSaver(path)
+    graph = _graph(second)
+    state = graph.get_state(config)
+    assert state.next == ("review",)
+    assert state.tasks[0].interrupts[0].value == "Please review the plan"
+
+    result = graph.invoke(Command(resume="accepted"), config)
+    assert result == {
+        "steps": ["planner", "review", "reporter"],
+        "plan": "draft (accepted)",
+    }
+    history = list(graph.get_state_history(config))
+    assert len(history) == 5
+    assert not graph.get_state(config).next
+    second.close()
+
+
+def test_matches_memory_saver(path):
+    async def run(checkpointer):
+        graph = _graph(checkpointer)
+        config = {"configurable": {"thread_id": "t"}}
+        await graph.ainvoke({"steps": [], "plan": ""}, config)
+        await graph.ainvoke(Command(resume="ok"), config)
+        states = [s async for s in graph.aget_state_history(config)]
+        return [(s.values, s.next, s.metadata["step"]) for s in states]
+
+    saver = SQLiteSaver(path)
+    try:
+        assert asyncio.run(run(saver)) == asyncio.run(run(MemorySaver()))
+    finally:
+        saver.close()
+
+
+def test_concurrent_writes_are_batched(path):
+    saver = SQLiteSaver(path, pool_size=2)
+    graph = _graph(saver)
+
+    def run(i):
+        config = {"configurable": {"thread_id": f"thread-{i}"}}
+        graph.invoke({"steps": [], "plan": ""}, config)
+        graph.invoke(Command(resume="ok"), config)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for i in range(16):
+        config = {"configurable": {"thread_id": f"thread-{i}"}}
+        assert graph.get_state(config).values["plan"] == "draft (ok)"
+    stats = saver.stats()
+    assert stats["write_calls"] > stats["transactions"]
+
+    saver.delete_thread("thread-0")
+    assert saver.get_tuple({"configurable": {"thread_id": "thread-0"}}) is None
+    saver.close()
+
+
+def test_create_checkpointer(monkeypatch, path):
+    assert isinstance(create_checkpointer(), BoundedMemorySaver)
+    monkeypatch.setenv("CHECKPOINTER", "sqlite")
+    monkeypatch.setenv("CHECKPOINTER_SQLITE_PATH", path)
+    saver = create_checkpointer()
+    assert isinstance(saver, SQLiteSaver)
+    assert saver.path == path
+    saver.close()
+    with pytest.raises(ValueError):
+        create_checkpointer("postgres")
+
+
+def _run_plan(graph, thread_id):
+    config = {"configurable": {"thread_id": thread_id}}
+    graph.invoke({"steps": [], "plan": ""}, config)
+    graph.invoke(Command(resume="ok"), config)
+    return config
+
+
+def test_bounded_memory_saver_compacts_idle_threads():
+    saver = BoundedMemorySaver(keep_checkpoints=3, compact_after=0, sweep_interval=3600)
+    graph = _graph(saver)
+    config = _run_plan(graph, "thread")
+    before = saver.thread_usage("thread")
+    assert before["checkpoints"] == 5
+
+    saver.sweep()
+    after = saver.thread_usage("thread")
+    assert after["checkpoints"] == 3
+    assert after["compacted"]
+    assert after["bytes"] < before["bytes"]
+    assert len(list(graph.get_state_history(config))) == 3
+
+    # The latest state survives compaction, and the thread can continue.
+    assert graph.get_state(config).values["plan"] == "draft (ok)"
+    graph.invoke({"steps": [], "plan": ""}, config)
+    assert graph.get_state(config).next == ("review",)
+    assert not saver.thread_usage("thread")["compacted"]
+
+
+def test_bounded_memory_saver_evicts_threads():
+    saver = BoundedMemorySaver(max_threads=2, ttl=3600)
+    graph = _graph(saver)
+    for thread_id in ("a", "b", "c"):
+        _run_plan(graph, thread_id)
+    assert saver.get_tuple({"configurable": {"thread_id": "a"}}) is None
+    assert saver.stats()["threads"] == 2
+    assert saver.stats()["evicted_lru"] == 1
+
+    saver.ttl = 0.01
+    time.sleep(0.05)
+    saver.sweep()
+    stats = saver.stats()
+    assert stats["threads"] == 0
+    assert stats["bytes"] == 0
+    assert not saver.storage
+
+
+def test_bounded_memory_saver_expires_threads_without_further_writes():
+    saver = BoundedMemorySaver(ttl=0.05, sweep_interval=0.01)
+    graph = _graph(saver)
+    config = _run_plan(graph, "a")
+    time.sleep(0.1)
+
+    # Nothing is written anymore; reading is enough for the thread to expire.
+    assert graph.get_state(config).values == {}
+    stats = saver.stats()
+    assert stats["threads"] == 0
+    assert stats["evicted_ttl"] == 1
+    assert not saver.storage
+
+
+def _scanned_bytes(saver, thread_id):
+    size = sum(
+        len(checkpoint[1]) + len(metadata[1])
+        for checkpoints in saver.storage.get(thread_id, {}).values()
+        for checkpoint, metadata, _ in checkpoints.values()
+    )
+    size += sum(len(v[1]) for k, v in saver.blobs.items() if k[0] == thread_id)
+    size += sum(
+        len(w[2][1])
+        for k, writes in saver.writes.items()
+        if k[0] == thread_id
+        for w in writes.values()
+    )
+    return size
+
+
+def test_bounded_memory_saver_usage_matches_storage():
+    saver = BoundedMemorySaver(max_threads=2, keep_checkpoints=2, sweep_interval=3600)
+    graph = _graph(saver)
+    for thread_id in ("a", "b"):
+        _run_plan(graph, thread_id)
+        assert saver.thread_usage(thread_id)["bytes"] == _scanned_bytes(
+            saver, thread_id
+        )
+
+    saver.compact("a")
+    assert saver.thread_usage("a")["checkpoints"] == 2
+    assert saver.thread_usage("a")["bytes"] == _scanned_bytes(saver, "a")
+
+    _run_plan(graph, "c")
+    assert not any(k[0] == "a" for k in list(saver.blobs) + list(saver.writes))
+    stats = saver.stats(top=1)
+    assert list(stats["largest_threads"]) in (["b"], ["c"])
+    assert stats["bytes"] == _scanned_bytes(saver, "b") + _scanned_bytes(saver, "c")
@@ -0,0 +1,159 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import os
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from src.crawler import (
+    Article,
+    Crawler,
+    CrawlCache,
+    ExtractionPool,
+    canonicalize_url,
+)
+
+PAGE_HTML = (
+    "<html><head><title>Tangbao</title></head><body><article>"
+    "<h1>Tangbao</h1><p>Soup dumplings from Nanjing are steamed in bamboo baskets."
+    " The thin wrapper holds a rich broth made from pork and crab roe, and each"
+    " dumpling is traditionally eaten through a straw before the filling.</p>"
+    "</article></body></html>"
+)
+
+
+class _ConditionalHandler(BaseHTTPRequestHandler):
+    etag = '"v1"'
+    requests_seen = []
+
+    def do_GET(self):
+        type(self).requests_seen.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.end_headers()
+            return
+        body = PAGE_HTML.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", self.etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fixture_server(local_server):
+    _ConditionalHandler.requests_seen = []
+    return local_server(_ConditionalHandler)
+
+
+def _article(title: str = "Title", body: str = "<p>Body</p>") -> Article:
+    return Article(title=title, html_content=body)
+
+
+def test_canonicalize_url():
+    assert (
+        canonicalize_url("HTTPS://Example.COM:443/a?b=2&a=1&utm_source=x#frag")
+        == "https://example.com/a?a=1&b=2"
+    )
+    assert canonicalize_url("http://example.com") == "http://example.com/"
+    assert canonicalize_url("http://example.com:8080/") == "http://example.com:8080/"
+
+
+def test_cache_roundtrip(tmp_path):
+    cache = CrawlCache(str(tmp_path))
+    cache.put("https://example.com/a?utm_medium=x", "<html/>", _article(), etag='"e"')
+
+    entry = cache.get("https://EXAMPLE.com/a")
+    assert entry is not None
+    assert entry.etag == '"e"'
+    assert entry.html == "<html/>"
+    article = entry.to_article()
+    assert article.to_markdown() == "# Title\n\nBody"
+    assert cache.get("https://example.com/b") is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = CrawlCache(str(tmp_path))
+    filler = os.urandom(4096).hex()
+    cache.put("https://example.com/1", filler, _article())
+    # Leave room for two entries only.
+    cache.max_bytes = int(cache.stats()["size_bytes"] * 2.5)
+    cache.put("https://example.com/2", filler, _article())
+    # Touch the first entry so the second one becomes the eviction candidate.
+    assert cache.get("https://example.com/1") is not None
+    cache.put("https://example.com/3", filler, _article())
+
+    assert cache.stats()["size_bytes"] <= cache.max_bytes
+    assert cache.get("https://example.com/2") is None
+    assert cache.get("https://example.com/3") is not None
+
+
+def test_crawler_serves_fresh_entries_from_cache(tmp_path):
+    cache = CrawlCache(str(tmp_path))
+    cache.put("https://example.com/", "<html>cached</html>", _article())
+
+    article = Crawler(cache=cache).crawl("https://example.com/")
+
+    assert article.url == "https://example.com/"
+    assert article.to_markdown() == "# Title\n\nBody"
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["hit_ratio"] == 1.0
+    assert stats["bytes_saved"] == len("<html>cached</html>")
+
+
+def test_crawler_revalidates_stale_entries(tmp_path, fixture_server):
+    cache = CrawlCache(str(tmp_path), ttl=0)
+    url = f"{fixture_server}/page"
+    cache.put(url, PAGE_HTML, _article("Tangbao"), etag='"v1"')
+
+    article = Crawler(cache=cache).crawl(url)
+
+    assert article.title == "Tangbao"
+    assert _ConditionalHandler.requests_seen[-1]["If-None-Match"] == '"v1"'
+    stats = cache.stats()
+    assert stats["revalidated"] == 1
+    assert stats["bytes_saved"] == len(PAGE_HTML)
+
+
+def test_crawler_refreshes_changed_entries_without_jina(tmp_path, fixture_server):
+    cache = CrawlCache(str(tmp_path), ttl=0)
+    url = f"{fixture_server}/page"
+    cache.put(url, "<html>old</html>", _article("Old"), etag='"v0"')
+    extraction_pool = ExtractionPool(max_workers=0, use_readability=False)
+
+    article = Crawler(cache=cache, extraction_pool=extraction_pool).crawl(url)
+
+    assert "Soup dumplings" in article.to_markdown()
+    entry = cache.get(url)
+    assert entry.etag == '"v1"'
+    assert entry.html == PAGE_HTML
+    assert cache.stats()["misses"] == 1
+
+
+def test_crawler_keeps_unchanged_pages_without_extracting(tmp_path, fixture_server):
+    cache = CrawlCache(str(tmp_path), ttl=0)
+    url = f"{fixture_server}/page"
+    # The server no longer knows this ETag and sends the same page again.
+    cache.put(url, PAGE_HTML, _article("Tangbao"), etag='"v0"')
+    crawler = Crawler(cache=cache)
+    crawler._extract = lambda url, html: pytest.fail("the page was extracted")
+
+    article = crawler.crawl(url)
+
+    assert article.title == "Tangbao"
+    assert _ConditionalHandler.requests_seen[-1]["If-None-Match"] == '"v0"'
+    entry = cache.get(url)
+    assert entry.etag == '"v1"'
+    assert entry.html == PAGE_HTML
+    stats = cache.stats()
+    assert stats["revalidated"] == 1
+    assert stats["unchanged"] == 1
+    assert stats["misses"] == 0
+    assert stats["bytes_saved"] == 0
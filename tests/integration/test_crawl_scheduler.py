@@ -0,0 +1,197 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from src.crawler import Article, CrawlDisallowedError, CrawlScheduler
+from src.crawler.scheduler import RobotsCache, TokenBucket
+
+ROBOTS_TXT = b"User-agent: *\nDisallow: /private\nCrawl-delay: 1\n"
+
+
+class _RobotsHandler(BaseHTTPRequestHandler):
+    robots_requests = 0
+
+    def do_GET(self):
+        if self.path == "/robots.txt":
+            _RobotsHandler.robots_requests += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(ROBOTS_TXT)))
+            self.end_headers()
+            self.wfile.write(ROBOTS_TXT)
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def robots_server(local_server):
+    return local_server(_RobotsHandler)
+
+
+class _RecordingCrawler:
+    def __init__(self, duration=0.0):
+        self.duration = duration
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def cached(self, url):
+        return None
+
+    def crawl(self, url):
+        with self.lock:
+            self.calls.append((time.monotonic(), url))
+        time.sleep(self.duration)
+        return Article(title=url, html_content="", markdown_content=url)
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def make(**kwargs):
+        scheduler = CrawlScheduler(**kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.shutdown()
+
+
+def test_token_bucket_allows_burst_then_refills():
+    bucket = TokenBucket(rate=10, capacity=2)
+    now = bucket.updated
+    for _ in range(2):
+        assert bucket.delay(now) == 0
+        bucket.consume()
+    assert bucket.delay(now) == pytest.approx(0.1)
+    assert bucket.delay(now + 0.11) == 0
+
+
+def test_scheduler_rate_limits_each_domain(make_scheduler):
+    crawler = _RecordingCrawler()
+    scheduler = make_scheduler(crawler=crawler, domain_rate=20, domain_burst=1)
+
+    futures = scheduler.submit_many([f"https://a.example/{i}" for i in range(5)])
+    for future in futures:
+        future.result(timeout=5)
+
+    times = [t for t, _ in crawler.calls]
+    assert times[-1] - times[0] >= 4 / 20 * 0.9
+
+
+def test_scheduler_interleaves_domains_fairly(make_scheduler):
+    crawler = _RecordingCrawler(duration=0.01)
+    scheduler = make_scheduler(
+        crawler=crawler, max_concurrency=1, domain_rate=1000, domain_burst=1000
+    )
+
+    # Hold the only worker so that the whole batch queues up first.
+    gate = threading.Event()
+    blocker = scheduler.submit("https://blocker.example/")
+    original = crawler.crawl
+    crawler.crawl = lambda url: gate.wait(5) and original(url)
+    urls = [f"https://big.example/{i}" for i in range(6)]
+    urls += [f"https://small.example/{i}" for i in range(2)]
+    futures = scheduler.submit_many(urls)
+    time.sleep(0.05)
+    crawler.crawl = original
+    gate.set()
+    blocker.result(timeout=5)
+    for future in futures:
+        future.result(timeout=5)
+
+    order = [url.split("/")[2] for _, url in crawler.calls if "blocker" not in url]
+    # The small domain is not starved behind the whole batch of the big one.
+    assert order.index("small.example") <= 1
+    assert order[:4].count("small.example") == 2
+
+
+def test_scheduler_skips_queue_for_cached_pages(make_scheduler):
+    crawler = _RecordingCrawler()
+    cached = Article(title="cached", html_content="")
+    crawler.cached = lambda url: cached
+    scheduler = make_scheduler(crawler=crawler)
+
+    assert scheduler.crawl("https://a.example/") is cached
+    assert crawler.calls == []
+
+
+def test_scheduler_drops_crawls_given_up_on_without_spending_tokens(make_scheduler):
+    crawler = _RecordingCrawler()
+    scheduler = make_scheduler(
+        crawler=crawler, domain_rate=0.01, domain_burst=2, domain_concurrency=1
+    )
+
+    # Hold the domain's only slot so that further crawls queue up.
+    gate = threading.Event()
+    original = crawler.crawl
+    crawler.crawl = lambda url: gate.wait(5) and original(url)
+    blocker = scheduler.submit("https://a.example/blocker")
+    time.sleep(0.05)
+    crawler.crawl = original
+
+    with pytest.raises(TimeoutError):
+        scheduler.crawl("https://a.example/slow", timeout=0.1)
+    time.sleep(0.05)
+    assert scheduler.stats()["domains"]["a.example"]["queued"] == 0
+
+    cancelled = scheduler.submit("https://a.example/cancelled")
+    assert cancelled.cancel()
+    gate.set()
+    blocker.result(timeout=5)
+    # The domain's second token is left for this crawl; at 0.01 tokens per
+    # second it would wait 100s had a cancelled crawl spent it.
+    assert scheduler.crawl("https://a.example/next", timeout=2).title.endswith("/next")
+    assert [url for _, url in crawler.calls] == [
+        "https://a.example/blocker",
+        "https://a.example/next",
+    ]
+
+
+def test_scheduler_honours_robots_txt(make_scheduler, robots_server):
+    crawler = _RecordingCrawler()
+    scheduler = make_scheduler(crawler=crawler, domain_rate=100, robots=RobotsCache())
+
+    with pytest.raises(CrawlDisallowedError):
+        scheduler.crawl(f"{robots_server}/private/page", timeout=5)
+    assert scheduler.crawl(f"{robots_server}/public", timeout=5).title.endswith(
+        "/public"
+    )
+
+    stats = scheduler.stats()
+    domain = stats["domains"]["127.0.0.1"]
+    assert domain["disallowed"] == 1
+    assert domain["completed"] == 1
+    # Crawl-delay: 1 lowers the domain's rate to one request per second.
+    assert domain["rate"] == pytest.approx(1.0)
+    assert domain["queue_latency_max"] >= 0
+    assert stats["robots"]["fetches"] == 1
+    assert _RobotsHandler.robots_requests == 1
+
+
+def test_scheduler_caps_crawl_delay(make_scheduler, robots_server):
+    scheduler = make_scheduler(
+        crawler=_RecordingCrawler(),
+        domain_rate=100,
+        robots=RobotsCache(),
+        max_crawl_delay=0.25,
+    )
+
+    scheduler.crawl(f"{robots_server}/public", timeout=5)
+    assert scheduler.stats()["domains"]["127.0.0.1"]["rate"] == pytest.approx(4.0)
+
+
+def test_robots_cache_allows_all_when_unreachable():
+    robots = RobotsCache(timeout=0.5)
+    assert robots.allowed("http://127.0.0.1:9/anything")
@@ -0,0 +1,113 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from src.config import CrawlerEngine
+from src.crawler import Crawler, CrawlCache, ExtractionPool
+from src.crawler.direct_client import DirectClient, FetchError, looks_js_rendered
+
+ARTICLE_HTML = (
+    "<html><head><title>Tangbao</title></head><body><article><h1>Tangbao</h1>"
+    + "<p>Soup dumplings from Nanjing are steamed in bamboo baskets.</p>" * 10
+    + "</article></body></html>"
+)
+APP_SHELL_HTML = (
+    "<html><head><title>App</title></head><body><div id='root'></div>"
+    "<script src='/bundle.js'></script></body></html>"
+)
+
+ROUTES = {
+    "/article": (200, "text/html; charset=utf-8", ARTICLE_HTML.encode("utf-8")),
+    "/app": (200, "text/html", APP_SHELL_HTML.encode("utf-8")),
+    "/report.pdf": (200, "application/pdf", b"%PDF-1.4"),
+    "/error": (500, "text/html", b"<html>oops</html>"),
+    "/big": (200, "text/html", b"<html><body>" + b"<p>x</p>" * 100_000),
+}
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        status, content_type, body = ROUTES[self.path]
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"fixture"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fixture_server(local_server):
+    return local_server(_FixtureHandler)
+
+
+@pytest.fixture
+def jina_calls(monkeypatch):
+    calls = []
+
+    def fake_crawl(self, url, return_format="html"):
+        calls.append(url)
+        return ARTICLE_HTML
+
+    monkeypatch.setattr("src.crawler.crawler.JinaClient.crawl", fake_crawl)
+    monkeypatch.setattr(
+        "src.crawler.crawler.SELECTED_CRAWLER_ENGINE", CrawlerEngine.DIRECT.value
+    )
+    return calls
+
+
+def _crawler(tmp_path) -> Crawler:
+    return Crawler(
+        cache=CrawlCache(str(tmp_path)),
+        extraction_pool=ExtractionPool(max_workers=0, use_readability=False),
+    )
+
+
+def test_direct_client_fetches_html(fixture_server):
+    page = DirectClient().fetch(f"{fixture_server}/article")
+    assert page.status_code == 200
+    assert page.html == ARTICLE_HTML
+    assert page.etag == '"fixture"'
+    assert not page.truncated
+
+
+def test_direct_client_rejects_non_html(fixture_server):
+    with pytest.raises(FetchError):
+        DirectClient().fetch(f"{fixture_server}/report.pdf")
+
+
+def test_direct_client_rejects_error_status(fixture_server):
+    with pytest.raises(FetchError):
+        DirectClient().fetch(f"{fixture_server}/error")
+
+
+def test_direct_client_caps_body_size(fixture_server):
+    page = DirectClient(max_bytes=1024).fetch(f"{fixture_server}/big")
+    assert page.truncated
+    assert len(page.html) == 1024
+
+
+def test_looks_js_rendered():
+    assert looks_js_rendered(APP_SHELL_HTML)
+    assert not looks_js_rendered(ARTICLE_HTML)
+
+
+def test_crawler_uses_direct_fetch(tmp_path, fixture_server, jina_calls):
+    crawler = _crawler(tmp_path)
+    article = crawler.crawl(f"{fixture_server}/article")
+
+    assert "Soup dumplings" in article.to_markdown()
+    assert jina_calls == []
+    assert crawler.cache.get(f"{fixture_server}/article").etag == '"fixture"'
+
+
+@pytest.mark.parametrize("path", ["/app", "/error", "/report.pdf"])
+def test_crawler_falls_back_to_jina(tmp_path, fixture_server, jina_calls, path):
+    _crawler(tmp_path).crawl(f"{fixture_server}{path}")
+    assert jina_calls == [f"{fixture_server}{path}"]
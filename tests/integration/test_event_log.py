@@ -0,0 +1,178 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import importlib
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessageChunk
+
+from src.server.event_log import EventLogRegistry, RunInProgress, parse_event_id
+
+server_app = importlib.import_module("src.server.app")
+
+
+async def _tokens(count, delay=0.0, runs=None):
+    if runs is not None:
+        runs.append(1)
+    for i in range(count):
+        yield "message_chunk", {"id": "msg", "content": f"t{i}"}
+        await asyncio.sleep(delay)
+
+
+def _ids(frames):
+    return [int(frame.split("\n")[0][len("id: ") :]) for frame in frames]
+
+
+def test_resume_after_disconnect_does_not_rerun():
+    async def scenario():
+        registry = EventLogRegistry()
+        runs = []
+        log = registry.start("thread", _tokens(6, delay=0.01, runs=runs))
+
+        received = []
+        follower = log.follow()
+        async for frame in follower:
+            received.append(frame)
+            if len(received) == 2:
+                break
+        await follower.aclose()
+
+        resumed = registry.resume("thread", parse_event_id("1"))
+        rest = [frame async for frame in resumed.follow(1)]
+        return runs, _ids(received), _ids(rest), registry.stats()
+
+    runs, received, rest, stats = asyncio.run(scenario())
+    assert runs == [1]
+    assert received == [0, 1]
+    assert rest == [2, 3, 4, 5]
+    assert stats["resumes"] == 1
+
+
+def test_old_events_are_replayed_from_the_spill_file(tmp_path):
+    async def scenario():
+        registry = EventLogRegistry(max_events=2, spill_dir=str(tmp_path))
+        log = registry.start("thread", _tokens(5))
+        await log.task
+        assert log.spilled == 3
+        return [frame async for frame in registry.resume("thread", 0).follow(0)]
+
+    frames = asyncio.run(scenario())
+    assert _ids(frames) == [1, 2, 3, 4]
+    assert '"content": "t1"' in frames[0]
+
+
+def test_dropped_events_cannot_be_resumed():
+    async def scenario():
+        registry = EventLogRegistry(max_events=2)
+        log = registry.start("thread", _tokens(5))
+        await log.task
+        # A second run of the thread continues the numbering.
+        second = registry.start("thread", _tokens(1))
+        await second.task
+        return registry, second
+
+    registry, second = asyncio.run(scenario())
+    assert second.first_seq == 5
+    assert registry.resume("thread", 0) is None
+    assert registry.resume("thread", 4) is second
+    assert registry.resume("other", 0) is None
+    assert parse_event_id("abc") is None
+
+
+def test_chat_stream_resumes_with_last_event_id(monkeypatch):
+    calls = []
+
+    class FakeGraph:
+        async def astream(self, *args, **kwargs):
+            calls.append(1)
+            for token in ["a", "b", "c"]:
+                chunk = AIMessageChunk(content=token, id="run-1")
+                yield ("reporter:1",), "messages", (chunk, {})
+
+    monkeypatch.setattr(server_app, "graph", FakeGraph())
+    monkeypatch.setattr(server_app, "get_event_logs", lambda: registry)
+    registry = EventLogRegistry()
+    body = {"thread_id": "resumable", "messages": [], "auto_accepted_plan": True}
+    with TestClient(server_app.app) as client:
+        first = client.post("/api/chat/stream", json=body)
+        assert first.text.count("event: message_chunk") == 3
+        assert first.text.startswith("id: 0\n")
+
+        resumed = client.post(
+            "/api/chat/stream", json=body, headers={"Last-Event-ID": "0"}
+        )
+        assert resumed.status_code == 200
+        assert resumed.text.startswith("id: 1\n")
+        assert resumed.text.count("event: message_chunk") == 2
+        assert calls == [1]
+
+        missing = client.post(
+            "/api/chat/stream",
+            json={**body, "thread_id": "unknown"},
+            headers={"Last-Event-ID": "0"},
+        )
+        assert missing.status_code == 404
+
+        # The run has finished, so there is nothing left to cancel.
+        assert client.delete("/api/chat/stream/resumable").status_code == 404
+
+
+def test_slow_client_holds_back_the_run_instead_of_losing_events():
+    async def scenario():
+        registry = EventLogRegistry(max_events=3)
+        log = registry.start("thread", _tokens(10))
+        frames = []
+        async for frame in log.follow():
+            frames.append(frame)
+            # The run may only get max_events ahead of the client.
+            assert len(log._events) <= 4
+            await asyncio.sleep(0.01)
+        return frames
+
+    assert _ids(asyncio.run(scenario())) == list(range(10))
+
+
+def test_late_client_is_told_about_dropped_events():
+    async def scenario():
+        registry = EventLogRegistry(max_events=3)
+        log = registry.start("thread", _tokens(10))
+        await log.task
+        return [frame async for frame in log.follow()]
+
+    frames = asyncio.run(scenario())
+    assert len(frames) == 1
+    assert frames[0].startswith("event: error\n")
+    assert "no longer available" in frames[0]
+
+
+def test_runs_of_a_thread_do_not_overlap_and_can_be_cancelled():
+    async def scenario():
+        registry = EventLogRegistry()
+        log = registry.start("thread", _tokens(100, delay=0.01))
+        with pytest.raises(RunInProgress):
+            registry.start("thread", _tokens(1))
+        assert await registry.cancel("thread")
+        assert not await registry.cancel("thread")
+        return log, registry.start("thread", _tokens(1))
+
+    log, second = asyncio.run(scenario())
+    assert log.task.cancelled()
+    assert log.finished
+    assert second.first_seq == log.last_seq + 1
+
+
+def test_abandoned_runs_are_cancelled():
+    async def scenario():
+        registry = EventLogRegistry(abandon_timeout=0.05)
+        log = registry.start(
+            "thread", _tokens(100, delay=0.01), cancel_when_abandoned=True
+        )
+        follower = log.follow()
+        await follower.__anext__()
+        await follower.aclose()
+        await asyncio.wait({log.task}, timeout=5)
+        return log
+
+    assert asyncio.run(scenario()).task.cancelled()
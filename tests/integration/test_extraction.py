@@ -0,0 +1,72 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+
+import pytest
+
+from src.crawler import ExtractionPool
+
+PAGE_HTML = (
+    "<html><head><title>Tangbao</title></head><body><nav>Home | About</nav>"
+    "<article><h1>Tangbao</h1><p>Soup dumplings from <b>Nanjing</b>.</p></article>"
+    "</body></html>"
+)
+
+
+@pytest.fixture
+def pool():
+    pool = ExtractionPool(max_workers=1, time_budget=60, use_readability=False)
+    yield pool
+    pool.shutdown()
+
+
+def test_extract_in_worker_process(pool):
+    article = pool.extract(PAGE_HTML, "https://example.com/tangbao")
+
+    assert article.title == "Tangbao"
+    assert article.url == "https://example.com/tangbao"
+    assert article.markdown_content is not None
+    assert "Soup dumplings from Nanjing." in article.to_markdown()
+    assert pool.stats()["extracted"] == 1
+
+
+def test_aextract(pool):
+    article = asyncio.run(pool.aextract(PAGE_HTML, "https://example.com/tangbao"))
+    assert article.title == "Tangbao"
+
+
+def test_extract_inline_without_workers():
+    pool = ExtractionPool(max_workers=0, use_readability=False)
+    article = pool.extract(PAGE_HTML, "https://example.com/tangbao")
+    assert "Nanjing" in article.to_markdown()
+
+
+def test_extract_enforces_time_budget():
+    pool = ExtractionPool(max_workers=1, time_budget=0.001, use_readability=False)
+    try:
+        with pytest.raises(TimeoutError):
+            pool.extract(PAGE_HTML, "https://example.com/tangbao")
+        assert pool.stats()["timeouts"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_timed_out_workers_are_killed():
+    pool = ExtractionPool(max_workers=1, time_budget=60, use_readability=False)
+    try:
+        pool.extract(PAGE_HTML, "https://example.com/tangbao")
+        workers = list(pool._executor._processes.values())
+
+        # A page large enough to outlast a tiny budget.
+        pool.time_budget = 0.01
+        with pytest.raises(TimeoutError):
+            pool.extract(PAGE_HTML * 2000, "https://example.com/huge")
+        for worker in workers:
+            worker.join(timeout=5)
+            assert not worker.is_alive()
+
+        pool.time_budget = 60
+        assert pool.extract(PAGE_HTML, "https://example.com/tangbao").title == "Tangbao"
+    finally:
+        pool.shutdown()
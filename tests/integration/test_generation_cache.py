@@ -0,0 +1,128 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import importlib
+import io
+import os
+import time
+
+import httpx
+import pytest
+from langchain_core.language_models import GenericFakeChatModel
+
+from src.podcast.graph.tts_node import audio_settings
+from src.server import generation_cache
+from src.server.admission import AdmissionController
+from src.server.generation_cache import GenerationCache, generation_key
+
+server_app = importlib.import_module("src.server.app")
+
+
+class FakeModel(GenericFakeChatModel):
+    model_name: str = "fake-1"
+
+
+class FakePPTGraph:
+    def __init__(self):
+        self.runs = 0
+
+    def invoke(self, state):
+        self.runs += 1
+        time.sleep(0.2)
+        return {"output": io.BytesIO(b"pptx:" + state["input"].encode())}
+
+
+def test_generation_cache_evicts_least_recently_used(tmp_path):
+    cache = GenerationCache(str(tmp_path), max_bytes=25)
+    cache.put("a", "ppt", io.BytesIO(b"a" * 10))
+    cache.put("b", "ppt", io.BytesIO(b"b" * 10))
+    with cache.open("a") as f:
+        assert f.read() == b"a" * 10
+    cache.put("c", "podcast", io.BytesIO(b"c" * 10))
+    assert cache.open("b") is None
+    assert not (tmp_path / "b.bin").exists()
+    huge = io.BytesIO(b"x" * 26)
+    cache.put("huge", "ppt", huge)
+    assert cache.open("huge") is None
+    assert huge.tell() == 0
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["size_bytes"] == 20
+    assert stats["hits"] == 1
+    assert stats["bytes_saved"] == 10
+
+
+def test_generation_cache_removes_failed_copies(monkeypatch, tmp_path):
+    cache = GenerationCache(str(tmp_path))
+
+    def fail(source, destination):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(generation_cache.os, "replace", fail)
+    file = io.BytesIO(b"a" * 10)
+    with pytest.raises(OSError, match="disk full"):
+        cache.put("a", "ppt", file)
+    assert file.tell() == 0
+    assert not [name for name in os.listdir(tmp_path) if "generation_cache" not in name]
+    assert cache.open("a") is None
+
+
+def test_generation_key_covers_prompts_and_models(monkeypatch):
+    models = {"basic": FakeModel(messages=iter([]))}
+    monkeypatch.setattr(generation_cache, "get_llm_by_type", lambda t: models[t])
+    key = generation_key("ppt", "report")
+    assert generation_key("ppt", "report") == key
+    assert generation_key("ppt", "another report") != key
+    assert generation_key("podcast", "report") != key
+    assert generation_key("podcast", "report", voices={"male": "x"}) != (
+        generation_key("podcast", "report")
+    )
+    podcast = generation_key("podcast", "report", **audio_settings())
+    monkeypatch.setenv("VOLCENGINE_TTS_CLUSTER", "another_cluster")
+    assert generation_key("podcast", "report", **audio_settings()) != podcast
+
+    models["basic"] = FakeModel(messages=iter([]), model_name="fake-2")
+    assert generation_key("ppt", "report") != key
+    models["basic"] = FakeModel(messages=iter([]))
+    monkeypatch.setattr(
+        generation_cache, "get_prompt_template", lambda name: "A new prompt"
+    )
+    assert generation_key("ppt", "report") != key
+
+
+def test_repeated_ppt_requests_are_served_from_cache(monkeypatch, tmp_path):
+    cache = GenerationCache(str(tmp_path))
+    graph = FakePPTGraph()
+    monkeypatch.setattr(
+        generation_cache, "get_llm_by_type", lambda t: FakeModel(messages=iter([]))
+    )
+    monkeypatch.setattr(server_app, "get_generation_cache", lambda: cache)
+    monkeypatch.setattr(server_app, "get_graph", lambda name: graph)
+    controller = AdmissionController("ppt", max_concurrent=4, max_queue=4)
+    monkeypatch.setattr(server_app, "get_admission_controller", lambda name: controller)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=server_app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+
+            def generate(content):
+                return c.post("/api/ppt/generate", json={"content": content})
+
+            # A double click: the second request waits for the first one.
+            first, second = await asyncio.gather(generate("report"), generate("report"))
+            started = time.perf_counter()
+            third = await generate("report")
+            elapsed = time.perf_counter() - started
+            other = await generate("other report")
+            return [first, second, third, other], elapsed
+
+    responses, elapsed = asyncio.run(scenario())
+    assert [r.status_code for r in responses] == [200] * 4
+    assert [r.content for r in responses] == [b"pptx:report"] * 3 + [
+        b"pptx:other report"
+    ]
+    assert responses[2].headers["content-length"] == str(len(b"pptx:report"))
+    assert graph.runs == 2
+    assert elapsed < 0.2
+    assert cache.stats()["hits"] == 2
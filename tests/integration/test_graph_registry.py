@@ -0,0 +1,59 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import src.ppt.graph.builder as ppt_builder
+from src.graph.registry import GraphRegistry, GraphSpec, get_graph
+
+_builds = []
+
+
+def build_counted_graph():
+    # Slow enough for concurrent first requests to overlap.
+    time.sleep(0.05)
+    _builds.append(threading.get_ident())
+    return object()
+
+
+def test_graph_is_compiled_once():
+    _builds.clear()
+    registry = GraphRegistry({"counted": GraphSpec(f"{__name__}:build_counted_graph")})
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        graphs = list(executor.map(lambda _: registry.get("counted"), range(8)))
+    assert len(_builds) == 1
+    assert all(graph is graphs[0] for graph in graphs)
+    assert registry.stats()["compiled"] == ["counted"]
+    with pytest.raises(KeyError):
+        registry.get("missing")
+
+
+def test_warmup_loads_prompts_and_skips_failures(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    registry = GraphRegistry(
+        {
+            "ppt": GraphSpec(
+                "src.ppt.graph.builder:build_graph",
+                prompts=("ppt/ppt_composer",),
+                agents=("ppt_composer",),
+            ),
+            "broken": GraphSpec(
+                "src.ppt.graph.builder:build_graph", prompts=("missing_prompt",)
+            ),
+        }
+    )
+    timings = registry.warmup()
+    assert list(timings) == ["ppt"]
+    assert registry.stats()["warmed"] == ["ppt"]
+    # The graph itself compiled before its prompt failed to load.
+    assert registry.stats()["compiled"] == ["broken", "ppt"]
+
+
+def test_builder_modules_resolve_graphs_from_registry():
+    assert ppt_builder.workflow is get_graph("ppt")
+    with pytest.raises(AttributeError):
+        ppt_builder.missing
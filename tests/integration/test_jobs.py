@@ -0,0 +1,280 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import importlib
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessageChunk
+
+from src.server.event_log import EventLogRegistry
+from src.server.jobs import (
+    Job,
+    JobManager,
+    JobQueueFull,
+    MemoryJobQueue,
+    SQLiteJobQueue,
+)
+
+server_app = importlib.import_module("src.server.app")
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def queue(request, tmp_path):
+    if request.param == "memory":
+        return MemoryJobQueue(max_queued=3)
+    return SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"), max_queued=3)
+
+
+def test_queue_claims_in_order(queue):
+    jobs = [Job(thread_id=f"t{i}", request={"n": i}, created_at=i) for i in range(3)]
+    for job in jobs:
+        queue.put(job)
+    with pytest.raises(JobQueueFull):
+        queue.put(Job(thread_id="t3", request={}))
+
+    assert queue.position(jobs[2].job_id) == 2
+    assert queue.cancel(jobs[1].job_id)
+    assert not queue.cancel(jobs[1].job_id)
+
+    claimed = queue.claim()
+    assert claimed.job_id == jobs[0].job_id
+    assert claimed.status == "running"
+    assert claimed.request == {"n": 0}
+    assert queue.claim().job_id == jobs[2].job_id
+    assert queue.claim() is None
+
+    queue.update(claimed.job_id, status="succeeded", final_report="# Report")
+    assert queue.get(claimed.job_id).final_report == "# Report"
+    assert queue.counts()["cancelled"] == 1
+    assert queue.position(jobs[2].job_id) is None
+
+
+def test_expired_leases_are_queued_again(queue):
+    first, second = Job(thread_id="t0", request={}), Job(thread_id="t1", request={})
+    queue.put(first)
+    queue.put(second)
+    assert queue.claim(lease=0).job_id == first.job_id
+    assert queue.claim(lease=60).job_id == second.job_id
+    time.sleep(0.01)
+    queue.renew(second.job_id, lease=60)
+
+    # Only the job whose worker stopped renewing it goes back to the queue.
+    assert queue.requeue_expired() == 1
+    assert queue.get(first.job_id).status == "queued"
+    assert queue.get(second.job_id).status == "running"
+    reclaimed = queue.claim()
+    assert reclaimed.job_id == first.job_id
+    assert reclaimed.lease_expires > time.time()
+    assert "lease_expires" not in reclaimed.to_dict()
+
+
+def test_sqlite_queue_is_shared_without_double_claims(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    producer = SQLiteJobQueue(path, max_queued=100)
+    for i in range(40):
+        producer.put(Job(thread_id=f"t{i}", request={}))
+
+    claimed = []
+
+    def consume():
+        # A queue instance per thread, as separate server processes would have.
+        consumer = SQLiteJobQueue(path)
+        while (job := consumer.claim()) is not None:
+            claimed.append(job.job_id)
+
+    threads = [threading.Thread(target=consume) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(claimed) == len(set(claimed)) == 40
+
+
+def _manager(run, finalize=None, max_workers=1):
+    async def default_finalize(job):
+        return {"final_report": f"report of {job.thread_id}"}
+
+    registry = EventLogRegistry()
+    return JobManager(
+        MemoryJobQueue(),
+        run=run,
+        finalize=finalize or default_finalize,
+        event_logs=lambda: registry,
+        max_workers=max_workers,
+        poll_interval=0.05,
+    )
+
+
+async def _wait_finished(manager, job_id):
+    while not (job := await manager.get(job_id)).finished:
+        await asyncio.sleep(0.01)
+    return job
+
+
+def test_manager_runs_jobs_with_bounded_workers():
+    active = []
+    peak = []
+
+    async def run(job):
+        active.append(job.job_id)
+        peak.append(len(active))
+        for i in range(3):
+            await asyncio.sleep(0.01)
+            yield "message_chunk", {"content": f"{job.thread_id}-{i}"}
+        active.remove(job.job_id)
+
+    async def scenario():
+        manager = _manager(run, max_workers=2)
+        jobs = [await manager.submit(f"t{i}", {}) for i in range(5)]
+        frames = [frame async for frame in manager.follow(jobs[4])]
+        finished = [await _wait_finished(manager, job.job_id) for job in jobs]
+        stats = manager.stats()
+        await manager.shutdown()
+        return frames, finished, stats
+
+    frames, finished, stats = asyncio.run(scenario())
+    assert max(peak) == 2
+    assert [job.status for job in finished] == ["succeeded"] * 5
+    assert finished[4].final_report == "report of t4"
+    assert frames[0] == ": queued\n\n"
+    assert sum("t4-" in frame for frame in frames) == 3
+    assert stats["jobs"]["succeeded"] == 5
+
+
+def test_failed_and_cancelled_jobs():
+    async def run(job):
+        if job.thread_id == "bad":
+            raise RuntimeError("graph failed")
+        yield "message_chunk", {"content": "start"}
+        await asyncio.sleep(30)
+
+    async def scenario():
+        manager = _manager(run)
+        bad = await manager.submit("bad", {})
+        slow = await manager.submit("slow", {})
+        bad = await _wait_finished(manager, bad.job_id)
+        while (await manager.get(slow.job_id)).status != "running":
+            await asyncio.sleep(0.01)
+        assert await manager.cancel(slow.job_id)
+        slow = await _wait_finished(manager, slow.job_id)
+        await manager.shutdown()
+        return bad, slow
+
+    bad, slow = asyncio.run(scenario())
+    assert bad.status == "failed"
+    assert bad.error == "graph failed"
+    assert slow.status == "cancelled"
+
+
+def test_jobs_of_a_stopped_process_are_run_again(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    job = Job(thread_id="orphan", request={})
+    crashed = SQLiteJobQueue(path)
+    crashed.put(job)
+    # Claimed by a process that never renews the lease.
+    crashed.claim(lease=0)
+
+    async def run(job):
+        yield "message_chunk", {"content": "again"}
+
+    async def scenario():
+        registry = EventLogRegistry()
+        manager = JobManager(
+            SQLiteJobQueue(path),
+            run=run,
+            finalize=lambda job: asyncio.sleep(0, {"final_report": "done"}),
+            event_logs=lambda: registry,
+            poll_interval=0.05,
+        )
+        manager.start()
+        finished = await _wait_finished(manager, job.job_id)
+        await manager.shutdown()
+        return finished
+
+    finished = asyncio.run(scenario())
+    assert finished.status == "succeeded"
+    assert finished.final_report == "done"
+
+
+def test_shutdown_leaves_running_jobs_to_be_claimed_again():
+    async def run(job):
+        yield "message_chunk", {"content": "start"}
+        await asyncio.sleep(30)
+
+    async def scenario():
+        manager = _manager(run)
+        job = await manager.submit("slow", {})
+        while (await manager.get(job.job_id)).status != "running":
+            await asyncio.sleep(0.01)
+        await manager.shutdown()
+        assert manager.queue.requeue_expired() == 1
+        return await manager.get(job.job_id)
+
+    job = asyncio.run(scenario())
+    assert job.status == "queued"
+    assert job.finished_at is None
+
+
+def test_job_endpoints(monkeypatch):
+    class FakeGraph:
+        async def astream(self, *args, **kwargs):
+            for token in ["Deep", " research"]:
+                await asyncio.sleep(0.01)
+                chunk = AIMessageChunk(content=token, id="run-1")
+                yield ("reporter:1",), "messages", (chunk, {})
+
+        async def aget_state(self, config):
+            return SimpleNamespace(values={"final_report": "# Findings"}, next=())
+
+    monkeypatch.setattr(server_app, "graph", FakeGraph())
+    body = {"thread_id": "job-thread", "messages": [], "auto_accepted_plan": True}
+    with TestClient(server_app.app) as client:
+        submitted = client.post("/api/jobs", json=body)
+        assert submitted.status_code == 202
+        job_id = submitted.json()["job_id"]
+
+        events = client.get(f"/api/jobs/{job_id}/events")
+        assert events.text.count("event: message_chunk") == 2
+
+        deadline = time.time() + 10
+        while client.get(f"/api/jobs/{job_id}").json()["status"] != "succeeded":
+            assert time.time() < deadline
+            time.sleep(0.02)
+        report = client.get(f"/api/jobs/{job_id}/report").json()
+        assert report["final_report"] == "# Findings"
+        assert report["thread_id"] == "job-thread"
+
+        assert client.get("/api/jobs/missing").status_code == 404
+        assert client.delete(f"/api/jobs/{job_id}").status_code == 409
+
+
+def test_metrics_are_collected_off_the_event_loop(monkeypatch):
+    served = threading.Event()
+
+    def counts():
+        # A slow database; other requests are served in the meantime.
+        return {"queued": 0, "served_meanwhile": served.wait(2)}
+
+    monkeypatch.setattr(server_app.job_manager.queue, "counts", counts)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=server_app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+
+            async def other():
+                await asyncio.sleep(0.05)
+                response = await c.get("/api/jobs/missing")
+                served.set()
+                return response
+
+            return await asyncio.gather(c.get("/api/metrics"), other())
+
+    metrics, other = asyncio.run(scenario())
+    assert other.status_code == 404
+    assert metrics.json()["jobs"]["jobs"]["served_meanwhile"] is True
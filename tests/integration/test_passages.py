@@ -0,0 +1,71 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from types import SimpleNamespace
+
+from src.crawler import Article
+from src.crawler.passages import bm25_scores, select_passages, split_passages
+from src.tools.crawl import crawl_tool
+
+PAGE_MARKDOWN = "\n\n".join(
+    [
+        "# Nanjing Food Guide",
+        "Home | News | Login | Subscribe to our newsletter for weekly updates.",
+        "## History",
+        "Nanjing was the capital of several dynasties. " * 8,
+        "## Tangbao",
+        "Tangbao are soup dumplings filled with pork and crab roe broth. "
+        "The best tangbao are steamed in bamboo baskets and eaten with vinegar.",
+        "## Transport",
+        "The metro connects the airport with the city center. " * 8,
+        "Copyright 2025. All rights reserved.",
+    ]
+)
+
+
+def test_split_passages_keeps_headings_with_their_paragraphs():
+    passages = split_passages(PAGE_MARKDOWN, chunk_chars=200)
+    assert any(p.startswith("## Tangbao\n\nTangbao are soup") for p in passages)
+    assert all(
+        not p.rstrip().endswith(("## History", "## Transport")) for p in passages
+    )
+
+
+def test_bm25_ranks_relevant_passage_first():
+    passages = split_passages(PAGE_MARKDOWN, chunk_chars=200)
+    scores = bm25_scores(passages, "How are tangbao soup dumplings made?")
+    assert passages[scores.argmax()].startswith("## Tangbao")
+
+
+def test_select_passages_respects_budget():
+    text = select_passages(PAGE_MARKDOWN, "tangbao dumplings", max_chars=300)
+    assert len(text) <= 300
+    assert "soup dumplings" in text
+    assert "Subscribe" not in text
+
+
+def test_select_passages_without_query_truncates():
+    assert select_passages(PAGE_MARKDOWN, "", max_chars=100) == PAGE_MARKDOWN[:100]
+
+
+def test_crawl_tool_selects_passages_for_research_step(monkeypatch):
+    article = Article(title="Nanjing", html_content="", markdown_content=PAGE_MARKDOWN)
+    monkeypatch.setattr(
+        "src.tools.crawl.get_crawl_scheduler",
+        lambda: SimpleNamespace(crawl=lambda url, timeout=None: article),
+    )
+
+    result = crawl_tool.invoke(
+        {"url": "https://example.com/nanjing"},
+        config={
+            "configurable": {
+                "research_step": {
+                    "title": "Tangbao",
+                    "description": "Find out what fills Nanjing soup dumplings",
+                }
+            }
+        },
+    )
+
+    assert "crab roe" in result["crawled_content"]
+    assert len(result["crawled_content"]) <= 1000
@@ -0,0 +1,252 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import base64
+import importlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import PydanticOutputParser
+
+from src.podcast import pipeline
+from src.podcast.audio import Mp3Writer, iter_frames
+from src.podcast.graph import tts_node as tts_node_module
+from src.podcast.graph.tts_node import VOICES, tts_node
+from src.podcast.pipeline import stream_podcast
+from src.podcast.types import Script, ScriptLine
+from src.server.admission import AdmissionController
+from src.tools.tts import VolcengineTTS
+
+server_app = importlib.import_module("src.server.app")
+
+
+def _frame(payload: bytes, header: bytes = b"\xff\xfb\x90\x00") -> bytes:
+    # MPEG 1 layer III at 128 kbps and 44.1 kHz, whose frames are 417 bytes.
+    return header + payload.ljust(413, b"\0")
+
+
+def _mp3(*payloads: bytes) -> bytes:
+    """An MP3 file like TTS returns: ID3v2 tag, Info frame, audio, ID3v1 tag."""
+    id3v2 = b"ID3\x04\x00\x00\x00\x00\x00\x05title"
+    info = _frame(b"\0" * 32 + b"Info")
+    id3v1 = b"TAG" + b"\0" * 125
+    return id3v2 + info + b"".join(_frame(p) for p in payloads) + id3v1
+
+
+def _line_audio(voice_type: str, text: str) -> bytes:
+    return _frame(f"{voice_type}:{text}".encode())
+
+
+class FakeTTS:
+    """Stands in for the volcengine TTS API with a fixed round trip."""
+
+    def __init__(self, monkeypatch, local_server, delay=0.1, failures=()):
+        self.delay = delay
+        self.failures = set(failures)
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                status, response = fake(
+                    body["request"]["text"], body["audio"]["voice_type"]
+                )
+                data = json.dumps(response).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.url = local_server(Handler)
+        monkeypatch.setenv("VOLCENGINE_TTS_API_URL", self.url)
+
+    def __call__(self, text, voice_type):
+        with self._lock:
+            self.calls.append((text, voice_type))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            failed = text in self.failures
+            self.failures.discard(text)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if failed:
+            return 429, {"message": "throttled"}
+        audio = _mp3(f"{voice_type}:{text}".encode())
+        return 200, {"code": 3000, "data": base64.b64encode(audio).decode()}
+
+
+def _script(count):
+    speakers = ["male", "female"]
+    return Script(
+        lines=[
+            ScriptLine(speaker=speakers[i % 2], paragraph=f"line {i}")
+            for i in range(count)
+        ]
+    )
+
+
+def test_tts_lines_are_synthesized_concurrently_in_order(monkeypatch, local_server):
+    monkeypatch.setenv("VOLCENGINE_TTS_APPID", "app")
+    monkeypatch.setenv("VOLCENGINE_TTS_ACCESS_TOKEN", "token")
+    monkeypatch.setenv("PODCAST_TTS_CONCURRENCY", "4")
+    monkeypatch.setattr(tts_node_module, "RETRY_BACKOFF", 0.01)
+    monkeypatch.setenv("TTS_CACHE_ENABLED", "false")
+    fake = FakeTTS(monkeypatch, local_server, delay=0.1, failures={"line 3"})
+    # Starts the background loop and its HTTP client outside the timing.
+    tts_node({"script": _script(1)})
+
+    started = time.perf_counter()
+    result = tts_node({"script": _script(8)})
+    elapsed = time.perf_counter() - started
+
+    # The lines are joined frame by frame, without their tags and Info frames.
+    assert result["audio"].finish().read() == b"".join(
+        _line_audio("BV002_streaming" if i % 2 == 0 else "BV001_streaming", f"line {i}")
+        for i in range(8)
+    )
+    # 8 lines and a retry take 0.9s one at a time, and 0.3s four at a time.
+    assert fake.max_active == 4
+    assert elapsed < 0.6
+    assert [text for text, _ in fake.calls].count("line 3") == 2
+
+
+def test_tts_node_fails_when_a_line_fails(monkeypatch, local_server):
+    monkeypatch.setenv("VOLCENGINE_TTS_APPID", "app")
+    monkeypatch.setenv("VOLCENGINE_TTS_ACCESS_TOKEN", "token")
+    monkeypatch.setenv("PODCAST_TTS_RETRIES", "0")
+    monkeypatch.setenv("TTS_CACHE_ENABLED", "false")
+    FakeTTS(monkeypatch, local_server, delay=0.01, failures={"line 2"})
+
+    with pytest.raises(RuntimeError, match="podcast line 3 of 4"):
+        tts_node({"script": _script(4)})
+
+
+class SlowChatModel(GenericFakeChatModel):
+    """Streams its answer a word at a time, like a model writing a script."""
+
+    def _stream(self, *args, **kwargs):
+        for chunk in super()._stream(*args, **kwargs):
+            time.sleep(0.01)
+            yield chunk
+
+
+def _fake_script_writer(monkeypatch, script):
+    model = SlowChatModel(messages=iter([AIMessage(content=script.model_dump_json())]))
+    writer = model | PydanticOutputParser(pydantic_object=Script)
+    monkeypatch.setattr(pipeline, "create_script_writer", lambda: writer)
+
+
+def test_podcast_audio_streams_while_script_is_written(monkeypatch, local_server):
+    monkeypatch.setattr(tts_node_module, "RETRY_BACKOFF", 0.01)
+    script = _script(6)
+    for line in script.lines:
+        line.paragraph += " with some more words to say" * 2
+    fake = FakeTTS(
+        monkeypatch, local_server, delay=0.05, failures={script.lines[2].paragraph}
+    )
+    _fake_script_writer(monkeypatch, script)
+
+    started = time.perf_counter()
+    arrivals = []
+    chunks = []
+    client = VolcengineTTS(appid="app", access_token="token", api_url=fake.url)
+    for chunk in stream_podcast("report", client, concurrency=2, retries=1):
+        arrivals.append(time.perf_counter() - started)
+        chunks.append(chunk)
+
+    assert chunks == [
+        _line_audio(VOICES[line.speaker], line.paragraph) for line in script.lines
+    ]
+    # The first line is heard long before the script is finished.
+    assert arrivals[0] < arrivals[-1] / 3
+    assert [text for text, _ in fake.calls].count(script.lines[2].paragraph) == 2
+
+
+def test_podcast_stream_endpoint(monkeypatch, local_server):
+    monkeypatch.setenv("VOLCENGINE_TTS_APPID", "app")
+    monkeypatch.setenv("VOLCENGINE_TTS_ACCESS_TOKEN", "token")
+    monkeypatch.setenv("TTS_CACHE_ENABLED", "false")
+    FakeTTS(monkeypatch, local_server, delay=0.01)
+    _fake_script_writer(monkeypatch, _script(3))
+    controller = AdmissionController("podcast", max_concurrent=1, max_queue=1)
+    monkeypatch.setattr(server_app, "get_admission_controller", lambda name: controller)
+
+    with TestClient(server_app.app) as client:
+        response = client.post("/api/podcast/stream", json={"content": "report"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert response.content == b"".join(
+        _line_audio(VOICES[line.speaker], line.paragraph) for line in _script(3).lines
+    )
+    assert controller.stats()["running"] == 0
+
+    monkeypatch.delenv("VOLCENGINE_TTS_APPID")
+    with TestClient(server_app.app) as client:
+        response = client.post("/api/podcast/stream", json={"content": "report"})
+    assert response.status_code == 500
+
+
+def test_podcast_stream_endpoint_fails_instead_of_leaving_out_lines(
+    monkeypatch, local_server
+):
+    monkeypatch.setenv("VOLCENGINE_TTS_APPID", "app")
+    monkeypatch.setenv("VOLCENGINE_TTS_ACCESS_TOKEN", "token")
+    monkeypatch.setenv("TTS_CACHE_ENABLED", "false")
+    monkeypatch.setenv("PODCAST_TTS_RETRIES", "0")
+    controller = AdmissionController("podcast", max_concurrent=1, max_queue=1)
+    monkeypatch.setattr(server_app, "get_admission_controller", lambda name: controller)
+
+    # Without the first line there is no response to start.
+    FakeTTS(monkeypatch, local_server, delay=0.01, failures={"line 0"})
+    _fake_script_writer(monkeypatch, _script(3))
+    with TestClient(server_app.app) as client:
+        response = client.post("/api/podcast/stream", json={"content": "report"})
+    assert response.status_code == 500
+    assert "podcast line 1" in response.json()["detail"]
+    assert controller.stats()["running"] == 0
+
+    # A later line aborts the response that has started.
+    FakeTTS(monkeypatch, local_server, delay=0.01, failures={"line 1"})
+    _fake_script_writer(monkeypatch, _script(3))
+    with TestClient(server_app.app) as client:
+        with pytest.raises(RuntimeError, match="podcast line 2"):
+            client.post("/api/podcast/stream", json={"content": "report"})
+    assert controller.stats()["running"] == 0
+
+
+def test_mp3_frames_are_joined_without_tags_and_junk():
+    first, second = _frame(b"first"), _frame(b"second")
+    # MPEG 2 layer III at 64 kbps and 22.05 kHz, with padding: 209 bytes.
+    mpeg2 = b"\xff\xf3\x82\x00" + b"x" * 205
+    data = _mp3(b"first", b"second")[:-128] + mpeg2 + b"\xff\xfb" + b"cut"
+    assert [bytes(f) for f in iter_frames(b"junk\xff" + data)] == [
+        first,
+        second,
+        mpeg2,
+    ]
+
+    writer = Mp3Writer(max_memory=512)
+    writer.add(_mp3(b"first"))
+    writer.add(_mp3(b"second"))
+    # Not MP3: kept rather than lost.
+    writer.add(b"RIFF....WAVE")
+    with writer.finish() as output:
+        assert output.read() == first + second + b"RIFF....WAVE"
+        assert writer.size == len(first + second) + 12
@@ -0,0 +1,153 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import importlib
+import os
+import stat
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from src.ppt import renderer
+from src.ppt.graph import ppt_composer_node, ppt_generator_node
+from src.ppt.renderer import MarpPool
+
+server_app = importlib.import_module("src.server.app")
+
+# Stands in for marp: serves "pptx" renders of a directory, or renders a file.
+FAKE_MARP = """#!{python}
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+args = sys.argv[1:]
+if args[0] == "--server":
+    directory = args[1]
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path, _, query = self.path.partition("?")
+            with open(os.path.join(directory, path.lstrip("/")), "rb") as f:
+                body = f.read()
+            if query == "pptx":
+                body = f"pptx {{os.getpid()}} ".encode() + body
+            else:
+                body = b"<html>" + body + b"</html>"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    HTTPServer(("127.0.0.1", int(os.environ["PORT"])), Handler).serve_forever()
+else:
+    source, _, output = args
+    with open(source, "rb") as f:
+        markdown = f.read()
+    if b"broken" in markdown:
+        sys.exit("cannot render " + source)
+    with open(output, "wb") as f:
+        f.write(b"pptx cli " + markdown)
+"""
+
+
+@pytest.fixture
+def fake_marp(tmp_path):
+    path = tmp_path / "marp"
+    path.write_text(FAKE_MARP.format(python=sys.executable))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+def test_marp_pool_renders_on_warm_servers(fake_marp, tmp_path):
+    pool = MarpPool(workers=2, marp=fake_marp, temp_root=str(tmp_path))
+    try:
+        decks = [f"# Deck {i}" for i in range(6)]
+        with ThreadPoolExecutor(4) as executor:
+            outputs = [f.read() for f in executor.map(pool.render, decks)]
+        assert [output.split(b" ", 2)[2] for output in outputs] == [
+            deck.encode() for deck in decks
+        ]
+        # Every deck was rendered by one of the two servers started up front.
+        assert len({output.split(b" ")[1] for output in outputs}) == 2
+        assert os.listdir(pool.temp_dir) == []
+
+        # A server that died is replaced.
+        pool._workers[0].process.kill()
+        for deck in decks[:2]:
+            assert pool.render(deck).read().endswith(deck.encode())
+        stats = pool.stats()
+        assert stats["workers"] == 2
+        assert stats["restarts"] == 1
+        assert stats["renders"] == 8
+        assert stats["cli_renders"] == 0
+    finally:
+        pool.close()
+    assert not os.path.exists(pool.temp_dir)
+    assert all(worker.process.returncode is not None for worker in pool._workers)
+
+
+class _OtherServer(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "5")
+        self.end_headers()
+        self.wfile.write(b"other")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_marp_pool_does_not_mistake_another_server_for_marp(
+    monkeypatch, fake_marp, tmp_path, local_server
+):
+    # The first free port is taken by another server before marp binds it.
+    taken = int(local_server(_OtherServer).rsplit(":", 1)[1])
+    free_port = renderer._free_port
+    ports = iter([taken])
+    monkeypatch.setattr(
+        renderer, "_free_port", lambda: next(ports, None) or free_port()
+    )
+    pool = MarpPool(workers=1, marp=fake_marp, temp_root=str(tmp_path))
+    try:
+        assert pool.render("# Deck").read().endswith(b"# Deck")
+        assert pool._workers[0].url != f"http://127.0.0.1:{taken}"
+        assert pool.stats()["cli_renders"] == 0
+        assert os.listdir(pool.temp_dir) == []
+    finally:
+        pool.close()
+
+
+def test_marp_pool_renders_with_cli_without_workers(fake_marp, tmp_path):
+    pool = MarpPool(workers=0, marp=fake_marp, temp_root=str(tmp_path))
+    try:
+        assert pool.render("# Deck").read() == b"pptx cli # Deck"
+        with pytest.raises(RuntimeError, match="cannot render"):
+            pool.render("# broken")
+        assert os.listdir(pool.temp_dir) == []
+        assert pool.stats()["failures"] == 1
+    finally:
+        pool.close()
+
+
+def test_ppt_endpoint_streams_the_rendered_deck(monkeypatch, fake_marp, tmp_path):
+    monkeypatch.setenv("GENERATION_CACHE_ENABLED", "false")
+    pool = MarpPool(workers=1, marp=fake_marp, temp_root=str(tmp_path))
+    model = GenericFakeChatModel(messages=iter([AIMessage(content="# Slides")]))
+    monkeypatch.setattr(ppt_composer_node, "get_llm_by_type", lambda _: model)
+    monkeypatch.setattr(ppt_generator_node, "get_marp_pool", lambda: pool)
+    try:
+        with TestClient(server_app.app) as client:
+            response = client.post("/api/ppt/generate", json={"content": "report"})
+    finally:
+        pool.close()
+    assert response.status_code == 200
+    assert response.content.endswith(b" # Slides")
+    assert response.headers["content-length"] == str(len(response.content))
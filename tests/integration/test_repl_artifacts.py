@@ -0,0 +1,107 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.repl import ReplPool
+from src.repl.artifacts import ArtifactStore, thread_artifact_dir
+
+
+@pytest.fixture
+def prices():
+    index = pd.date_range(
+        "2024-01-01", periods=50, tz="America/New_York", name="Date", freq=None
+    )
+    return pd.DataFrame(
+        {
+            "Close": np.linspace(100, 150, 50),
+            "Volume": np.arange(50, dtype=np.int64),
+            "Ticker": ["NVDA"] * 50,
+            "Sector": pd.Categorical(["Tech"] * 50),
+        },
+        index=index,
+    )
+
+
+def test_dataframe_round_trip_is_memory_mapped(tmp_path, prices):
+    store = ArtifactStore(str(tmp_path))
+    summary = store.save("prices", prices)
+
+    assert summary.startswith("prices: DataFrame 50 rows, columns Close (float64)")
+    assert "index Date (datetime64[ns, America/New_York])" in summary
+    loaded = store.load("prices")
+    assert loaded.equals(prices)
+    assert loaded.index.name == "Date"
+    assert isinstance(loaded["Close"].values.base, np.memmap)
+
+
+def test_series_and_array_round_trip(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    series = pd.Series([1.5, 2.5], name="returns")
+    store.save("returns", series)
+    store.save("matrix", np.eye(3))
+
+    assert store.load("returns").equals(series)
+    matrix = store.load("matrix")
+    assert isinstance(matrix, np.memmap)
+    assert (matrix == np.eye(3)).all()
+    assert store.names() == ["matrix", "returns"]
+
+
+def test_store_rejects_bad_input(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=10_000)
+    with pytest.raises(ValueError):
+        store.save("../escape", np.zeros(1))
+    with pytest.raises(TypeError):
+        store.save("config", {"a": 1})
+    with pytest.raises(MemoryError):
+        store.save("big", np.zeros(10_000))
+    with pytest.raises(KeyError):
+        store.load("missing")
+    assert store.names() == []
+
+
+def test_artifacts_outlive_worker_restarts(tmp_path):
+    pool = ReplPool(
+        spare_workers=0,
+        max_executions=1,
+        preload=["numpy", "pandas"],
+        artifact_root=str(tmp_path),
+    )
+    try:
+        result = pool.run(
+            "import pandas as pd\n"
+            "df = pd.DataFrame({'close': [1.0, 2.0, 3.0]})\n"
+            "artifacts.save('closes', df)",
+            session_id="thread-1",
+        )
+        assert result.ok, result.error
+        assert result.artifacts == [
+            "closes: DataFrame 3 rows, columns close (float64); 0.1 KiB"
+        ]
+
+        # max_executions=1 recycled the worker, but the data is still on disk.
+        result = pool.run(
+            "print(artifacts.load('closes')['close'].sum())", session_id="thread-1"
+        )
+        assert result.session_restarted
+        assert result.output == "6.0\n"
+
+        assert pool.list_artifacts("thread-1") == [
+            "closes: DataFrame 3 rows, columns close (float64); 0.1 KiB"
+        ]
+        assert pool.list_artifacts("thread-2") == []
+        assert (
+            "KeyError"
+            in pool.run("artifacts.load('closes')", session_id="thread-2").error
+        )
+    finally:
+        pool.shutdown()
+
+
+def test_thread_directories_are_distinct(tmp_path):
+    root = str(tmp_path)
+    assert thread_artifact_dir(root, "a") != thread_artifact_dir(root, "b")
+    assert thread_artifact_dir(root, "../a").startswith(root)
@@ -0,0 +1,142 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import pytest
+
+from src.repl import ExecutionLimits, ReplPool
+from src.tools.python_repl import python_repl_tool
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ReplPool(
+        max_sessions=4,
+        limits=ExecutionLimits(wall_time=10, cpu_time=5, memory_mb=256),
+        memory_limit_mb=512,
+        preload=["numpy"],
+    )
+    yield pool
+    pool.shutdown()
+
+
+def test_sessions_keep_state_and_are_isolated(pool):
+    pool.run("x = 41", session_id="thread-a")
+    assert pool.run("print(x + 1)", session_id="thread-a").output == "42\n"
+
+    result = pool.run("print(x)", session_id="thread-b")
+    assert "NameError" in result.error
+
+
+def test_preloaded_modules_are_imported(pool):
+    result = pool.run("import sys; print('numpy' in sys.modules)", session_id="warm")
+    assert result.output == "True\n"
+
+
+def test_timeout_restarts_session(pool):
+    pool.run("y = 1", session_id="slow")
+    result = pool.run(
+        "import time; time.sleep(30)",
+        session_id="slow",
+        limits=ExecutionLimits(wall_time=0.5),
+    )
+    assert result.timed_out
+    assert "TimeoutError" in result.error
+    assert result.usage.wall_time < 5
+
+    result = pool.run("print(y)", session_id="slow")
+    assert result.session_restarted
+    assert "NameError" in result.error
+    assert pool.stats()["limits_exceeded"]["wall_time"] == 1
+
+
+def test_cpu_time_limit_keeps_session(pool):
+    pool.run("w = 1", session_id="busy")
+    result = pool.run(
+        "try:\n    while True: pass\nexcept Exception:\n    pass",
+        session_id="busy",
+        limits=ExecutionLimits(wall_time=10, cpu_time=1),
+    )
+    assert result.limit_exceeded == "cpu_time"
+    assert result.usage.cpu_time >= 0.9
+    assert pool.run("print(w)", session_id="busy").output == "1\n"
+
+
+def test_rss_limit_kills_worker(pool):
+    result = pool.run(
+        "import time; data = b'x' * (300 * 1024 * 1024); time.sleep(5)",
+        session_id="rss",
+    )
+    assert result.limit_exceeded == "memory"
+    assert result.usage.peak_rss_bytes > 256 * 1024 * 1024
+
+
+def test_output_is_capped(pool):
+    result = pool.run(
+        "for i in range(1000): print('x' * 99)",
+        session_id="chatty",
+        limits=ExecutionLimits(max_output_chars=500),
+    )
+    assert len(result.output) == 500
+    assert result.usage.output_chars == 100_000
+    assert result.usage.output_truncated
+
+
+def test_usage_is_reported(pool):
+    result = pool.run("print(sum(range(10)))", session_id="usage")
+    assert result.usage.wall_time > 0
+    assert result.usage.cpu_time is not None
+    assert result.usage.peak_rss_bytes > 0
+    assert pool.session_usage("usage")["executions"] == 1
+
+
+def test_thread_limits_can_only_tighten():
+    limits = ExecutionLimits(wall_time=60, memory_mb=1024)
+    tightened = limits.tightened({"wall_time": 5, "memory_mb": 4096, "bogus": 1})
+    assert tightened.wall_time == 5
+    assert tightened.memory_mb == 1024
+
+
+def test_tool_reports_resources():
+    result = python_repl_tool.invoke(
+        {"code": "print('x' * 50)"},
+        config={
+            "configurable": {
+                "thread_id": "tool-limits",
+                "python_repl_limits": {"max_output_chars": 10},
+            }
+        },
+    )
+    assert (
+        "Stdout: xxxxxxxxxx\n[Output truncated, 41 more characters omitted]" in result
+    )
+    assert "Resources: wall" in result
+
+
+def test_memory_limit(pool):
+    result = pool.run("data = bytearray(1024 ** 3)", session_id="hungry")
+    assert result.limit_exceeded == "memory"
+    assert "MemoryError" in result.error
+    assert pool.run("print('alive')", session_id="hungry").output == "alive\n"
+
+
+def test_worker_recycled_after_max_executions():
+    pool = ReplPool(spare_workers=0, max_executions=2, preload=[])
+    try:
+        pool.run("z = 1")
+        assert pool.run("print(z)").ok
+        result = pool.run("print(z)")
+        assert result.session_restarted
+        assert pool.stats()["recycled"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_least_recently_used_session_is_evicted():
+    pool = ReplPool(max_sessions=2, spare_workers=0, preload=[])
+    try:
+        for session_id in ("a", "b", "c"):
+            pool.run("v = 1", session_id=session_id)
+        assert pool.stats()["sessions"] == 2
+        assert "NameError" in pool.run("print(v)", session_id="a").error
+    finally:
+        pool.shutdown()
@@ -0,0 +1,137 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import importlib
+import json
+
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+from src.server.sse import coalesce_message_chunks, make_event
+
+# src.server re-exports the FastAPI instance under the module's name.
+server_app = importlib.import_module("src.server.app")
+
+
+def _chunk(content, message_id="msg-1", **extra):
+    return (
+        "message_chunk",
+        {
+            "thread_id": "t",
+            "agent": "reporter",
+            "id": message_id,
+            "role": "assistant",
+            "content": content,
+            **extra,
+        },
+    )
+
+
+async def _events(items, delay=0.0):
+    for item in items:
+        yield item
+        await asyncio.sleep(delay)
+
+
+async def _collect(events, window=1.0, max_bytes=1024):
+    return [e async for e in coalesce_message_chunks(events, window, max_bytes)]
+
+
+def test_chunks_of_one_message_are_merged():
+    items = [_chunk("Hel"), _chunk("lo"), _chunk(" world", finish_reason="stop")]
+    merged = asyncio.run(_collect(_events(items)))
+    assert merged == [
+        _chunk("Hello world", finish_reason="stop"),
+    ]
+
+
+def test_other_events_flush_in_order():
+    tool_call = ("tool_calls", {"id": "msg-2", "tool_calls": []})
+    items = [_chunk("a"), _chunk("b"), tool_call, _chunk("c", "msg-3"), _chunk("d")]
+    merged = asyncio.run(_collect(_events(items)))
+    assert merged == [_chunk("ab"), tool_call, _chunk("c", "msg-3"), _chunk("d")]
+
+
+def test_window_and_size_limit_flush_batches():
+    slow = [_chunk("a"), _chunk("b")]
+    assert asyncio.run(_collect(_events(slow, delay=0.05), window=0.01)) == slow
+
+    items = [_chunk("x" * 6) for _ in range(4)]
+    merged = asyncio.run(_collect(_events(items), max_bytes=10))
+    assert [data["content"] for _, data in merged] == ["x" * 12, "x" * 12]
+
+
+def test_upstream_errors_propagate():
+    async def failing():
+        yield _chunk("a")
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(_collect(failing()))
+
+
+def test_closing_the_stream_closes_the_upstream_generator():
+    closed = asyncio.Event()
+
+    async def endless():
+        try:
+            while True:
+                yield "tool_calls", {"id": "msg-2", "tool_calls": []}
+        finally:
+            closed.set()
+
+    async def scenario():
+        coalesced = coalesce_message_chunks(endless(), 1.0)
+        await anext(coalesced)
+        # Upstream is paused, waiting for the client to read ahead.
+        await asyncio.sleep(0.01)
+        await coalesced.aclose()
+        return closed.is_set()
+
+    assert asyncio.run(scenario())
+
+
+def test_workflow_stream_coalesces_when_enabled(monkeypatch):
+    class FakeGraph:
+        async def astream(self, *args, **kwargs):
+            for i, token in enumerate(["The", " answer", " is", " 42"]):
+                metadata = {"finish_reason": "stop"} if i == 3 else {}
+                chunk = AIMessageChunk(
+                    content=token, id="run-1", response_metadata=metadata
+                )
+                yield ("reporter:1",), "messages", (chunk, {})
+
+    async def stream():
+        events = server_app._astream_workflow_stream(
+            [], "thread-1", 1, 3, 3, True, None, None, False, None, None
+        )
+        return [event async for event in events]
+
+    monkeypatch.setattr(server_app, "graph", FakeGraph())
+    monkeypatch.setenv("SSE_COALESCE_MS", "50")
+    events = asyncio.run(stream())
+    assert events == [
+        (
+            "message_chunk",
+            {
+                "thread_id": "thread-1",
+                "agent": "reporter",
+                "id": "run-1",
+                "role": "assistant",
+                "content": "The answer is 42",
+                "finish_reason": "stop",
+            },
+        )
+    ]
+
+    monkeypatch.setenv("SSE_COALESCE_MS", "0")
+    events = asyncio.run(stream())
+    assert len(events) == 4
+    assert events[1][1]["content"] == " answer"
+
+
+def test_event_ids_are_sent_as_sse_id_field():
+    frame = make_event("message_chunk", {"content": "hi"}, event_id="7")
+    assert frame.startswith("id: 7\nevent: message_chunk\n")
+    assert json.loads(frame.split("data: ")[1]) == {"content": "hi"}
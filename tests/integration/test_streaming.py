@@ -0,0 +1,113 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import json
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from src.crawler.direct_client import DirectClient
+from src.crawler.jina_client import JinaClient
+from src.crawler.streaming import FetchError, download_stats
+from src.utils.metrics import collect_metrics
+
+CHUNK = b"<p>" + b"x" * 1020 + b"</p>"
+ENDLESS_LIMIT = 64 * 1024 * 1024
+
+
+class _OversizedHandler(BaseHTTPRequestHandler):
+    bytes_sent = 0
+
+    def _stream_endless(self, content_type):
+        # No Content-Length: the body only ends when the client hangs up.
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.end_headers()
+        try:
+            self.wfile.write(b"<html><body>")
+            while _OversizedHandler.bytes_sent < ENDLESS_LIMIT:
+                self.wfile.write(CHUNK)
+                _OversizedHandler.bytes_sent += len(CHUNK)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_GET(self):
+        if self.path == "/endless":
+            self._stream_endless("text/html")
+        elif self.path == "/video.mp4":
+            self._stream_endless("video/mp4")
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if body["url"].endswith("/endless"):
+            self._stream_endless("text/plain; charset=utf-8")
+        elif body["url"].endswith("/slow"):
+            time.sleep(0.5)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", "9")
+            self.end_headers()
+            self.wfile.write(b"rendered.")
+        else:
+            self.send_response(422)
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def oversized_server(local_server):
+    return local_server(_OversizedHandler)
+
+
+def test_direct_client_stops_reading_at_cap(oversized_server):
+    page = DirectClient(max_bytes=100_000).fetch(f"{oversized_server}/endless")
+
+    assert page.truncated
+    assert len(page.html) == 100_000
+    record = download_stats.stats()["recent"][-1]
+    assert record["status"] == "truncated"
+    assert record["buffer_bytes"] == 100_000
+    # Only a few chunks past the cap are read before the connection is dropped.
+    assert record["bytes_read"] < 200_000
+
+
+def test_direct_client_aborts_binary_download(oversized_server):
+    with pytest.raises(FetchError):
+        DirectClient().fetch(f"{oversized_server}/video.mp4")
+    record = download_stats.stats()["recent"][-1]
+    assert record["status"] == "aborted"
+    assert record["bytes_read"] == 0
+
+
+def test_jina_client_streams_with_cap(oversized_server):
+    client = JinaClient(max_bytes=50_000, endpoint=f"{oversized_server}/")
+    html = client.crawl("https://example.com/endless")
+
+    assert html.startswith("<html><body><p>")
+    assert len(html) == 50_000
+
+
+def test_jina_client_raises_on_error_status(oversized_server):
+    client = JinaClient(endpoint=f"{oversized_server}/")
+    with pytest.raises(FetchError):
+        client.crawl("https://example.com/missing")
+
+
+def test_jina_client_has_its_own_timeout(oversized_server, monkeypatch):
+    monkeypatch.setenv("JINA_TIMEOUT", "90")
+    assert JinaClient().timeout == 90
+
+    with pytest.raises(FetchError):
+        JinaClient(endpoint=f"{oversized_server}/", timeout=0.1).crawl(
+            "https://example.com/slow"
+        )
+    client = JinaClient(endpoint=f"{oversized_server}/", timeout=5)
+    assert client.crawl("https://example.com/slow") == "rendered."
+
+
+def test_download_metrics_are_registered():
+    metrics = collect_metrics()["crawl_downloads"]
+    assert {"downloads", "truncated", "aborted", "peak_buffer_bytes"} <= set(metrics)
@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: MIT
 
 import pytest
+from src.prompts import template as template_module
 from src.prompts.template import get_prompt_template, apply_prompt_template
 
 
@@ -20,6 +21,17 @@ def test_get_prompt_template_not_found():
     assert "Error loading template" in str(exc_info.value)
 
 
+def test_get_prompt_template_ignores_unknown_personas():
+    """Test that personas from requests don't grow the template cache"""
+    default = get_prompt_template("coordinator")
+    assert get_prompt_template("coordinator", "financial_analyst") != default
+    before = template_module._load_prompt_template.cache_info().currsize
+    for i in range(10):
+        assert get_prompt_template("coordinator", f"persona {i}") == default
+    assert get_prompt_template("coordinator", "../planner") == default
+    assert template_module._load_prompt_template.cache_info().currsize == before
+
+
 def test_apply_prompt_template():
     """Test template variable substitution"""
     test_state = {
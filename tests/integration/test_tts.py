@@ -1,13 +1,24 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import asyncio
+import importlib
 import json
+import time
+from http.server import BaseHTTPRequestHandler
 import pytest
 from unittest.mock import patch, MagicMock
 import uuid
 import base64
 
+from fastapi.testclient import TestClient
+
+from src.server.admission import AdmissionController
 from src.tools.tts import VolcengineTTS
+from src.tools.tts_cache import TTSCache
+from src.tools.tts_chunks import split_text
+
+server_app = importlib.import_module("src.server.app")
 
 
 class TestVolcengineTTS:
@@ -229,3 +240,224 @@ class TestVolcengineTTS:
         args, kwargs = mock_post.call_args
         request_json = json.loads(args[1])
         assert request_json["user"]["uid"] == str(mock_uuid_value)
+
+    @patch("src.tools.tts.requests.post")
+    def test_text_to_speech_uses_cache(self, mock_post, tmp_path):
+        """Test that identical requests are answered from the cache."""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "data": base64.b64encode(b"audio_data").decode()
+        }
+        mock_post.return_value = mock_response
+
+        cache = TTSCache(str(tmp_path))
+        tts = VolcengineTTS(appid="test_appid", access_token="test_token", cache=cache)
+        first = tts.text_to_speech("Hello, world!", speed_ratio=1.05)
+        second = tts.text_to_speech("Hello, world!", speed_ratio=1.05)
+        assert second["cached"] is True
+        assert second["audio_data"] == first["audio_data"]
+        assert mock_post.call_count == 1
+
+        # Another voice or prosody is another request.
+        tts.text_to_speech("Hello, world!", speed_ratio=1.05, voice_type="BV001")
+        tts.text_to_speech("Hello, world!", speed_ratio=1.1)
+        assert mock_post.call_count == 3
+
+        # Failures are not cached.
+        mock_response.status_code = 500
+        assert not tts.text_to_speech("Hello again", retries=0)["success"]
+        assert not tts.text_to_speech("Hello again", retries=0)["success"]
+        assert mock_post.call_count == 5
+        assert cache.stats()["entries"] == 3
+
+
+def test_tts_cache_evicts_least_recently_used(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=25)
+    cache.put("a", b"a" * 10)
+    cache.put("b", b"b" * 10)
+    assert cache.get("a") == b"a" * 10
+    cache.put("c", b"c" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    cache.put("huge", b"x" * 26)
+    assert cache.get("huge") is None
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 3
+    assert stats["bytes_saved"] == 30
+
+
+def test_split_text_at_sentences_under_the_limit():
+    text = "Pi is 3.14 roughly. Next sentence here! " * 4 + "这是一句话。" * 20
+    chunks = split_text(text, max_bytes=100)
+    assert all(len(chunk.encode("utf-8")) <= 100 for chunk in chunks)
+    assert (
+        chunks[0]
+        == "Pi is 3.14 roughly. Next sentence here! " * 2 + "Pi is 3.14 roughly."
+    )
+    assert all(chunk.endswith((".", "!", "。")) for chunk in chunks)
+    assert "".join(chunks).replace(" ", "") == text.replace(" ", "")
+    # Overlong sentences fall back to clauses, words and characters.
+    assert split_text("one, two, three", max_bytes=9) == ["one,", "two,", "three"]
+    assert split_text("x" * 25, max_bytes=10) == ["x" * 10, "x" * 10, "x" * 5]
+    assert split_text("  ") == []
+
+
+def _tts_server(local_server, respond):
+    """Start a stub TTS API answering every request body with respond(body)."""
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            requests_seen.append((self.client_address, self.headers, body))
+            status, response = respond(body)
+            data = json.dumps(response).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return local_server(Handler), requests_seen
+
+
+def test_async_text_to_speech_pools_connections_and_retries(local_server):
+    statuses = iter([503, 429, 200, 200, 400])
+
+    def respond(body):
+        status = next(statuses)
+        if status != 200:
+            return status, {"message": "unavailable"}
+        audio = body["request"]["text"].encode()
+        return 200, {"code": 3000, "data": base64.b64encode(audio).decode()}
+
+    url, seen = _tts_server(local_server, respond)
+    tts = VolcengineTTS(appid="app", access_token="token", api_url=url)
+
+    async def scenario():
+        retried = await tts.atext_to_speech("Hello", voice_type="BV001", backoff=0.01)
+        second = await tts.atext_to_speech("Again")
+        failed = await tts.atext_to_speech("Bad")
+        return retried, second, failed
+
+    retried, second, failed = asyncio.run(scenario())
+    assert retried["success"] and base64.b64decode(retried["audio_data"]) == b"Hello"
+    assert second["success"] and base64.b64decode(second["audio_data"]) == b"Again"
+    # Client errors are not retried.
+    assert not failed["success"] and failed["error"] == {"message": "unavailable"}
+    assert len(seen) == 5
+    # Every request went over the same kept-alive connection.
+    assert len({address for address, _, _ in seen}) == 1
+    _, headers, body = seen[0]
+    assert headers["Authorization"] == "Bearer;token"
+    assert body["app"] == {"appid": "app", "token": "token", "cluster": "volcano_tts"}
+    assert body["audio"]["voice_type"] == "BV001"
+    assert body["request"]["text"] == "Hello"
+
+    # Nothing listens here, so every attempt fails to connect.
+    unreachable = VolcengineTTS(
+        appid="app", access_token="token", api_url="http://127.0.0.1:9/api/v1/tts"
+    )
+    result = asyncio.run(unreachable.atext_to_speech("Hello", retries=1, backoff=0))
+    assert not result["success"] and "ConnectError" in result["error"]
+
+
+def test_text_to_speech_retries_like_the_async_client(local_server):
+    statuses = iter([503, 429, 200, 400])
+
+    def respond(body):
+        status = next(statuses)
+        if status != 200:
+            return status, {"message": "unavailable"}
+        audio = body["request"]["text"].encode()
+        return 200, {"code": 3000, "data": base64.b64encode(audio).decode()}
+
+    url, seen = _tts_server(local_server, respond)
+    tts = VolcengineTTS(appid="app", access_token="token", api_url=url)
+
+    retried = tts.text_to_speech("Hello", backoff=0.01)
+    assert retried["success"] and base64.b64decode(retried["audio_data"]) == b"Hello"
+    # Client errors are not retried.
+    failed = tts.text_to_speech("Bad", backoff=0.01)
+    assert not failed["success"] and failed["error"] == {"message": "unavailable"}
+    assert len(seen) == 4
+
+    unreachable = VolcengineTTS(
+        appid="app", access_token="token", api_url="http://127.0.0.1:9/api/v1/tts"
+    )
+    result = unreachable.text_to_speech("Hello", retries=1, backoff=0)
+    assert not result["success"] and "ConnectionError" in result["error"]
+
+
+def test_tts_endpoint_synthesizes_long_text_in_parallel(monkeypatch, local_server):
+    def respond(body):
+        time.sleep(0.05)
+        # A bare MPEG frame for every part, carrying its text.
+        text = body["request"]["text"]
+        audio = b"\xff\xfb\x90\x00" + text.encode().ljust(413, b"\0")
+        return 200, {"code": 3000, "data": base64.b64encode(audio).decode()}
+
+    url, _ = _tts_server(local_server, respond)
+    monkeypatch.setenv("VOLCENGINE_TTS_API_URL", url)
+    monkeypatch.setenv("VOLCENGINE_TTS_APPID", "app")
+    monkeypatch.setenv("VOLCENGINE_TTS_ACCESS_TOKEN", "token")
+    monkeypatch.setenv("TTS_CACHE_ENABLED", "false")
+    monkeypatch.setenv("TTS_MAX_TEXT_BYTES", "20")
+    monkeypatch.setenv("TTS_CONCURRENCY", "8")
+    sentences = [f"Sentence {i:02}." for i in range(16)]
+
+    with TestClient(server_app.app) as client:
+        # Starts the pooled client and its event loop.
+        assert client.post("/api/tts", json={"text": "Hello."}).status_code == 200
+        started = time.perf_counter()
+        response = client.post("/api/tts", json={"text": " ".join(sentences)})
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 200
+        frames = [response.content[i : i + 417] for i in range(0, 16 * 417, 417)]
+        assert [frame[4:].rstrip(b"\0").decode() for frame in frames] == sentences
+        # 16 parts one at a time would take 0.8s.
+        assert elapsed < 0.5
+
+        ssml = client.post(
+            "/api/tts", json={"text": " ".join(sentences), "text_type": "ssml"}
+        )
+        assert ssml.status_code == 400
+
+
+def test_tts_endpoint_fails_when_a_part_fails(monkeypatch, local_server):
+    def respond(body):
+        text = body["request"]["text"]
+        if text == "Sentence 05.":
+            return 400, {"message": "rejected"}
+        audio = b"\xff\xfb\x90\x00" + text.encode().ljust(413, b"\0")
+        return 200, {"code": 3000, "data": base64.b64encode(audio).decode()}
+
+    url, seen = _tts_server(local_server, respond)
+    monkeypatch.setenv("VOLCENGINE_TTS_API_URL", url)
+    monkeypatch.setenv("VOLCENGINE_TTS_APPID", "app")
+    monkeypatch.setenv("VOLCENGINE_TTS_ACCESS_TOKEN", "token")
+    monkeypatch.setenv("TTS_CACHE_ENABLED", "false")
+    monkeypatch.setenv("TTS_MAX_TEXT_BYTES", "20")
+    monkeypatch.setenv("TTS_MAX_TOTAL_BYTES", "300")
+    controller = AdmissionController("tts", max_concurrent=1, max_queue=1)
+    monkeypatch.setattr(server_app, "get_admission_controller", lambda name: controller)
+    sentences = [f"Sentence {i:02}." for i in range(16)]
+
+    with TestClient(server_app.app) as client:
+        # A part in the middle failing is an error, not a shorter file.
+        response = client.post("/api/tts", json={"text": " ".join(sentences)})
+        assert response.status_code == 500
+        assert "part 6 of 16" in response.json()["detail"]
+        assert controller.stats()["running"] == 0
+
+        too_long = client.post("/api/tts", json={"text": "x" * 301})
+        assert too_long.status_code == 413
+        # Parts cancelled by the failure may still arrive, but none of these.
+        assert not [body for _, _, body in seen if "x" in body["request"]["text"]]
@@ -0,0 +1,64 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import importlib
+import io
+import time
+
+import httpx
+from langchain_core.messages import AIMessageChunk
+
+from src.server.admission import AdmissionController
+from src.server.event_log import EventLogRegistry
+
+server_app = importlib.import_module("src.server.app")
+
+
+class FakeChatGraph:
+    async def astream(self, *args, **kwargs):
+        chunk = AIMessageChunk(content="done", id="run-1")
+        yield ("reporter:1",), "messages", (chunk, {})
+
+
+class FakePodcastGraph:
+    def invoke(self, state):
+        # Blocks like the script writer, TTS and mixing nodes do.
+        time.sleep(1)
+        return {"output": io.BytesIO(b"mp3:" + state["input"].encode())}
+
+
+def test_chat_stream_is_not_blocked_by_podcast(monkeypatch):
+    controllers = {}
+    monkeypatch.setenv("GENERATION_CACHE_ENABLED", "false")
+    monkeypatch.setattr(server_app, "graph", FakeChatGraph())
+    monkeypatch.setattr(server_app, "get_graph", lambda name: FakePodcastGraph())
+    monkeypatch.setattr(server_app, "get_event_logs", lambda: EventLogRegistry())
+    monkeypatch.setattr(
+        server_app,
+        "get_admission_controller",
+        lambda name: controllers.setdefault(name, AdmissionController(name, 1, 1)),
+    )
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=server_app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            podcast = asyncio.create_task(
+                c.post("/api/podcast/generate", json={"content": "report"})
+            )
+            await asyncio.sleep(0.2)
+            started = time.perf_counter()
+            chat = await c.post(
+                "/api/chat/stream",
+                json={"thread_id": "t", "messages": [], "auto_accepted_plan": True},
+            )
+            latency = time.perf_counter() - started
+            assert not podcast.done()
+            return chat, latency, await podcast
+
+    chat, latency, podcast = asyncio.run(scenario())
+    assert "event: message_chunk" in chat.text
+    assert latency < 0.5
+    assert podcast.status_code == 200
+    assert podcast.content == b"mp3:report"
+    assert controllers["podcast"].stats()["running"] == 0
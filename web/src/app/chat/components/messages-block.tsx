@@ -13,7 +13,7 @@ import {
   CardHeader,
   CardTitle,
 } from "~/components/ui/card";
-import { fastForwardReplay } from "~/core/api";
+import { cancelChatStream, fastForwardReplay } from "~/core/api";
 import { useReplayMetadata } from "~/core/api/hooks";
 import type { Option } from "~/core/messages";
 import { useReplay } from "~/core/replay";
@@ -56,6 +56,10 @@ export function MessagesBlock({ className }: { className?: string }) {
   const handleCancel = useCallback(() => {
     abortControllerRef.current?.abort();
     abortControllerRef.current = null;
+    const threadId = useStore.getState().threadId;
+    if (threadId) {
+      void cancelChatStream(threadId).catch(() => undefined);
+    }
   }, []);
   const handleFeedback = useCallback(
     (feedback: { option: Option }) => {
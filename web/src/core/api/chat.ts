@@ -88,6 +88,17 @@ export async function* chatStream(
   }
 }
 
+export async function cancelChatStream(threadId: string) {
+  if (env.NEXT_PUBLIC_STATIC_WEBSITE_ONLY) {
+    return;
+  }
+  // Aborting the request only closes the stream, the run goes on until cancelled.
+  await fetch(
+    resolveServiceURL(`chat/stream/${encodeURIComponent(threadId)}`),
+    { method: "DELETE" },
+  );
+}
+
 async function* chatReplayStream(
   userMessage: string,
   params: {
@@ -75,9 +75,27 @@ export interface InterruptEvent
     }
   > {}
 
-export type ChatEvent =
+export interface QueuePositionEvent {
+  type: "queue_position";
+  data: {
+    thread_id: string;
+    position: number;
+  };
+}
+
+export type MessageStreamEvent =
   | MessageChunkEvent
   | ToolCallsEvent
   | ToolCallChunksEvent
   | ToolCallResultEvent
   | InterruptEvent;
+
+export interface ErrorEvent {
+  type: "error";
+  data: {
+    thread_id: string;
+    message: string;
+  };
+}
+
+export type ChatEvent = MessageStreamEvent | QueuePositionEvent | ErrorEvent;
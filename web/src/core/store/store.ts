@@ -126,6 +126,13 @@ export async function sendMessage(
   let messageId: string | undefined;
   try {
     for await (const event of stream) {
+      if (event.type === "queue_position") {
+        // The server is busy and the run has not started yet.
+        continue;
+      }
+      if (event.type === "error") {
+        throw new Error(event.data.message);
+      }
       const { type, data } = event;
       messageId = data.id;
       let message: Message | undefined;